@@ -9,21 +9,30 @@ Usage examples:
   python c_array_to_image.py --input my_array.txt --out out.png --width 128
   python c_array_to_image.py --input my_array.txt --mode auto
   python c_array_to_image.py --input my_array.txt --out out.png --width 32 --mode rgb
+  python c_array_to_image.py --input textures/BOSSA2_walk.h --array BOSSA2_frame_1
+
+Texture headers are read with the tools' header tokenizer, so the width comes
+from their NAME_WIDTH defines or *_frame_widths tables instead of a guess.
+(tools/headers_to_png.py exports every array of a whole directory.)
 """
 
-import re
+import io
+import os
+import sys
 import math
 import argparse
 from PIL import Image
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+from texture_header import decode_c_array, read_raw_arrays
+
 def parse_c_array(text):
     """
     Extract integers from a C-style array text.
     Accepts numbers separated by commas, newlines, braces, etc.
-    Returns a list of ints (0..255).
+    Returns a bytearray of values clamped to 0..255.
     """
-    nums = re.findall(r'-?\d+', text)
-    return [int(n) for n in nums]
+    return decode_c_array(io.StringIO(text))
 
 def infer_shape(n_pixels, width=None, channels=1):
     """
@@ -64,8 +73,9 @@ def create_image(values, out_path, width=None, mode='auto'):
     if not values:
         raise ValueError("No values parsed from input.")
 
-    # clamp values to byte range
-    values = [max(0, min(255, int(v))) for v in values]
+    # clamp values to byte range (parse_c_array already returns bytes)
+    if not isinstance(values, (bytes, bytearray)):
+        values = bytes(max(0, min(255, int(v))) for v in values)
 
     # decide mode
     if mode == 'auto':
@@ -110,6 +120,19 @@ def create_image(values, out_path, width=None, mode='auto'):
     img.save(out_path)
     return w, h, channels
 
+def header_array(path, name=None):
+    """
+    Return the named (or first) sized char array declared in a texture header,
+    or None if the file holds no such declaration (e.g. a pasted bare array).
+    """
+    try:
+        arrays = [a for a in read_raw_arrays(path) if a['width'] and a['height']]
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if name:
+        arrays = [a for a in arrays if a['name'] == name]
+    return arrays[0] if arrays else None
+
 def main():
     p = argparse.ArgumentParser(description="Convert C array to image.")
     p.add_argument('--input', '-i', required=True, help="Path to file containing the C-style array (or paste).")
@@ -117,12 +140,24 @@ def main():
     p.add_argument('--width', '-w', type=int, default=None, help="Image width in pixels (optional).")
     p.add_argument('--mode', choices=['auto','grayscale','rgb'], default='auto',
                    help="Interpretation mode: 'auto'/'grayscale'/'rgb'.")
+    p.add_argument('--array', '-a', default=None, help="Array to convert when the input is a header with several.")
     args = p.parse_args()
 
-    with open(args.input, 'r', encoding='utf-8') as f:
-        txt = f.read()
-
-    vals = parse_c_array(txt)
+    array = header_array(args.input, args.array)
+    if array:
+        # Sized texture array: dimensions come from the header
+        vals = array['data']
+        args.width = args.width or array['width']
+        if args.mode == 'auto':
+            args.mode = 'rgb'
+        print(f"Using {array['name']} ({array['width']}x{array['height']})")
+    elif args.array:
+        print(f"ERROR: no sized array named {args.array} in {args.input}")
+        return
+    else:
+        # Stream the file so large arrays never sit in memory as text
+        with open(args.input, 'r', encoding='utf-8') as f:
+            vals = decode_c_array(f)
     try:
         w, h, channels = create_image(vals, args.out, width=args.width, mode=args.mode)
     except ValueError as e:
@@ -313,10 +313,15 @@ echo start "" "tools\TextureEditorPro.exe"
 
 echo [OK] Launcher scripts created
 
-REM Copy sau_builder.py to tools for future use
-if exist "%TOOLS_DIR%\sau_builder.py" (
-    copy /Y "%TOOLS_DIR%\sau_builder.py" "%OUTPUT_DIR%\tools\" >nul
-    echo [OK] sau_builder.py copied to tools
+REM Copy sau_builder.py to tools for future use, with the modules it imports
+REM (texture_header reads sidecars through texture_sidecar; frame_dedup keys frames)
+for %%M in (sau_builder texture_header texture_sidecar frame_dedup) do (
+    if exist "%TOOLS_DIR%\%%M.py" (
+        copy /Y "%TOOLS_DIR%\%%M.py" "%OUTPUT_DIR%\tools\" >nul
+        echo [OK] %%M.py copied to tools
+    ) else (
+        echo [WARNING] %%M.py not found, sau_builder.py will not run from the package
+    )
 )
 
 REM ================================================================
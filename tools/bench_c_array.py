@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the header writers against the shared emitter in c_array_writer.py.
+
+Each of the old per-tool writers is kept below in its original form and timed
+against c_array_writer on the same pixel buffer (by default the decoded
+skybox_1_bk.h, 256x256 RGB). Reports seconds per MB of pixel data for each
+layout and checks that old and new write the same text.
+
+Usage:
+  python bench_c_array.py [header.h] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from c_array_writer import write_c_values
+from texture_header import parse_header_arrays
+
+
+def legacy_convert_texture(f, data):
+    """convert_texture.image_to_c_header: one str() per value, one list of lines."""
+    pixels = [tuple(data[i:i + 3]) for i in range(0, len(data), 3)]
+    flat_vals = []
+    for (r, g, b) in pixels:
+        flat_vals.extend([str(r), str(g), str(b)])
+    lines = []
+    for i in range(0, len(flat_vals), 48):
+        chunk = flat_vals[i:i + 48]
+        lines.append("  " + ", ".join(chunk) + ("," if i + 48 < len(flat_vals) else ""))
+    f.write("\n".join(lines))
+
+
+def legacy_extract_bmp(f, data):
+    """extract_bmp_to_raw.generate_c_header: grows one string with +=."""
+    rgb_data = list(data)
+    text = ""
+    for i in range(0, len(rgb_data), 48):
+        chunk = rgb_data[i:i + 48]
+        text += "  "
+        text += ", ".join(str(b) for b in chunk)
+        if i + 48 < len(rgb_data):
+            text += ",\n"
+    f.write(text)
+
+
+def legacy_editor(f, data):
+    """ModernTextureEditor.write_image_data: one f.write per value group."""
+    pixels = [tuple(data[i:i + 3]) for i in range(0, len(data), 3)]
+    for i, (r, g, b) in enumerate(pixels):
+        if i % 12 == 0:
+            f.write("    ")
+        f.write(f"{r:3d}, {g:3d}, {b:3d}")
+        if i < len(pixels) - 1:
+            f.write(", ")
+        if i % 12 == 11:
+            f.write("\n")
+
+
+LAYOUTS = [
+    ("convert_texture", legacy_convert_texture, dict(values_per_line=48, indent="  ")),
+    ("extract_bmp_to_raw", legacy_extract_bmp, dict(values_per_line=48, indent="  ")),
+    ("texture_editor_pro", legacy_editor, dict(values_per_line=36, indent="    ", padded=True, line_end=", \n")),
+]
+
+
+def time_writer(write, path, repeat):
+    """Best-of-repeat wall time to write the text to a new file (the last run is kept at path)."""
+    best = None
+    for run in range(repeat):
+        run_path = f"{path}.{run}"
+        start = time.perf_counter()
+        with open(run_path, 'w') as f:
+            write(f)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        os.replace(run_path, path)
+    return best
+
+
+def main():
+    default_header = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures", "skybox_1_bk.h")
+    parser = argparse.ArgumentParser(description="Benchmark C header writers")
+    parser.add_argument('header', nargs='?', default=default_header)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per writer (best is reported)")
+    args = parser.parse_args()
+
+    data = b''.join(bytes(a['data']) for a in parse_header_arrays(args.header))
+    mb = len(data) / (1024 * 1024)
+    print(f"Input: {os.path.basename(args.header)}, {len(data)} bytes of pixel data")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "old.h")
+        new_path = os.path.join(tmp, "new.h")
+        for name, legacy, layout in LAYOUTS:
+            old_s = time_writer(lambda f: legacy(f, data), old_path, args.repeat)
+            new_s = time_writer(lambda f: write_c_values(f, data, **layout), new_path, args.repeat)
+            with open(old_path) as f_old, open(new_path) as f_new:
+                same = f_old.read() == f_new.read()
+            print(f"{name:20} before {old_s / mb:7.3f} s/MB   after {new_s / mb:7.3f} s/MB   "
+                  f"{old_s / new_s:5.2f}x{'' if same else '   OUTPUT DIFFERS'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark texture header parsing throughput on a texture directory.
+
+Compares the single-pass tokenizer in texture_header.py against the previous
+per-array regex parser (kept below as legacy_parse_header_text) and reports
+MB/s for each, plus any header where the two disagree.
+
+Usage:
+  python bench_texture_parse.py [texture_dir] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import time
+
+from texture_header import parse_header_text
+
+
+def legacy_parse_header_text(data):
+    """The old parser: one re.search over the whole file per array, then re.findall per body."""
+    textures = []
+
+    dim_arrays = {}
+    for match in re.finditer(r'(?:static\s+)?(?:const\s+)?int\s+([a-zA-Z0-9_]+)(?:\[\d*\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL):
+        dim_arrays[match.group(1)] = [int(num) for num in re.findall(r'\b\d+\b', match.group(2))]
+
+    for match in re.finditer(r'(?:static\s+)?(?:const\s+)?(?:unsigned\s+)?char\s+([a-zA-Z0-9_]+)(?:\[\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL):
+        name = match.group(1)
+        content = match.group(2)
+
+        width = 0
+        height = 0
+        w_match = re.search(f'#define\\s+{name}_WIDTH\\s+(\\d+)', data)
+        h_match = re.search(f'#define\\s+{name}_HEIGHT\\s+(\\d+)', data)
+        if not w_match:
+            base_name = re.sub(r'_frame_\d+$', '', name)
+            w_match = re.search(f'#define\\s+{base_name}_FRAME_WIDTH\\s+(\\d+)', data)
+            if not w_match:
+                w_match = re.search(f'#define\\s+{base_name}_WIDTH\\s+(\\d+)', data)
+        if not h_match:
+            base_name = re.sub(r'_frame_\d+$', '', name)
+            h_match = re.search(f'#define\\s+{base_name}_FRAME_HEIGHT\\s+(\\d+)', data)
+            if not h_match:
+                h_match = re.search(f'#define\\s+{base_name}_HEIGHT\\s+(\\d+)', data)
+
+        if w_match and h_match:
+            width = int(w_match.group(1))
+            height = int(h_match.group(1))
+        else:
+            frame_match = re.match(r'([a-zA-Z0-9_]+)_frame_(\d+)', name)
+            if frame_match:
+                prefix = frame_match.group(1)
+                idx = int(frame_match.group(2))
+                widths = dim_arrays.get(f"{prefix}_frame_widths", [])
+                heights = dim_arrays.get(f"{prefix}_frame_heights", [])
+                if idx < len(widths) and idx < len(heights):
+                    width = widths[idx]
+                    height = heights[idx]
+
+        if width == 0 or height == 0:
+            continue
+
+        pixel_vals = [int(num) for num in re.findall(r'\b\d+\b', content)]
+        expected = width * height * 3
+        if len(pixel_vals) < expected:
+            pixel_vals += [0] * (expected - len(pixel_vals))
+        textures.append({
+            'name': name,
+            'width': width,
+            'height': height,
+            'data': bytes(pixel_vals[:expected])
+        })
+
+    return textures
+
+
+def time_parser(parse, texts, repeat):
+    """Best-of-repeat wall time to parse every text once."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts.values():
+            parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures")
+    parser = argparse.ArgumentParser(description="Benchmark texture header parsing")
+    parser.add_argument('texture_dir', nargs='?', default=default_dir)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per parser (best is reported)")
+    args = parser.parse_args()
+
+    texts = {}
+    for entry in sorted(os.listdir(args.texture_dir)):
+        if entry.endswith('.h'):
+            with open(os.path.join(args.texture_dir, entry), 'r') as f:
+                texts[entry] = f.read()
+    total_mb = sum(len(t) for t in texts.values()) / (1024 * 1024)
+    print(f"Corpus: {len(texts)} headers, {total_mb:.2f} MB")
+
+    # Silence "Could not find dimensions" noise while timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_s = time_parser(legacy_parse_header_text, texts, args.repeat)
+        new_s = time_parser(parse_header_text, texts, args.repeat)
+
+        mismatches = []
+        for name, text in texts.items():
+            old = [(a['name'], a['width'], a['height'], a['data']) for a in legacy_parse_header_text(text)]
+            new = [(a['name'], a['width'], a['height'], a['data']) for a in parse_header_text(text)]
+            if old != new:
+                mismatches.append(name)
+
+    print(f"legacy regex parser: {legacy_s:.3f} s  ({total_mb / legacy_s:.2f} MB/s)")
+    print(f"single-pass scanner: {new_s:.3f} s  ({total_mb / new_s:.2f} MB/s)")
+    print(f"speedup: {legacy_s / new_s:.2f}x")
+    if mismatches:
+        # Expected where the old regexes were wrong: arrays that are entirely
+        # commented out, comments inside array bodies (T_01.h) and lower-case
+        # arrays with upper-case size defines (oracular_texture.h).
+        print(f"Outputs differ for: {', '.join(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+C initializer emitter shared by every texture header writer.
+
+Formats a bytes-like buffer as the comma separated body of a C array using
+precomputed per-byte strings (no str() or f-string per value) and writes it in
+large blocks instead of one write per value or pixel. Each writer keeps its
+own layout through the keyword arguments:
+
+  convert_texture.py / extract_bmp_to_raw.py   48 values per line, "  " indent
+  texture_editor_pro.py                        36 values per line, "    " indent, %3d
+
+Three formats are supported (texture_header.py reads all of them):
+  decimal   { 12, 34, ... }       the original form
+  hex       { 0x0c, 0x22, ... }
+  string    [N] = "\014\042..." ; one literal per line; printable bytes are
+                                  written as is (textures/PNG: 1.35x smaller
+                                  than decimal, parses about 2x faster)
+
+MSVC rejects a string literal over 65,535 bytes once its lines are
+concatenated (error C2026), so arrays longer than STRING_LITERAL_MAX - 1
+bytes (a 256x256 RGB skybox face is 196,608) are written as decimal instead;
+fit_format picks the format to use for a given size.
+
+The emitted text never includes the braces or the final newline; use
+array_open / array_close for the declaration around it.
+"""
+
+HEADER_FORMATS = ('decimal', 'hex', 'string')
+# Longest string literal MSVC accepts, terminating NUL included
+STRING_LITERAL_MAX = 65535
+
+# Per-byte strings, built once
+DECIMAL = [str(i) for i in range(256)]
+DECIMAL_PADDED = [f"{i:3d}" for i in range(256)]
+HEX = [f"0x{i:02x}" for i in range(256)]
+# Printable ASCII as is; everything else (and \ " ?, to dodge trigraphs) as a
+# 3-digit octal escape, which can never swallow a following digit
+STRING = [chr(i) if 32 <= i < 127 and chr(i) not in '\\"?' else f"\\{i:03o}" for i in range(256)]
+
+LINES_PER_WRITE = 4096
+
+
+def iter_c_values(data, values_per_line=48, indent="  ", padded=False,
+                  separator=", ", line_end=",\n", fmt='decimal'):
+    """Yield the initializer text for data in large chunks.
+
+    data is any bytes-like object (or a list of ints 0..255). Lines are joined
+    by line_end; the last line has no trailing separator. In string format
+    each line is one quoted literal and separator / line_end are ignored.
+    """
+    if fmt == 'string':
+        table = STRING
+        indent += '"'
+        separator = ''
+        line_end = '"\n'
+    elif fmt == 'hex':
+        table = HEX
+    elif fmt == 'decimal':
+        table = DECIMAL_PADDED if padded else DECIMAL
+    else:
+        raise ValueError(f"Unknown header format: {fmt}")
+    lookup = table.__getitem__
+    view = memoryview(data) if not isinstance(data, list) else data
+    total = len(view)
+    if total == 0 and fmt == 'string':
+        yield indent + '"'  # an empty literal: 'decl[0] = "";', never 'decl[0] = ;'
+        return
+    step = values_per_line * LINES_PER_WRITE
+    for block_start in range(0, total, step):
+        block_end = min(block_start + step, total)
+        lines = [indent + separator.join(map(lookup, view[i:min(i + values_per_line, block_end)]))
+                 for i in range(block_start, block_end, values_per_line)]
+        text = line_end.join(lines)
+        if block_end < total:
+            yield text + line_end
+        else:
+            yield text + '"' if fmt == 'string' else text
+
+
+def write_c_values(f, data, **layout):
+    """Write the initializer text for data to an open text file."""
+    for chunk in iter_c_values(data, **layout):
+        f.write(chunk)
+
+
+def c_values_text(data, **layout):
+    """Return the initializer text for data as one string."""
+    return ''.join(iter_c_values(data, **layout))
+
+
+def fit_format(fmt, size):
+    """The format to write a size byte array in: 'string' falls back to 'decimal' past STRING_LITERAL_MAX."""
+    return 'decimal' if fmt == 'string' and size >= STRING_LITERAL_MAX else fmt
+
+
+def array_open(decl, size, fmt='decimal'):
+    """Opening of a char array: 'decl[] = {', or 'decl[size] =' for string literals.
+
+    The string form needs the explicit size so the literal's NUL is dropped.
+    """
+    return f"{decl}[{size}] =" if fmt == 'string' else f"{decl}[] = {{"
+
+
+def array_close(fmt='decimal'):
+    return ";" if fmt == 'string' else "};"
+
+
+def c_int_list(values, separator=", "):
+    """Format a short list of ints (frame widths, durations, ...) for an initializer."""
+    return separator.join(map(str, values))
@@ -4,19 +4,61 @@ Convert image files to C header format for the DoomClone texture system.
 Requires PIL/Pillow: pip install pillow
 
 Usage:
-  python convert_texture.py input_image.png output_name_or_path
+  python convert_texture.py input_image.png output_name_or_path [--sidecar]
 
 Examples:
   python convert_texture.py "D:\...\604.png" T_00
   python convert_texture.py "D:\...\604.png" textures/T_00.h
   python convert_texture.py 604.png "C:\temp\mytex.h"
+  python convert_texture.py 604.png textures/T_00.h --sidecar   (also writes textures/T_00.rgb)
+  python convert_texture.py 604.png T_00 --format string       (decimal | hex | string)
+  python convert_texture.py 604.png T_00 --indexed              (8-bit: palette + 1 byte per pixel)
+  python convert_texture.py imp.png IMP --trim                  (crop to visible pixels + offsets)
+  python convert_texture.py 604.png T_00 --pow2 --filter lanczos  (resample to power-of-two sizes)
+
+Batch mode converts every PNG under a source tree, one header per image named
+after the file (textures/PNG/walls/WALL58_2.png -> WALL58_2.h), skipping images
+whose content hash is unchanged since the last run:
+  python convert_texture.py --batch ../textures/PNG --out ../textures [--jobs N] [--force]
+
+With --indexed (needs NumPy) the images of each subdirectory share one
+palette named after it (walls/ -> walls_palette; images directly under the
+source directory use its name), or the whole batch shares the palette named by
+--palette-group; see texture_palette.py. A group's palette is rebuilt only when
+one of its images changed.
+With --trim (needs NumPy) each image is cropped to its non-transparent pixels
+(alpha, or the key color 1,0,0) and the crop position is written as
+NAME_X_OFFSET / NAME_Y_OFFSET / NAME_FULL_WIDTH / NAME_FULL_HEIGHT; see sprite_trim.py.
+
+With --pow2 [nearest|up|down] each dimension is resampled to a power of two
+(the nearest one by default) with --filter nearest, box or lanczos, so the
+samplers can wrap with a mask and textures can be mipmapped. A resampled
+header keeps its source size as NAME_ORIG_WIDTH / NAME_ORIG_HEIGHT, which the
+editor uses to keep its texel-based UVs tiling as before (the game's wall
+sampler already scales u by the texture width). Use --filter nearest for
+sprites with the transparent key color; the other filters blend it into the
+edges.
 """
 
-import sys
+import argparse
+import hashlib
+import json
 import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
+from c_array_writer import HEADER_FORMATS, array_close, array_open, fit_format, write_c_values
+from texture_sidecar import update_manifest, write_sidecar
+
+BATCH_MANIFEST = '.convert_manifest.json'
+# 2: indexed sidecars hold the quantized colors (version 1 ones held the source colors)
+BATCH_MANIFEST_VERSION = 2
+
+RESAMPLE_FILTERS = {'nearest': Image.NEAREST, 'box': Image.BOX, 'lanczos': Image.LANCZOS}
+POW2_MODES = ('nearest', 'up', 'down')
+
 def make_identifier(name: str) -> str:
     """Create a safe C identifier from a filename (no extension)."""
     # keep letters, digits, and underscores; replace others with underscore
@@ -26,14 +68,58 @@ def make_identifier(name: str) -> str:
         ident = '_' + ident
     return ident
 
-def image_to_c_header(input_path, output_name):
+def pow2_size(n, mode='nearest'):
+    """Power of two for a texture dimension: rounded 'up', 'down' or to the 'nearest' (ties go up)."""
+    lower = 1 << (n.bit_length() - 1)
+    if lower == n:
+        return n
+    upper = lower << 1
+    if mode == 'up':
+        return upper
+    if mode == 'down':
+        return lower
+    return upper if upper - n <= n - lower else lower
+
+def resample_pow2(img, mode='nearest', resample='box'):
+    """Resample an image to power-of-two dimensions. Returns (image, original size or None if unchanged)."""
+    size = (pow2_size(img.width, mode), pow2_size(img.height, mode))
+    if size == img.size:
+        return img, None
+    return img.resize(size, RESAMPLE_FILTERS[resample]), img.size
+
+def image_to_c_header(input_path, output_name, sidecar=False, sidecar_manifest=True, fmt='decimal',
+                      indexed=False, palette_group=None, palette=None, trim=False, pow2=None, resample='box'):
+    """Write one image as a texture header and return its path.
+
+    With indexed=True the header holds a group palette and one index per pixel;
+    palette is the group's palette (built from this image alone if None) and
+    palette_group its name (default: the header name). With trim=True the
+    image is cropped to its visible pixels first. With pow2 set to one of
+    POW2_MODES it is resampled to power-of-two dimensions with the resample
+    filter (see RESAMPLE_FILTERS).
+    """
+    if trim and pow2:
+        raise ValueError("trim and pow2 can't be combined: a trimmed sprite is no longer power-of-two")
+
     # Load image
     img = Image.open(input_path)
+    alpha = None
+    if trim and ('A' in img.getbands() or 'transparency' in img.info):
+        alpha = img.convert('RGBA').getchannel('A').tobytes()
     if img.mode != 'RGB':
         img = img.convert('RGB')
 
+    original_size = None
+    if pow2:
+        img, original_size = resample_pow2(img, pow2, resample)
+
     width, height = img.size
-    pixels = list(img.getdata())
+    pixels = img.tobytes()
+    trim_box = None
+    if trim:
+        from sprite_trim import trim_array
+        trimmed = trim_array({'name': '', 'width': width, 'height': height, 'data': pixels}, alpha)
+        width, height, pixels, trim_box = trimmed['width'], trimmed['height'], trimmed['data'], trimmed['trim']
 
     # Determine output path and sanitized identifier
     # If output_name looks like a path (contains separator) or ends with .h we treat it as a path
@@ -57,50 +143,268 @@ def image_to_c_header(input_path, output_name):
     ident = make_identifier(base)
     ident_upper = ident.upper()
 
-    # Build header contents
+    if indexed:
+        from texture_palette import build_palette, quantize, write_palette_block
+        palette_group = make_identifier(palette_group or ident)
+        if palette is None:
+            palette = build_palette([pixels])
+        values = quantize(pixels, palette)
+    else:
+        values = pixels
+
+    # Header preamble
+    guard_lines = [f"#ifndef {ident_upper}_H", f"#define {ident_upper}_H", ""]
     header_lines = []
-    header_lines.append(f"#ifndef {ident_upper}_H")
-    header_lines.append(f"#define {ident_upper}_H")
-    header_lines.append("")
     header_lines.append(f"#define {ident_upper}_WIDTH {width}")
     header_lines.append(f"#define {ident_upper}_HEIGHT {height}")
+    if original_size:
+        header_lines.append(f"#define {ident_upper}_ORIG_WIDTH {original_size[0]}")
+        header_lines.append(f"#define {ident_upper}_ORIG_HEIGHT {original_size[1]}")
+    if trim_box:
+        from sprite_trim import trim_define_lines
+        header_lines.extend(trim_define_lines(ident_upper, trim_box))
+    if indexed:
+        header_lines.append(f"#define {ident_upper}_INDEXED 1")
     header_lines.append("")
-    header_lines.append(f"// array size is {width * height * 3}")
-    header_lines.append(f"const unsigned char {ident}[] = {{")
+    if indexed:
+        header_lines.append(f"// array size is {len(values)} (indices into {palette_group}_palette)")
+    else:
+        header_lines.append(f"// array size is {width * height * 3}")
+    data_fmt = fit_format(fmt, len(values))
+    header_lines.append(array_open(f"const unsigned char {ident}", len(values), data_fmt))
 
-    # Add pixel data (16 pixels per line -> 48 values per line)
-    values_per_pixel = 3
-    pixels_per_line = 16
-    vals_per_line = pixels_per_line * values_per_pixel
+    # Write to file (utf-8 is fine for this plain ASCII content)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(guard_lines) + "\n")
+        if indexed:
+            write_palette_block(f, palette_group, palette, fmt)
+        f.write("\n".join(header_lines) + "\n")
+        # Pixel data: 16 pixels per line -> 48 values per line
+        write_c_values(f, values, values_per_line=48, indent="  ", fmt=data_fmt)
+        f.write(f"\n{array_close(data_fmt)}\n\n#endif /* {ident_upper}_H */\n")
 
-    flat_vals = []
-    for (r, g, b) in pixels:
-        flat_vals.extend([str(r), str(g), str(b)])
+    if original_size:
+        print(f"Resampled {input_path} from {original_size[0]}x{original_size[1]} to {width}x{height} ({resample})")
+    if trim_box:
+        print(f"Trimmed {input_path} to {width}x{height} at {trim_box[0]},{trim_box[1]} "
+              f"of {trim_box[2]}x{trim_box[3]}")
+    print(f"Converted {input_path} ({width}x{height}) -> {output_path}")
+    print(f"Array size: {len(values)} bytes")
 
-    for i in range(0, len(flat_vals), vals_per_line):
-        chunk = flat_vals[i:i+vals_per_line]
-        header_lines.append("  " + ", ".join(chunk) + ("," if i + vals_per_line < len(flat_vals) else ""))
+    # Binary twin for the Python tools (written after the .h so it counts as fresh); an
+    # indexed header's twin holds the quantized colors its indices expand to, not the source
+    if sidecar:
+        if indexed:
+            from texture_header import expand_indexed
+            data = expand_indexed(values, palette)
+        else:
+            data = pixels
+        array = {'name': ident, 'width': width, 'height': height, 'data': data, 'trim': trim_box,
+                 'original_size': original_size}
+        sidecar_file = write_sidecar(output_path, [array], manifest=sidecar_manifest)
+        print(f"Sidecar: {sidecar_file}")
 
-    header_lines.append("};")
-    header_lines.append("")
-    header_lines.append(f"#endif /* {ident_upper}_H */")
-    header_content = "\n".join(header_lines) + "\n"
+    return output_path
 
-    # Write to file (utf-8 is fine for this plain ASCII content)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(header_content)
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-    print(f"Converted {input_path} ({width}x{height}) -> {output_path}")
-    print(f"Array size: {width * height * 3} bytes")
+def find_batch_sources(source_dir):
+    """Map every PNG under source_dir to its header name: [(source path, identifier), ...].
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python convert_texture.py <input_image> <output_name_or_path>")
-        print("Example: python convert_texture.py wall.png T_01")
-        print("Example (explicit path): python convert_texture.py wall.png textures/T_01.h")
-        sys.exit(1)
+    If two images share a name only the first (in sorted order) is kept.
+    """
+    sources = []
+    seen = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for entry in sorted(files):
+            if not entry.lower().endswith('.png'):
+                continue
+            path = os.path.join(root, entry)
+            ident = make_identifier(os.path.splitext(entry)[0])
+            if ident in seen:
+                print(f"Skipping {path}: {ident}.h already comes from {seen[ident]}")
+                continue
+            seen[ident] = path
+            sources.append((path, ident))
+    return sources
+
+def cached_sha256(entry, path):
+    """sha256 of a batch source, taken from its manifest entry while the file's stat still matches."""
+    st = os.stat(path)
+    if entry is not None and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        return entry['sha256']
+    return file_sha256(path)
+
+def batch_palette_group(key, source_dir):
+    """Default palette group of a batch source: its subdirectory (walls/WALL58_2.png -> walls)."""
+    folder = os.path.dirname(key)
+    return make_identifier(folder.replace('/', '_') if folder else os.path.basename(os.path.normpath(source_dir)))
+
+def build_group_palette(paths, options):
+    """Median cut palette over the images of one palette group (after --pow2 resampling)."""
+    from texture_palette import build_palette
+    images = []
+    for input_path in paths:
+        with Image.open(input_path) as img:
+            img = img.convert('RGB')
+            if options.get('pow2'):
+                img, _ = resample_pow2(img, options['pow2'], options.get('resample', 'box'))
+            images.append(img.tobytes())
+    return build_palette(images)
+
+def _convert_job(job):
+    """Worker for convert_batch: convert one image and return its new manifest entry."""
+    input_path, output_path, options, palette = job
+    convert_options = {k: v for k, v in options.items() if k != 'palette_sha256'}
+    image_to_c_header(input_path, output_path, sidecar_manifest=False, palette=palette, **convert_options)
+    st = os.stat(input_path)
+    return {
+        'header': os.path.basename(output_path),
+        'sha256': file_sha256(input_path),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'options': options
+    }
+
+def convert_batch(source_dir, output_dir, max_workers=None, force=False, **options):
+    """Convert every changed PNG under source_dir into output_dir across a process pool.
 
-    input_file = sys.argv[1]
-    output_name = sys.argv[2]
+    A manifest in output_dir remembers each source's hash and options; an image
+    is skipped when both match and its header still exists. With indexed=True
+    each palette group (a subdirectory, or the whole batch with palette_group)
+    shares one palette, kept in the manifest under the hashes of its images and
+    rebuilt only when one of them changed (a changed palette reconverts that
+    group). Returns (converted, skipped).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, BATCH_MANIFEST)
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('version') != BATCH_MANIFEST_VERSION:
+        manifest = {'version': BATCH_MANIFEST_VERSION, 'sources': {}}
+    entries = manifest['sources']
 
-    image_to_c_header(input_file, output_name)
+    start = time.perf_counter()
+    sources = [(input_path, ident, os.path.relpath(input_path, source_dir).replace(os.sep, '/'))
+               for input_path, ident in find_batch_sources(source_dir)]
+    source_options = {key: options for _, _, key in sources}
+    palettes = {}
+    if options.get('indexed'):
+        stored = manifest.setdefault('palettes', {})
+        groups = {}
+        for input_path, _, key in sources:
+            group = make_identifier(options.get('palette_group') or batch_palette_group(key, source_dir))
+            groups.setdefault(group, []).append((key, input_path))
+        for group, members in groups.items():
+            # Keyed on the member images (and the resampling that changes their pixels)
+            members_sha256 = hashlib.sha256(json.dumps(
+                [options.get('pow2'), options.get('resample'),
+                 [[key, cached_sha256(entries.get(key), path)] for key, path in members]]).encode()).hexdigest()
+            if force or stored.get(group, {}).get('members_sha256') != members_sha256:
+                palette = build_group_palette([path for _, path in members], options)
+                stored[group] = {'members_sha256': members_sha256, 'palette': palette.hex()}
+                print(f"Palette {group}: built from {len(members)} image(s)")
+            palettes[group] = bytes.fromhex(stored[group]['palette'])
+            group_options = dict(options, palette_group=group,
+                                 palette_sha256=hashlib.sha256(palettes[group]).hexdigest())
+            source_options.update((key, group_options) for key, _ in members)
+
+    jobs = []
+    keys = []
+    skipped = 0
+    for input_path, ident, key in sources:
+        output_path = os.path.join(output_dir, ident + '.h')
+        entry = entries.get(key)
+        job_options = source_options[key]
+        if not force and entry is not None and entry['options'] == job_options and os.path.exists(output_path):
+            st = os.stat(input_path)
+            if entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                skipped += 1
+                continue
+            if entry['sha256'] == file_sha256(input_path):
+                # Same content, only the stat changed: remember the new one
+                entry['mtime_ns'] = st.st_mtime_ns
+                entry['size'] = st.st_size
+                skipped += 1
+                continue
+        jobs.append((input_path, output_path, job_options, palettes.get(job_options.get('palette_group'))))
+        keys.append(key)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(jobs)))
+    if max_workers == 1:
+        results = [_convert_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_convert_job, jobs))
+
+    for key, result in zip(keys, results):
+        entries[key] = result
+    if options.get('sidecar') and jobs:
+        update_manifest([job[1] for job in jobs])
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"Batch: {len(jobs)} converted, {skipped} unchanged, {elapsed:.2f} s on {max_workers} worker(s)")
+    return len(jobs), skipped
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert an image to a DoomClone texture header",
+        epilog="Example: python convert_texture.py wall.png T_01\n"
+               "Example (explicit path): python convert_texture.py wall.png textures/T_01.h\n"
+               "Example (batch): python convert_texture.py --batch ../textures/PNG --out ../textures",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input_image', nargs='?')
+    parser.add_argument('output_name_or_path', nargs='?')
+    parser.add_argument('--sidecar', action='store_true',
+                        help="Also write a binary <name>.rgb twin (and sidecars.json) next to the header")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal',
+                        help="Pixel data as decimal or hex values, or as compact string literals "
+                             "(arrays too long for one MSVC literal are written as decimal)")
+    parser.add_argument('--batch', metavar='SOURCE_DIR',
+                        help="Convert every changed PNG under SOURCE_DIR")
+    parser.add_argument('--out', metavar='DIR',
+                        help="Output directory for --batch (default: the parent of SOURCE_DIR)")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Reconvert every image in --batch mode")
+    parser.add_argument('--indexed', action='store_true',
+                        help="Write a palette plus one index byte per pixel instead of RGB (needs NumPy)")
+    parser.add_argument('--palette-group', metavar='NAME',
+                        help="Name of the shared palette for --indexed (default: the header name; in --batch "
+                             "mode one palette per subdirectory, named after it)")
+    parser.add_argument('--trim', action='store_true',
+                        help="Crop to the non-transparent pixels and write the draw offsets (needs NumPy)")
+    parser.add_argument('--pow2', nargs='?', const='nearest', choices=POW2_MODES,
+                        help="Resample to power-of-two sizes, rounding each side to the nearest (default), "
+                             "next (up) or previous (down) power of two")
+    parser.add_argument('--filter', choices=RESAMPLE_FILTERS, default='box',
+                        help="Resampling filter for --pow2 (default: box)")
+    args = parser.parse_args()
+    if args.trim and args.pow2:
+        parser.error("--trim and --pow2 can't be combined")
+
+    options = dict(indexed=True, palette_group=args.palette_group) if args.indexed else {}
+    if args.trim:
+        options['trim'] = True
+    if args.pow2:
+        options.update(pow2=args.pow2, resample=args.filter)
+    if args.batch:
+        output_dir = args.out or os.path.dirname(os.path.abspath(args.batch))
+        convert_batch(args.batch, output_dir, args.jobs, args.force, sidecar=args.sidecar, fmt=args.format,
+                      **options)
+    elif args.input_image and args.output_name_or_path:
+        image_to_c_header(args.input_image, args.output_name_or_path, sidecar=args.sidecar, fmt=args.format,
+                          **options)
+    else:
+        parser.error("need <input_image> <output_name_or_path>, or --batch SOURCE_DIR")
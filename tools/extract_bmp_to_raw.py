@@ -1,179 +1,289 @@
 #!/usr/bin/env python3
 """
-Extract raw RGB data from a BMP file embedded in a C header file.
-This reads the BMP data from T_00.h and extracts just the pixel data.
+Decode BMP images into raw RGB texture headers.
+Requires NumPy: pip install numpy
+
+Handles 1/4/8 bpp paletted, 24 bpp and 32 bpp (BI_RGB or BI_BITFIELDS) images,
+RLE4 / RLE8 compression and both bottom-up and top-down row order. Inputs can
+be .bmp files, C headers holding a BMP file as a byte array (what T_00.h used
+to be), or directories of either (batch mode: every .bmp and .h directly in
+the directory, converted across a process pool; headers without BMP data are
+reported and left alone). Other image formats are convert_texture.py's job.
+
+Usage:
+  python extract_bmp_to_raw.py textures/T_00.h                 (rewrites T_00.h in place)
+  python extract_bmp_to_raw.py wall.bmp --out textures         (writes textures/wall.h)
+  python extract_bmp_to_raw.py ../textures/PNG/walls --out /tmp/walls --jobs 4   (its .bmp files)
 """
 
+import argparse
+import os
 import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from c_array_writer import HEADER_FORMATS, array_close, array_open, c_values_text, fit_format
+from texture_header import read_raw_arrays
+
+BI_RGB = 0
+BI_RLE8 = 1
+BI_RLE4 = 2
+BI_BITFIELDS = 3
+
+INPUT_EXTENSIONS = ('.bmp', '.h')  # picked up from directories
+
+COMPRESSION_NAMES = {BI_RGB: 'None', BI_RLE8: 'RLE8', BI_RLE4: 'RLE4', BI_BITFIELDS: 'Bitfields'}
+
 
 def read_bmp_header(data):
-    """Read BMP file header and info header"""
+    """Read the BMP file header and DIB header into a dict"""
     # BMP File Header (14 bytes)
     if data[0:2] != b'BM':
         raise ValueError("Not a valid BMP file")
-    
-    file_size = struct.unpack('<I', data[2:6])[0]
-    pixel_offset = struct.unpack('<I', data[10:14])[0]
-    
-    # DIB Header (BITMAPV4HEADER is 108 bytes, starting at offset 14)
-    header_size = struct.unpack('<I', data[14:18])[0]
-    width = struct.unpack('<i', data[18:22])[0]
-    height = struct.unpack('<i', data[22:26])[0]
-    bits_per_pixel = struct.unpack('<H', data[28:30])[0]
-    compression = struct.unpack('<I', data[30:34])[0]
-    
-    print(f"BMP Info:")
-    print(f"  File size: {file_size} bytes")
-    print(f"  Width: {width}px")
-    print(f"  Height: {height}px")
-    print(f"  Bits per pixel: {bits_per_pixel}")
-    print(f"  Compression: {compression} ({'RLE8' if compression == 1 else 'None' if compression == 0 else 'Other'})")
-    print(f"  Pixel data offset: {pixel_offset}")
-    print(f"  Header size: {header_size}")
-    
-    return width, height, bits_per_pixel, pixel_offset, compression
-
-def decompress_rle8(data, width, height, pixel_offset):
-    """Decompress RLE8 compressed BMP data"""
-    compressed = data[pixel_offset:]
-    pixels = []
-    
-    i = 0
-    while i < len(compressed):
-        count = compressed[i]
-        value = compressed[i + 1] if i + 1 < len(compressed) else 0
+
+    file_size, pixel_offset = struct.unpack_from('<I4xI', data, 2)
+    header_size = struct.unpack_from('<I', data, 14)[0]
+
+    if header_size == 12:
+        # BITMAPCOREHEADER (OS/2): 16-bit sizes, 3-byte palette entries
+        width, height, _, bits_per_pixel = struct.unpack_from('<hhHH', data, 18)
+        compression = BI_RGB
+        colors_used = 0
+        palette_entry_size = 3
+    else:
+        # BITMAPINFOHEADER and its V4/V5 extensions
+        width, height, _, bits_per_pixel, compression = struct.unpack_from('<iiHHI', data, 18)
+        colors_used = struct.unpack_from('<I', data, 46)[0]
+        palette_entry_size = 4
+
+    masks = None
+    palette_offset = 14 + header_size
+    if compression == BI_BITFIELDS:
+        if header_size >= 52:
+            masks = struct.unpack_from('<III', data, 54)
+        else:
+            # Masks follow a plain 40-byte BITMAPINFOHEADER
+            masks = struct.unpack_from('<III', data, palette_offset)
+            palette_offset += 12
+
+    return {
+        'file_size': file_size,
+        'pixel_offset': pixel_offset,
+        'header_size': header_size,
+        'width': width,
+        'height': abs(height),
+        'top_down': height < 0,
+        'bits_per_pixel': bits_per_pixel,
+        'compression': compression,
+        'colors_used': colors_used,
+        'palette_offset': palette_offset,
+        'palette_entry_size': palette_entry_size,
+        'masks': masks
+    }
+
+
+def read_palette(data, info):
+    """Return the color table as a (256, 3) uint8 RGB array (unused entries black)"""
+    count = info['colors_used'] or (1 << info['bits_per_pixel'])
+    count = min(count, 256)
+    entry = info['palette_entry_size']
+    raw = np.frombuffer(data, np.uint8, count=count * entry, offset=info['palette_offset'])
+    palette = np.zeros((256, 3), np.uint8)
+    palette[:count] = raw.reshape(count, entry)[:, 2::-1]  # BGR(A) -> RGB
+    return palette
+
+
+def decode_rle(data, info):
+    """Decode RLE8 / RLE4 pixel data into a (height, width) array of palette indices.
+
+    Runs are written as slices, so the Python loop is per run, not per pixel.
+    Rows come out bottom-up, as RLE bitmaps are stored.
+    """
+    width, height = info['width'], info['height']
+    rle4 = info['compression'] == BI_RLE4
+    indices = np.zeros((height, width), np.uint8)
+    src = data[info['pixel_offset']:]
+    x = y = i = 0
+    n = len(src)
+
+    while i + 1 < n and y < height:
+        count, value = src[i], src[i + 1]
         i += 2
-        
-        if count == 0:  # Escape code
-            if value == 0:  # End of line
-                # Pad to end of scanline if needed
-                while len(pixels) % width != 0:
-                    pixels.append(0)
-            elif value == 1:  # End of bitmap
-                break
-            elif value == 2:  # Delta (skip pixels)
-                if i + 1 < len(compressed):
-                    dx = compressed[i]
-                    dy = compressed[i + 1]
-                    i += 2
-                    # Skip pixels
-                    pixels.extend([0] * (dx + dy * width))
-            else:  # Absolute mode: value = number of pixels to read literally
-                for _ in range(value):
-                    if i < len(compressed):
-                        pixels.append(compressed[i])
-                        i += 1
-                # Absolute mode data is padded to word boundary
-                if value % 2 == 1:
-                    i += 1
-        else:  # Encoded mode: repeat 'value' 'count' times
-            pixels.extend([value] * count)
-    
-    # Ensure we have exactly width * height pixels
-    while len(pixels) < width * height:
-        pixels.append(0)
-    pixels = pixels[:width * height]
-    
-    return pixels
-
-def convert_indexed_to_rgb(data, width, height, pixel_offset, palette_offset=54, compression=0):
-    """Convert 8-bit indexed color to RGB using the color palette"""
-    # Read the color palette (256 colors * 4 bytes each = 1024 bytes)
-    palette = []
-    for i in range(256):
-        offset = palette_offset + (i * 4)
-        if offset + 3 < len(data):
-            b = data[offset]
-            g = data[offset + 1]
-            r = data[offset + 2]
-            palette.append((r, g, b))
+        if count:
+            # Encoded run: one index (RLE8) or two alternating nibbles (RLE4)
+            count = min(count, width - x)
+            if rle4:
+                indices[y, x:x + count] = np.resize(np.array([value >> 4, value & 15], np.uint8), count)
+            else:
+                indices[y, x:x + count] = value
+            x += count
+        elif value == 0:  # End of line
+            x = 0
+            y += 1
+        elif value == 1:  # End of bitmap
+            break
+        elif value == 2:  # Delta: move right dx, up dy
+            x += src[i]
+            y += src[i + 1]
+            i += 2
+        else:  # Absolute mode: value literal pixels, padded to a word boundary
+            if rle4:
+                nbytes = (value + 1) // 2
+                packed = np.frombuffer(src, np.uint8, count=nbytes, offset=i)
+                run = np.stack((packed >> 4, packed & 15), axis=1).reshape(-1)[:value]
+            else:
+                nbytes = value
+                run = np.frombuffer(src, np.uint8, count=nbytes, offset=i)
+            run = run[:max(0, width - x)]
+            indices[y, x:x + len(run)] = run
+            x += value
+            i += nbytes + (nbytes & 1)
+    return indices
+
+
+def read_rows(data, info):
+    """Return the uncompressed pixel rows as a (height, bytes per row) array, padding removed later"""
+    row_size = ((info['width'] * info['bits_per_pixel'] + 31) // 32) * 4
+    rows = np.frombuffer(data, np.uint8, count=row_size * info['height'], offset=info['pixel_offset'])
+    return rows.reshape(info['height'], row_size)
+
+
+def unpack_indices(rows, bits_per_pixel, width):
+    """Expand packed 1/4/8 bpp rows to one palette index per pixel, dropping row padding"""
+    if bits_per_pixel == 8:
+        return rows[:, :width]
+    if bits_per_pixel == 4:
+        return np.stack((rows >> 4, rows & 15), axis=2).reshape(rows.shape[0], -1)[:, :width]
+    if bits_per_pixel == 1:
+        return np.unpackbits(rows, axis=1)[:, :width]
+    raise ValueError(f"Unsupported paletted depth: {bits_per_pixel} bpp")
+
+
+def mask_channel(pixels, mask):
+    """Extract one channel from packed 32-bit pixels using a BI_BITFIELDS mask, scaled to 0..255"""
+    if mask == 0:
+        return np.zeros(pixels.shape, np.uint8)
+    shift = (mask & -mask).bit_length() - 1
+    maximum = mask >> shift
+    channel = (pixels & mask) >> shift
+    if maximum == 255:
+        return channel.astype(np.uint8)
+    return (channel * 255 // maximum).astype(np.uint8)
+
+
+def decode_bmp(data):
+    """Decode a BMP file. Returns (width, height, RGB bytes in top-to-bottom row order)."""
+    info = read_bmp_header(data)
+    width, height = info['width'], info['height']
+    bpp = info['bits_per_pixel']
+    compression = info['compression']
+
+    if compression in (BI_RLE8, BI_RLE4):
+        rgb = read_palette(data, info)[decode_rle(data, info)]
+    elif compression not in (BI_RGB, BI_BITFIELDS):
+        raise ValueError(f"Unsupported BMP compression: {compression}")
+    elif bpp in (1, 4, 8):
+        rgb = read_palette(data, info)[unpack_indices(read_rows(data, info), bpp, width)]
+    elif bpp == 24:
+        rgb = read_rows(data, info)[:, :width * 3].reshape(height, width, 3)[:, :, ::-1]
+    elif bpp == 32:
+        rows = read_rows(data, info)
+        if info['masks'] is None:
+            rgb = rows.reshape(height, width, 4)[:, :, 2::-1]  # BGRX -> RGB
         else:
-            palette.append((0, 0, 0))
-    
-    # Decompress or read pixel indices
-    if compression == 1:  # RLE8
-        print("Decompressing RLE8 data...")
-        pixel_indices = decompress_rle8(data, width, height, pixel_offset)
-    else:  # Uncompressed
-        pixel_data = data[pixel_offset:]
-        # BMP rows are stored bottom-to-top and padded to 4-byte boundaries
-        row_size = width  # 8-bit = 1 byte per pixel
-        padding = (4 - (row_size % 4)) % 4
-        actual_row_size = row_size + padding
-        
-        pixel_indices = []
-        for y in range(height):
-            row_offset = y * actual_row_size
-            pixel_indices.extend(pixel_data[row_offset:row_offset + width])
-    
-    # Convert to RGB, flipping vertically (BMP is bottom-up)
-    rgb_data = []
-    for y in range(height - 1, -1, -1):  # Start from bottom row
-        for x in range(width):
-            index = pixel_indices[y * width + x]
-            r, g, b = palette[index]
-            rgb_data.extend([r, g, b])
-    
-    return rgb_data
-
-def generate_c_header(rgb_data, width, height, output_name):
+            pixels = rows.view('<u4')
+            rgb = np.stack([mask_channel(pixels, mask) for mask in info['masks']], axis=2)
+    else:
+        raise ValueError(f"Unsupported BMP format (bits per pixel: {bpp})")
+
+    if not info['top_down']:
+        rgb = rgb[::-1]  # stored bottom-up
+    return width, height, np.ascontiguousarray(rgb, dtype=np.uint8).tobytes()
+
+
+def generate_c_header(rgb_data, width, height, output_name, fmt='decimal'):
     """Generate C header file with raw RGB data"""
+    fmt = fit_format(fmt, len(rgb_data))
     header = f"""#define {output_name}_WIDTH {width}
 #define {output_name}_HEIGHT {height}
 
 // Raw RGB data: {width} x {height} x 3 = {len(rgb_data)} bytes
-const unsigned char {output_name}[] = {{
+{array_open(f"const unsigned char {output_name}", len(rgb_data), fmt)}
 """
-    
-    # Write pixel data in rows of 16 values (5-6 pixels per line)
-    for i in range(0, len(rgb_data), 48):  # 48 bytes = 16 RGB triplets
-        chunk = rgb_data[i:i+48]
-        header += "  "
-        header += ", ".join(str(b) for b in chunk)
-        if i + 48 < len(rgb_data):
-            header += ",\n"
-        else:
-            header += "\n"
-    
-    header += "};\n"
-    
+
+    # Write pixel data in rows of 48 values (16 RGB triplets)
+    header += c_values_text(bytes(rgb_data), values_per_line=48, indent="  ", fmt=fmt)
+    header += f"\n{array_close(fmt)}\n"
+
     return header
 
-# Read the current T_00.h and extract BMP data
-with open('textures/T_00.h', 'r') as f:
-    content = f.read()
 
-# Extract the byte array
-import re
-match = re.search(r'const unsigned char T_00\[\] = \{([^}]+)\}', content, re.DOTALL)
-if not match:
-    print("ERROR: Could not find T_00 array in file")
-    exit(1)
+def load_bmp_sources(path):
+    """Return [(name, BMP bytes)] from a .bmp file or from the BMP arrays inside a header"""
+    if path.lower().endswith('.h'):
+        return [(array['name'], bytes(array['data'])) for array in read_raw_arrays(path)
+                if array['data'][:2] == b'BM']
+    with open(path, 'rb') as f:
+        return [(os.path.splitext(os.path.basename(path))[0], f.read())]
 
-byte_string = match.group(1)
-bytes_list = [int(x.strip()) for x in byte_string.split(',') if x.strip()]
-bmp_data = bytes(bytes_list)
 
-print(f"Read {len(bmp_data)} bytes from T_00.h")
+def convert_file(job):
+    """Decode every BMP in one input and write a header for each. Returns a list of result lines."""
+    path, output_dir, fmt = job
+    results = []
+    for name, bmp_data in load_bmp_sources(path):
+        info = read_bmp_header(bmp_data)
+        width, height, rgb_data = decode_bmp(bmp_data)
+        if output_dir is None and path.lower().endswith('.h'):
+            output_path = path  # header holding the BMP: rewrite it in place
+        else:
+            output_path = os.path.join(output_dir or os.path.dirname(path), name + '.h')
+        with open(output_path, 'w') as f:
+            f.write(generate_c_header(rgb_data, width, height, name, fmt))
+        results.append(f"{path}: {name} {width}x{height}, {info['bits_per_pixel']} bpp, "
+                       f"{COMPRESSION_NAMES.get(info['compression'], info['compression'])} -> {output_path}")
+    if not results:
+        results.append(f"{path}: no BMP data found")
+    return results
+
 
-# Parse BMP
-width, height, bpp, pixel_offset, compression = read_bmp_header(bmp_data)
+def main():
+    parser = argparse.ArgumentParser(description="Decode BMP images (or headers holding them) into raw RGB headers")
+    parser.add_argument('inputs', nargs='+', help=".bmp files, headers with an embedded BMP, or directories")
+    parser.add_argument('--out', help="Output directory (default: next to each input; headers are rewritten in place)")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal', help="Header value format")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for many inputs (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = []
+    for entry in args.inputs:
+        if os.path.isdir(entry):
+            found = [os.path.join(entry, name) for name in sorted(os.listdir(entry))
+                     if name.lower().endswith(INPUT_EXTENSIONS)]
+            if not found:
+                print(f"{entry}: no {' or '.join(INPUT_EXTENSIONS)} files")
+            paths.extend(found)
+        else:
+            paths.append(entry)
+    if not paths:
+        parser.error("no input files")
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
 
-# Convert indexed color to RGB
-if bpp == 8:
-    print("\nConverting 8-bit indexed color to RGB...")
-    rgb_data = convert_indexed_to_rgb(bmp_data, width, height, pixel_offset, compression=compression)
-else:
-    print(f"\nERROR: Unsupported BMP format (bits per pixel: {bpp})")
-    exit(1)
+    jobs = [(path, args.out, args.format) for path in paths]
+    max_workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+    if max_workers == 1:
+        results = list(map(convert_file, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(convert_file, jobs))
 
-# Generate new header
-print(f"\nGenerating new T_00.h with {len(rgb_data)} bytes of raw RGB data...")
-header_content = generate_c_header(rgb_data, width, height, "T_00")
+    for lines in results:
+        for line in lines:
+            print(line)
+    print(f"Converted {len(jobs)} input(s)")
 
-# Write to file
-with open('textures/T_00.h', 'w') as f:
-    f.write(header_content)
 
-print(f"? Successfully wrote textures/T_00.h")
-print(f"  Size: {width}x{height} = {len(rgb_data)} bytes")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Content hashing for texture frames.
+
+Animations repeat frames (the editor plays WALL57 as 2, 3, 4, 3) and some
+headers share art outright (T_04 is also WALL58_frame_0, CACE_STAT is
+CACE_ATTACK_frame_0). Frames are keyed by their size and pixel bytes so the
+exporters, sau_builder, the atlas packer and the editor can keep each
+distinct frame once.
+"""
+
+import hashlib
+import struct
+
+
+def frame_digest(width, height, data):
+    """Content key of one frame: its size and pixel bytes."""
+    digest = hashlib.blake2b(struct.pack('<HH', width, height), digest_size=16)
+    digest.update(data)
+    return digest.digest()
+
+
+def array_digest(array):
+    return frame_digest(array['width'], array['height'], array['data'])
+
+
+def dedupe_frames(frames):
+    """Find repeated frames in a list of array dicts.
+
+    Returns (sequence, bytes_saved): sequence[i] is the index of the first
+    frame with the same content as frames[i] (i itself for unique frames) and
+    bytes_saved the size of the repeats.
+    """
+    first = {}
+    sequence = []
+    saved = 0
+    for index, frame in enumerate(frames):
+        original = first.setdefault(array_digest(frame), index)
+        sequence.append(original)
+        if original != index:
+            saved += len(frame['data'])
+    return sequence, saved
+
+
+def frame_alias_lines(prefix, sequence):
+    """#defines keeping PREFIX_frame_i valid for repeats stored once as PREFIX_frame_<first>.
+
+    Game code names frames directly (WALL58_frame_1, BOSSA1_frame_3), so a
+    repeat that is not written out still needs its symbol.
+    """
+    return [f"#define {prefix}_frame_{i} {prefix}_frame_{first}"
+            for i, first in enumerate(sequence) if first != i]
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Export texture headers back to PNG.
+
+The reverse of convert_texture.py: every char array of every .h file in a
+directory becomes an image, with its size taken from the header itself
+(NAME_WIDTH / NAME_HEIGHT, BASE_FRAME_WIDTH, *_frame_widths / *_frame_heights)
+through the same streaming tokenizer the other tools use, or from a fresh
+binary sidecar. Files are exported across a process pool.
+
+By default each array is written as its own PNG. With --sheets the
+NAME_frame_N arrays of an animation are laid out left to right on one sprite
+sheet (unused area filled with the transparent key color 1,0,0); the frame
+rectangles and durations are stored as JSON in the PNG's "frames" text chunk.
+
+A header with a single output is written as <out>/<header>.png, otherwise
+as <out>/<header>/<array or animation>.png.
+
+Usage:
+  python headers_to_png.py [texture_dir or header.h ...] [--out DIR] [--sheets] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from texture_header import FRAME_NAME_RE, HeaderScan
+from texture_sidecar import fresh_sidecar, read_sidecar
+
+TRANSPARENT_KEY = (1, 0, 0)
+
+
+def read_arrays(path):
+    """Return (arrays, durations) for a header; durations maps array name -> frame ms."""
+    sidecar = fresh_sidecar(path)
+    if sidecar:
+        arrays = read_sidecar(sidecar)
+        return arrays, {a['name']: a['duration'] for a in arrays if a['duration']}
+
+    scan = HeaderScan()
+    with open(path, 'r') as f:
+        arrays = list(scan.iter_arrays(f, os.path.basename(path)))
+    for name in scan.missing_dimensions:
+        print(f"{os.path.basename(path)}: skipping {name} (no dimensions)")
+
+    # *_frame_durations tables are keyed by the animation name (BOSSA2_WALK),
+    # the frames by their own prefix (BOSSA2_frame_N); match them by position
+    # when the header holds a single animation. A deduplicated header only
+    # stores the frames its *_frame_sequence table refers to; each takes the
+    # duration of its first position in the sequence.
+    durations = {}
+    tables = [values for name, values in scan.int_arrays.items() if name.endswith('_frame_durations')]
+    frames = [a['name'] for a in arrays if FRAME_NAME_RE.fullmatch(a['name'])]
+    sequences = [values for name, values in scan.int_arrays.items() if name.endswith('_frame_sequence')]
+    if len(tables) == 1 and len(sequences) == 1:
+        numbers = {int(FRAME_NAME_RE.fullmatch(name).group(2)): name for name in frames}
+        for number, duration in zip(sequences[0], tables[0]):
+            if number in numbers:
+                durations.setdefault(numbers[number], duration)
+    elif len(tables) == 1:
+        durations = dict(zip(frames, tables[0]))
+    return arrays, durations
+
+
+def group_arrays(arrays, sheets):
+    """Split arrays into outputs: [(name, [arrays])]. Animations stay together with sheets=True."""
+    groups = []
+    animations = {}
+    for array in arrays:
+        frame_match = FRAME_NAME_RE.fullmatch(array['name']) if sheets else None
+        if frame_match:
+            prefix = frame_match.group(1)
+            if prefix not in animations:
+                animations[prefix] = []
+                groups.append((prefix, animations[prefix]))
+            animations[prefix].append(array)
+        else:
+            groups.append((array['name'], [array]))
+    for frames in animations.values():
+        frames.sort(key=lambda a: int(FRAME_NAME_RE.fullmatch(a['name']).group(2)))
+    return groups
+
+
+def array_image(array):
+    return Image.frombytes('RGB', (array['width'], array['height']), bytes(array['data']))
+
+
+def sheet_image(frames, durations):
+    """Lay frames out left to right; returns (image, PngInfo with the frame rectangles)."""
+    width = sum(a['width'] for a in frames)
+    height = max(a['height'] for a in frames)
+    sheet = Image.new('RGB', (width, height), TRANSPARENT_KEY)
+    table = []
+    x = 0
+    for array in frames:
+        sheet.paste(array_image(array), (x, 0))
+        table.append({'name': array['name'], 'x': x, 'y': 0, 'width': array['width'],
+                      'height': array['height'], 'duration': durations.get(array['name'], 0)})
+        x += array['width']
+    info = PngInfo()
+    info.add_text('frames', json.dumps(table))
+    return sheet, info
+
+
+def export_header(job):
+    """Worker: write the PNGs for one header. Returns a result dict."""
+    path, output_dir, sheets = job
+    start = time.perf_counter()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    result = {'file': os.path.basename(path), 'images': [], 'bytes': 0, 'error': None}
+    try:
+        arrays, durations = read_arrays(path)
+        groups = group_arrays([a for a in arrays if a['width'] and a['height']], sheets)
+        if len(groups) > 1:
+            os.makedirs(os.path.join(output_dir, stem), exist_ok=True)
+        for name, members in groups:
+            if len(groups) == 1:
+                out_path = os.path.join(output_dir, stem + '.png')
+            else:
+                out_path = os.path.join(output_dir, stem, name + '.png')
+            if sheets and len(members) > 1:
+                image, info = sheet_image(members, durations)
+                image.save(out_path, pnginfo=info)
+            else:
+                array_image(members[0]).save(out_path)
+            result['images'].append(out_path)
+            result['bytes'] += sum(len(a['data']) for a in members)
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def export_headers(paths, output_dir, sheets=False, max_workers=None):
+    """Export every header in paths to output_dir. Returns the list of result dicts, in input order."""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, output_dir, sheets) for path in paths]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(jobs)))
+    if max_workers == 1:
+        return [export_header(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(export_header, jobs))
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures")
+    parser = argparse.ArgumentParser(description="Export texture headers to PNG")
+    parser.add_argument('inputs', nargs='*', default=[default_dir], help="Header files or directories of headers")
+    parser.add_argument('--out', default='png_export', help="Output directory (default: png_export)")
+    parser.add_argument('--sheets', action='store_true', help="One sprite sheet per animation instead of one PNG per frame")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = []
+    for entry in args.inputs:
+        if os.path.isdir(entry):
+            paths.extend(os.path.join(entry, name) for name in sorted(os.listdir(entry)) if name.endswith('.h'))
+        else:
+            paths.append(entry)
+
+    start = time.perf_counter()
+    results = export_headers(paths, args.out, args.sheets, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result['error']:
+            print(f"FAIL  {result['file']}: {result['error']}")
+        elif not result['images']:
+            print(f"      {result['file']}: no texture arrays")
+    images = sum(len(r['images']) for r in results)
+    total_mb = sum(r['bytes'] for r in results) / (1024 * 1024)
+    print(f"Wrote {images} PNG(s) from {len(results)} header(s) to {args.out} "
+          f"({total_mb:.2f} MB of pixels in {elapsed:.2f} s = {total_mb / elapsed if elapsed > 0 else 0:.2f} MB/s)")
+
+
+if __name__ == '__main__':
+    main()
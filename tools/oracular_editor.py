@@ -1,15 +1,27 @@
 #!/usr/bin/env python3
 import pygame
 import sys
+import argparse
 import math
+import multiprocessing
 import os
-import re  # ADDED: for texture header parsing
 import copy # ADDED: for undo/redo
 import colorsys # ADDED: for color wheel
+import time # ADDED: for texture decode timing
+import weakref
+from collections import OrderedDict
 from enum import Enum
 from typing import List, Tuple, Optional
 from tkinter import Tk, filedialog
 
+from texture_header import parse_header_arrays, scan_header_info
+from texture_sidecar import fresh_sidecar
+from frame_dedup import array_digest
+from texture_atlas import find_atlases, read_atlas, read_atlas_info, stale_atlas_files
+from texture_colormap import COLORMAP_PATH, read_colormap, shade_level, shade_palette, shade_rgb
+from texture_cache import TextureCache
+from texture_loader import BackgroundTextureLoader
+
 # Initialize Pygame
 pygame.init()
 
@@ -34,6 +46,14 @@ def get_base_path():
 BASE_PATH = get_base_path()
 TEXTURE_DIR = os.path.join(BASE_PATH, "..", "textures")
 
+# Headers read by OracularEditor.load_textures, in load order
+EDITOR_TEXTURE_FILES = [
+    "T_00.h", "T_01.h", "T_02.h", "T_03.h", "T_04.h", "T_05.h", "T_06.h",
+    "WALL57_2.h", "WALL57_3.h", "WALL57_4.h", "WALL58.h",
+    "BOSSA1.h", "BOSSA2_walk.h", "BOSSA3_walk.h", "cace_stat.h",
+    "health.h", "armour.h", "bl_key.h",
+]
+
 # Colors (Dark Theme - Oracular Style)
 class Colors:
     BG_DARK = (25, 25, 28)
@@ -191,24 +211,252 @@ class Switch:
         self.active = 1
 
 
+def surface_from_rgb(data, width, height) -> pygame.Surface:
+    """Wrap a packed RGB byte block (width * height * 3 bytes) in a Surface in one call."""
+    return pygame.image.frombuffer(data, (width, height), 'RGB')
+
+def surface_from_array(array) -> pygame.Surface:
+    """Surface for a decoded array dict: 8-bit with its palette for indexed arrays (a third of the memory)."""
+    if 'indices' in array:
+        surface = pygame.image.frombuffer(array['indices'], (array['width'], array['height']), 'P')
+        palette = array['palette']
+        surface.set_palette([tuple(palette[i:i + 3]) for i in range(0, len(palette) - 2, 3)])
+        return surface
+    return surface_from_rgb(array['data'], array['width'], array['height'])
+
+def trimmed_rect(full_rect, frame_size, trim) -> pygame.Rect:
+    """Screen rect of a trimmed frame inside the rect its untrimmed frame would fill (full_rect if untrimmed)."""
+    if not trim:
+        return full_rect
+    x, y, full_width, full_height = trim
+    scale_x = full_rect.width / full_width
+    scale_y = full_rect.height / full_height
+    left = full_rect.x + round(x * scale_x)
+    top = full_rect.y + round(y * scale_y)
+    right = full_rect.x + round((x + frame_size[0]) * scale_x)
+    bottom = full_rect.y + round((y + frame_size[1]) * scale_y)
+    return pygame.Rect(left, top, max(1, right - left), max(1, bottom - top))
+
 # ADDED: Texture class
 
+# Decoded frames the TextureRegistry keeps alive before dropping the least recently used
+TEXTURE_MEMORY_CAP = 64 * 1024 * 1024
+
+class TextureRegistry:
+    """Decodes texture frames on first use and keeps recently used ones under a memory cap.
+    
+    Frames are addressed by (header filename, array name). Only the metadata
+    (array names and sizes) is read up front; pixel data is decoded the first
+    time a frame is drawn, and every registered frame of the same header is
+    decoded with it so animations don't re-read the file once per frame.
+    Frames whose size and pixels match one already loaded (T_04 is also
+    WALL58_frame_0) share its Surface instead of getting their own.
+    
+    Headers packed into an atlas (texture_atlas.py) are served from it instead:
+    each sheet becomes one Surface and every frame on it a subsurface sharing
+    its pixels; sheets stay loaded and are not part of the LRU.
+    
+    Arrays decoded ahead of use (BackgroundTextureLoader) count against the
+    same cap through release_prefetched, and are dropped before any Surface.
+    """
+    def __init__(self, read_arrays, read_info, max_bytes=TEXTURE_MEMORY_CAP, release_prefetched=None):
+        self.read_arrays = read_arrays  # filename -> list of array dicts
+        self.read_info = read_info      # filename -> list of {'name', 'width', 'height'}
+        self.max_bytes = max_bytes
+        self.release_prefetched = release_prefetched  # max bytes -> bytes still held ahead of use
+        self.bytes_used = 0
+        self._sizes = {}
+        self._trims = {}  # (filename, name) -> [x, y, full width, full height] of trimmed frames
+        self._original_sizes = {}  # (filename, name) -> size before power-of-two resampling
+        self._frames = OrderedDict()  # (filename, name) -> Surface, least recently used first
+        self._failed = set()
+        self._digests = {}  # content digest -> key of the Surface holding it
+        self._aliases = {}  # (filename, name) -> key of an identical frame's Surface
+        self.bytes_shared = 0
+        self._atlas_sheets = []  # Surfaces, one per atlas sheet
+        self._atlas_rects = {}   # (filename, name) -> (sheet index, Rect)
+        self._atlas_files = {}   # filename -> atlas rect entries, in header order
+        self._atlas_frames = {}  # (filename, name) -> subsurface of its sheet
+    
+    def add_atlas(self, path, texture_dir):
+        """Serve the headers packed in an atlas blob from its sheets (headers edited since are skipped)."""
+        atlas = read_atlas(path)
+        stale = stale_atlas_files(path, atlas, texture_dir)
+        first_sheet = len(self._atlas_sheets)
+        for sheet in atlas['sheets']:
+            self._atlas_sheets.append(surface_from_rgb(sheet['data'], sheet['width'], sheet['height']))
+            self.bytes_used += sheet['width'] * sheet['height'] * 3
+        for rect in atlas['rects']:
+            if rect['file'] in stale:
+                continue
+            key = (rect['file'], rect['name'])
+            self._atlas_rects[key] = (first_sheet + rect['sheet'],
+                                      pygame.Rect(rect['x'], rect['y'], rect['width'], rect['height']))
+            self._atlas_files.setdefault(rect['file'], []).append(rect)
+        print(f"Atlas {os.path.basename(path)}: {len(atlas['rects'])} frame(s) on {len(atlas['sheets'])} sheet(s)"
+              + (f", {len(stale)} changed header(s) read directly" if stale else ""))
+    
+    def find_frames(self, filename, var_names=None):
+        """Register and return the frame keys of a header without decoding them."""
+        if filename in self._atlas_files:
+            info = self._atlas_files[filename]
+        else:
+            info = self.read_info(filename)
+        sizes = {entry['name']: (entry['width'], entry['height']) for entry in info}
+        names = [n for n in var_names if n in sizes] if var_names else list(sizes)
+        keys = [(filename, name) for name in names]
+        trims = {entry['name']: entry['trim'] for entry in info if entry.get('trim')}
+        original_sizes = {entry['name']: tuple(entry['original_size'])
+                          for entry in info if entry.get('original_size')}
+        for key in keys:
+            self._sizes[key] = sizes[key[1]]
+            if key[1] in trims:
+                self._trims[key] = trims[key[1]]
+            if key[1] in original_sizes:
+                self._original_sizes[key] = original_sizes[key[1]]
+        return keys
+    
+    def get_size(self, key):
+        return self._sizes.get(key, (64, 64))
+    
+    def get_trim(self, key):
+        """[x, y, full width, full height] of a trimmed frame (sprite_trim.py), or None"""
+        return self._trims.get(key)
+    
+    def get_original_size(self, key):
+        """Size a frame had before power-of-two resampling (convert_texture.py --pow2)"""
+        return self._original_sizes.get(key) or self.get_size(key)
+    
+    def get(self, key):
+        if key in self._atlas_rects:
+            surface = self._atlas_frames.get(key)
+            if surface is None:
+                sheet, rect = self._atlas_rects[key]
+                surface = self._atlas_frames[key] = self._atlas_sheets[sheet].subsurface(rect)
+            return surface
+        key = self._aliases.get(key, key)
+        surface = self._frames.get(key)
+        if surface is not None:
+            self._frames.move_to_end(key)
+            return surface
+        if key in self._failed:
+            return None
+        
+        filename = key[0]
+        start_time = time.perf_counter()
+        try:
+            arrays = self.read_arrays(filename)  # the parse (or cache / background loader hand-over)
+        except Exception as e:
+            print(f"Error parsing {filename}: {e}")
+            self._failed.update(k for k in self._sizes if k[0] == filename)
+            return None
+        read_ms = (time.perf_counter() - start_time) * 1000
+        
+        decoded = 0
+        shared = 0
+        for array in arrays:
+            array_key = (filename, array['name'])
+            if array_key not in self._sizes or array_key in self._frames or array_key in self._aliases:
+                continue
+            digest = array_digest(array)
+            if digest in self._digests:
+                self._aliases[array_key] = self._digests[digest]
+                shared += 1
+                self.bytes_shared += len(array['data'])
+                continue
+            surface = surface_from_array(array)
+            self._frames[array_key] = surface
+            self._digests[digest] = array_key
+            self.bytes_used += array['width'] * array['height'] * surface.get_bytesize()
+            decoded += 1
+        surface_ms = (time.perf_counter() - start_time) * 1000 - read_ms
+        print(f"Decoded {filename}: {decoded} frame(s), read in {read_ms:.1f} ms + {surface_ms:.1f} ms to Surfaces"
+              + (f", {shared} duplicate(s) sharing a loaded frame ({self.bytes_shared:,} bytes saved so far)"
+                 if shared else ""))
+        
+        key = self._aliases.get(key, key)
+        surface = self._frames.get(key)
+        if surface is None:
+            self._failed.add(key)
+            return None
+        self._frames.move_to_end(key)
+        self._evict(keep=key)
+        return surface
+    
+    def _evict(self, keep):
+        prefetched = 0
+        if self.release_prefetched:
+            prefetched = self.release_prefetched(max(0, self.max_bytes - self.bytes_used))
+        while self.bytes_used + prefetched > self.max_bytes and len(self._frames) > 1:
+            old_key, old_surface = next(iter(self._frames.items()))
+            if old_key == keep:
+                break
+            del self._frames[old_key]
+            self._digests = {d: k for d, k in self._digests.items() if k != old_key}
+            w, h = old_surface.get_size()
+            self.bytes_used -= w * h * old_surface.get_bytesize()
+
 class Texture:
-    def __init__(self, name: str, frames: List[pygame.Surface], frame_duration: int = 150):
+    def __init__(self, name: str, frames: Optional[List[pygame.Surface]] = None, frame_duration: int = 150,
+                 frame_keys: Optional[List[Tuple[str, str]]] = None, registry: Optional[TextureRegistry] = None):
         self.name = name
-        self.frames = frames
         self.frame_duration = frame_duration
+        self._frames = frames  # Eagerly built frames (placeholders)
+        self.frame_keys = frame_keys or []  # Lazily decoded frames, resolved through the registry
+        self.registry = registry
     
-    def get_current_frame(self) -> pygame.Surface:
-        if not self.frames:
-            return pygame.Surface((64, 64)) # Fallback
-        if len(self.frames) == 1:
-            return self.frames[0]
-        
+    @property
+    def frame_count(self) -> int:
+        return len(self._frames) if self._frames is not None else len(self.frame_keys)
+    
+    @property
+    def frames(self) -> List[pygame.Surface]:
+        return [self.get_frame(i) for i in range(self.frame_count)]
+    
+    def get_size(self) -> Tuple[int, int]:
+        if self._frames is not None:
+            return self._frames[0].get_size() if self._frames else (64, 64)
+        return self.registry.get_size(self.frame_keys[0]) if self.frame_keys else (64, 64)
+    
+    def get_frame(self, idx: int) -> pygame.Surface:
+        if self._frames is not None:
+            return self._frames[idx]
+        surface = self.registry.get(self.frame_keys[idx])
+        if surface is None:
+            return pygame.Surface(self.registry.get_size(self.frame_keys[idx])) # Fallback
+        return surface
+    
+    def get_original_size(self) -> Tuple[int, int]:
+        """Size the texture was authored at; differs from get_size() once resampled to a power of two"""
+        if self._frames is not None or not self.frame_keys:
+            return self.get_size()
+        return self.registry.get_original_size(self.frame_keys[0])
+    
+    def get_trim(self, idx: int) -> Optional[List[int]]:
+        """Where a trimmed frame sits in its untrimmed rectangle: [x, y, full width, full height], or None"""
+        if self._frames is not None or not self.frame_keys:
+            return None
+        return self.registry.get_trim(self.frame_keys[idx])
+    
+    def current_index(self) -> int:
+        count = self.frame_count
+        if count <= 1:
+            return 0
         # Calculate frame based on time
         current_time = pygame.time.get_ticks()
-        frame_idx = (current_time // self.frame_duration) % len(self.frames)
-        return self.frames[frame_idx]
+        return (current_time // self.frame_duration) % count
+    
+    def get_current_frame(self) -> pygame.Surface:
+        if self.frame_count == 0:
+            return pygame.Surface((64, 64)) # Fallback
+        return self.get_frame(self.current_index())
+    
+    def get_current_frame_trim(self) -> Tuple[pygame.Surface, Optional[List[int]]]:
+        """The current frame and its trim (see get_trim), for drawing it at its untrimmed position"""
+        if self.frame_count == 0:
+            return pygame.Surface((64, 64)), None # Fallback
+        idx = self.current_index()
+        return self.get_frame(idx), self.get_trim(idx)
 
 # === VIEWPORT CLASS ===
 class Viewport:
@@ -241,7 +489,10 @@ class Viewport:
 
 # === MAIN EDITOR CLASS ===
 class OracularEditor:
-    def __init__(self):
+    def __init__(self, texture_cache: Optional[TextureCache] = None,
+                 texture_loader: Optional[BackgroundTextureLoader] = None,
+                 atlas_paths: Optional[List[str]] = None,
+                 colormap_path: Optional[str] = None):
         self.width = WINDOW_WIDTH
         self.height = WINDOW_HEIGHT
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -426,6 +677,23 @@ class OracularEditor:
         ]
         
         # ADDED: textures
+        self.texture_cache = texture_cache
+        self.texture_loader = texture_loader
+        self.texture_registry = TextureRegistry(self.read_texture_arrays, self.read_texture_info,
+                                                release_prefetched=texture_loader.release if texture_loader else None)
+        for atlas_path in atlas_paths or []:
+            try:
+                self.texture_registry.add_atlas(atlas_path, TEXTURE_DIR)
+            except (OSError, ValueError) as e:
+                print(f"Error loading atlas {atlas_path}: {e}")
+        # Wall shade tables (texture_colormap.py); shaded copies are built once per surface and light level
+        self.colormaps = None
+        self._shaded_surfaces = weakref.WeakKeyDictionary()
+        if colormap_path:
+            try:
+                self.colormaps = read_colormap(colormap_path)
+            except (OSError, ValueError) as e:
+                print(f"Error loading colormap {colormap_path}: {e}")
         self.textures: List[Texture] = []
         self.enemy_textures: List[Texture] = [] # ADDED: Enemy textures
         self.pickup_textures: List[Texture] = [] # ADDED: Pickup textures
@@ -470,141 +738,52 @@ class OracularEditor:
 
 
     # ADDED: texture loader
+    def read_texture_arrays(self, filename):
+        """Return the decoded array dicts of a texture header (loader, sidecar, cache, then parse)."""
+        path = os.path.join(TEXTURE_DIR, filename)
+        if self.texture_loader and self.texture_loader.has(filename):
+            # Decoded in the background during the splash screen
+            return self.texture_loader.get(filename)
+        if self.texture_cache and not fresh_sidecar(path):
+            return self.texture_cache.load(path)
+        return parse_header_arrays(path)
+    
+    def read_texture_info(self, filename):
+        """Return the array names and sizes of a texture header without decoding pixels."""
+        path = os.path.join(TEXTURE_DIR, filename)
+        info = None
+        if self.texture_cache and not fresh_sidecar(path):
+            info = self.texture_cache.info(path)
+        if info is None:
+            info = scan_header_info(path)
+        return info
+    
     def parse_texture_file(self, filename, var_names=None):
-        """Parses a texture .h file and returns a list of surfaces found."""
+        """Finds the frames of a texture .h file and returns their keys (decoded lazily)."""
         path = os.path.join(TEXTURE_DIR, filename)
         if not os.path.exists(path):
             print(f"Texture file not found: {path}")
             return []
             
         try:
-            with open(path, 'r') as f:
-                data = f.read()
-                
-            surfaces = []
-            
-            # Parse dimension arrays first (int arrays)
-            dim_arrays = {}
-            int_array_matches = list(re.finditer(r'(?:static\s+)?(?:const\s+)?int\s+([a-zA-Z0-9_]+)(?:\[\d*\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL))
-            for match in int_array_matches:
-                name = match.group(1)
-                content = match.group(2)
-                vals = []
-                for num in re.findall(r'\b\d+\b', content):
-                    vals.append(int(num))
-                dim_arrays[name] = vals
-
-            # Find all char array definitions (texture data)
-            array_matches = list(re.finditer(r'(?:static\s+)?(?:const\s+)?(?:unsigned\s+)?char\s+([a-zA-Z0-9_]+)(?:\[\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL))
-            
-            for match in array_matches:
-                name = match.group(1)
-                content = match.group(2)
-                
-                if var_names and name not in var_names:
-                    continue
-                    
-                # Find dimensions for this array
-                width = 0
-                height = 0
-                
-                # 1. Look for #define NAME_WIDTH 64
-                w_match = re.search(f'#define\\s+{name}_WIDTH\\s+(\\d+)', data)
-                h_match = re.search(f'#define\\s+{name}_HEIGHT\\s+(\\d+)', data)
-                
-                # 1b. Look for #define NAME_FRAME_WIDTH (common for animated textures)
-                if not w_match:
-                    # Try stripping _frame_X suffix
-                    base_name = re.sub(r'_frame_\d+$', '', name)
-                    print(f"DEBUG: name={name}, base_name={base_name}")
-                    w_match = re.search(f'#define\\s+{base_name}_FRAME_WIDTH\\s+(\\d+)', data)
-                    if not w_match:
-                        w_match = re.search(f'#define\\s+{base_name}_WIDTH\\s+(\\d+)', data)
-                
-                if not h_match:
-                    base_name = re.sub(r'_frame_\d+$', '', name)
-                    h_match = re.search(f'#define\\s+{base_name}_FRAME_HEIGHT\\s+(\\d+)', data)
-                    if not h_match:
-                        h_match = re.search(f'#define\\s+{base_name}_HEIGHT\\s+(\\d+)', data)
-                
-                if w_match and h_match:
-                    width = int(w_match.group(1))
-                    height = int(h_match.group(1))
-                else:
-                    # 2. Fallback: try finding generic WIDTH/HEIGHT
-                    if not w_match:
-                        w_match = re.search(r'#define\\s+[A-Z0-9_]+_WIDTH\\s+(\\d+)', data)
-                    if not h_match:
-                        h_match = re.search(r'#define\\s+[A-Z0-9_]+_HEIGHT\\s+(\\d+)', data)
-                        
-                    if w_match and h_match:
-                        width = int(w_match.group(1))
-                        height = int(h_match.group(1))
-                    else:
-                        # 3. Fallback: Check for array-based dimensions
-                        frame_match = re.match(r'([a-zA-Z0-9_]+)_frame_(\d+)', name)
-                        if frame_match:
-                            prefix = frame_match.group(1)
-                            idx = int(frame_match.group(2))
-                            w_arr_name = f"{prefix}_frame_widths"
-                            h_arr_name = f"{prefix}_frame_heights"
-                            
-                            if w_arr_name in dim_arrays and h_arr_name in dim_arrays:
-                                if idx < len(dim_arrays[w_arr_name]) and idx < len(dim_arrays[h_arr_name]):
-                                    width = dim_arrays[w_arr_name][idx]
-                                    height = dim_arrays[h_arr_name][idx]
-
-                if width == 0 or height == 0:
-                    print(f"Could not find dimensions for {name} in {filename}")
-                    continue
-                    
-                # Parse pixel data
-                pixel_vals = []
-                for num in re.findall(r'\b\d+\b', content):
-                    pixel_vals.append(int(num))
-                    
-                expected = width * height * 3
-                if len(pixel_vals) < expected:
-                    pixel_vals += [0] * (expected - len(pixel_vals))
-                    
-                surface = pygame.Surface((width, height))
-                idx = 0
-                for y in range(height):
-                    for x in range(width):
-                        if idx + 2 < len(pixel_vals):
-                            r = pixel_vals[idx]
-                            g = pixel_vals[idx+1]
-                            b = pixel_vals[idx+2]
-                            surface.set_at((x, y), (r, g, b))
-                        idx += 3
-                
-                surfaces.append((name, surface))
-                
-            # Sort surfaces if var_names provided
-            if var_names:
-                ordered_surfaces = []
-                surface_map = {name: surf for name, surf in surfaces}
-                for name in var_names:
-                    if name in surface_map:
-                        ordered_surfaces.append(surface_map[name])
-                return ordered_surfaces
-            
-            return [s[1] for s in surfaces]
-            
+            return self.texture_registry.find_frames(filename, var_names)
         except Exception as e:
             print(f"Error parsing {filename}: {e}")
             return []
+    
+    def lazy_texture(self, name, frame_keys, frame_duration=150):
+        return Texture(name, frame_duration=frame_duration, frame_keys=frame_keys, registry=self.texture_registry)
 
     def load_textures(self):
-        """Load textures in the specific order used by the game."""
+        """Register textures in the specific order used by the game (pixels are decoded on first use)."""
         self.textures = []
         
         # 1. Load static textures (0-6)
         static_textures = ["T_00.h", "T_01.h", "T_02.h", "T_03.h", "T_04.h", "T_05.h", "T_06.h"]
         for i, tex_file in enumerate(static_textures):
-            surfaces = self.parse_texture_file(tex_file)
-            if surfaces:
-                self.textures.append(Texture(f"Texture {i}", [surfaces[0]]))
+            frames = self.parse_texture_file(tex_file)
+            if frames:
+                self.textures.append(self.lazy_texture(f"Texture {i}", [frames[0]]))
             else:
                 # Placeholder
                 s = pygame.Surface((64, 64))
@@ -622,7 +801,7 @@ class OracularEditor:
         
         if f2 and f3 and f4:
             wall57_frames = [f2[0], f3[0], f4[0], f3[0]]
-            self.textures.append(Texture("WALL57 (Anim)", wall57_frames, 150))
+            self.textures.append(self.lazy_texture("WALL57 (Anim)", wall57_frames, 150))
         else:
             s = pygame.Surface((64, 64))
             s.fill((255, 255, 0))
@@ -632,19 +811,19 @@ class OracularEditor:
         # Frames: WALL58_frame_0, WALL58_frame_1, WALL58_frame_2 in WALL58.h
         wall58_frames = self.parse_texture_file("WALL58.h", ["WALL58_frame_0", "WALL58_frame_1", "WALL58_frame_2"])
         if wall58_frames:
-            self.textures.append(Texture("WALL58 (Anim)", wall58_frames, 150))
+            self.textures.append(self.lazy_texture("WALL58 (Anim)", wall58_frames, 150))
         else:
             s = pygame.Surface((64, 64))
             s.fill((0, 255, 255))
             self.textures.append(Texture("WALL58 (MISSING)", [s]))
             
-        print(f"Loaded {len(self.textures)} textures in game order.")
+        print(f"Registered {len(self.textures)} textures in game order.")
 
         # 4. Load Enemy Textures
         # BOSSA1
         bossa1_frames = self.parse_texture_file("BOSSA1.h", ["BOSSA1"])
         if bossa1_frames:
-            self.enemy_textures.append(Texture("BOSSA1", bossa1_frames))
+            self.enemy_textures.append(self.lazy_texture("BOSSA1", bossa1_frames))
         else:
             s = pygame.Surface((64, 64)); s.fill((255, 0, 0))
             self.enemy_textures.append(Texture("BOSSA1 (MISSING)", [s]))
@@ -652,7 +831,7 @@ class OracularEditor:
         # BOSSA2 (using walk frames as default visualization)
         bossa2_frames = self.parse_texture_file("BOSSA2_walk.h", ["BOSSA2_frame_0", "BOSSA2_frame_1"])
         if bossa2_frames:
-            self.enemy_textures.append(Texture("BOSSA2", bossa2_frames, 200))
+            self.enemy_textures.append(self.lazy_texture("BOSSA2", bossa2_frames, 200))
         else:
             s = pygame.Surface((64, 64)); s.fill((0, 255, 255))
             self.enemy_textures.append(Texture("BOSSA2 (MISSING)", [s]))
@@ -660,7 +839,7 @@ class OracularEditor:
         # BOSSA3 (using walk frames)
         bossa3_frames = self.parse_texture_file("BOSSA3_walk.h", ["BOSSA3_frame_0", "BOSSA3_frame_1"])
         if bossa3_frames:
-            self.enemy_textures.append(Texture("BOSSA3", bossa3_frames, 200))
+            self.enemy_textures.append(self.lazy_texture("BOSSA3", bossa3_frames, 200))
         else:
             s = pygame.Surface((64, 64)); s.fill((255, 0, 255))
             self.enemy_textures.append(Texture("BOSSA3 (MISSING)", [s]))
@@ -668,12 +847,12 @@ class OracularEditor:
         # Cacodemon (Index 3)
         cace_frames = self.parse_texture_file("cace_stat.h", ["CACE_STAT"])
         if cace_frames:
-            self.enemy_textures.append(Texture("Cacodemon", cace_frames))
+            self.enemy_textures.append(self.lazy_texture("Cacodemon", cace_frames))
         else:
             s = pygame.Surface((64, 64)); s.fill((255, 50, 0)) # Orange/Red
             self.enemy_textures.append(Texture("Cacodemon (MISSING)", [s]))
             
-        print(f"Loaded {len(self.enemy_textures)} enemy textures.")
+        print(f"Registered {len(self.enemy_textures)} enemy textures.")
 
         # 5. Load Pickup Textures
         # Load specific sprites
@@ -681,10 +860,10 @@ class OracularEditor:
         armour_frames = self.parse_texture_file("armour.h", ["ARMOUR_frame_0", "ARMOUR_frame_1", "ARMOUR_frame_2", "ARMOUR_frame_3"])
         bl_key_frames = self.parse_texture_file("bl_key.h", ["BL_KEY_frame_0", "BL_KEY_frame_1"])
         
-        # Helper to get surface or fallback
-        def get_surf(frames, idx=0, fallback_color=(255,255,255)):
-            if frames and idx < len(frames): return frames[idx]
-            s = pygame.Surface((32, 32)); s.fill(fallback_color); return s
+        # Helper to get a lazy texture or a flat-colour fallback
+        def pickup_texture(name, frames, duration, fallback_color=(255,255,255)):
+            if frames: return self.lazy_texture(name, frames, duration)
+            s = pygame.Surface((32, 32)); s.fill(fallback_color); return Texture(name, [s], duration)
 
         # Pickup Textures (Mapped to ID)
         # 0: PICKUP_HEALTH_SMALL (Red) -> Use frame 0 of health
@@ -700,14 +879,14 @@ class OracularEditor:
         # 10: PICKUP_KEY_BLUE (Blue Key)
         
         # 0: Health Small
-        self.pickup_textures.append(Texture("Health Small", [get_surf(health_frames, 0, (255, 50, 50))], 300))
+        self.pickup_textures.append(pickup_texture("Health Small", health_frames[:1], 300, (255, 50, 50)))
         # 1: Health Large
-        self.pickup_textures.append(Texture("Health Large", health_frames if health_frames else [get_surf(health_frames, 0, (255, 50, 50))], 300))
+        self.pickup_textures.append(pickup_texture("Health Large", health_frames, 300, (255, 50, 50)))
 
         # 2: Armor Small
-        self.pickup_textures.append(Texture("Armor Small", [get_surf(armour_frames, 0, (50, 100, 255))], 300))
+        self.pickup_textures.append(pickup_texture("Armor Small", armour_frames[:1], 300, (50, 100, 255)))
         # 3: Armor Large
-        self.pickup_textures.append(Texture("Armor Large", armour_frames if armour_frames else [get_surf(armour_frames, 0, (50, 100, 255))], 300))
+        self.pickup_textures.append(pickup_texture("Armor Large", armour_frames, 300, (50, 100, 255)))
 
         # Placeholders for Ammo/Powerups
         pickup_names_rest = [
@@ -730,7 +909,7 @@ class OracularEditor:
             self.pickup_textures.append(Texture(name, [s]))
             
         # 10: Blue Key
-        self.pickup_textures.append(Texture("Blue Key", bl_key_frames if bl_key_frames else [get_surf(bl_key_frames, 0, (0, 0, 255))], 500))
+        self.pickup_textures.append(pickup_texture("Blue Key", bl_key_frames, 500, (0, 0, 255)))
 
     def setup_viewports(self):
         """Setup 4-way viewport layout"""
@@ -3399,10 +3578,33 @@ class OracularEditor:
                 pygame.draw.line(self.screen, color, (sx1, sy1_bottom), (sx2, sy2_bottom), 1)
                 pygame.draw.line(self.screen, color, (sx1, sy1_top), (sx2, sy2_top), 1)
     
+    def shade_surface(self, surface, shade):
+        """A wall surface at the light level of its shade, through the colormap tables (no tables: unchanged)"""
+        if self.colormaps is None:
+            return surface
+        level = shade_level(shade, self.colormaps['levels'])
+        if level == 0:
+            return surface
+        shaded_levels = self._shaded_surfaces.setdefault(surface, {})
+        shaded = shaded_levels.get(level)
+        if shaded is None:
+            if surface.get_bitsize() == 8:
+                # Indexed: same pixels, palette remapped through its COLORMAP
+                palette = shade_palette(bytes(c for entry in surface.get_palette() for c in entry[:3]),
+                                        self.colormaps, level)
+                shaded = surface.copy()
+                shaded.set_palette([tuple(palette[i:i + 3]) for i in range(0, len(palette) - 2, 3)])
+            else:
+                shaded = surface_from_rgb(shade_rgb(pygame.image.tobytes(surface, 'RGB'), self.colormaps, level),
+                                          *surface.get_size())
+            shaded_levels[level] = shaded
+        return shaded
+    
     def draw_textured_wall(self, vp, wall, sx1, sx2, sy1_top, sy1_bottom, sy2_top, sy2_bottom, wx1, wy1, wx2, wy2):
         """Draw a textured wall using vertical strips"""
-        texture = self.textures[wall.wt].frames[0]
+        texture = self.shade_surface(self.textures[wall.wt].get_frame(0), wall.shade)
         tex_w, tex_h = texture.get_size()
+        orig_w = self.textures[wall.wt].get_original_size()[0]
         
         # Ensure sx1 < sx2
         if sx1 > sx2:
@@ -3435,7 +3637,7 @@ class OracularEditor:
         # Calculate wall length for u mapping
         wall_len = math.sqrt((wall.x2 - wall.x1)**2 + (wall.y2 - wall.y1)**2)
         u1 = 0
-        u2 = wall_len * wall.u # Scale u by wall length and texture scale
+        u2 = wall_len * wall.u * tex_w / orig_w # Scale u by wall length and texture scale (in source texels)
         
         u_over_z1 = u1 * inv_z1
         u_over_z2 = u2 * inv_z2
@@ -3536,27 +3738,24 @@ class OracularEditor:
             tex_idx = enemy.enemy_type
             if 0 <= tex_idx < len(self.enemy_textures):
                 tex = self.enemy_textures[tex_idx]
-                frame = tex.get_current_frame()
+                frame, trim = tex.get_current_frame_trim()
                 
                 # Scale frame
                 # Assuming frame is roughly 64x64 or similar, we scale it to 'size'
-                # Maintain aspect ratio
-                w, h = frame.get_size()
+                # Maintain aspect ratio (of the untrimmed frame)
+                w, h = (trim[2], trim[3]) if trim else frame.get_size()
                 aspect = w / h
                 
                 draw_h = size
                 draw_w = int(size * aspect)
                 
-                scaled_frame = pygame.transform.scale(frame, (draw_w, draw_h))
-                
-                screen_x_mid = screen_x
-                screen_y_mid = screen_y
-                
-                dest_rect = scaled_frame.get_rect(center=(screen_x_mid, screen_y_mid))
+                full_rect = pygame.Rect(0, 0, draw_w, draw_h)
+                full_rect.center = (screen_x, screen_y)
+                dest_rect = trimmed_rect(full_rect, frame.get_size(), trim)
                 
                 # Clip
                 if dest_rect.colliderect(vp.rect):
-                    self.screen.blit(scaled_frame, dest_rect)
+                    self.screen.blit(pygame.transform.scale(frame, dest_rect.size), dest_rect)
             else:
                 # Fallback
                 color = (255, 0, 0)
@@ -3607,11 +3806,12 @@ class OracularEditor:
             tex_idx = pickup.pickup_type
             if 0 <= tex_idx < len(self.pickup_textures):
                 tex = self.pickup_textures[tex_idx]
-                frame = tex.get_current_frame()
-                scaled_frame = pygame.transform.scale(frame, (size, size))
-                dest_rect = scaled_frame.get_rect(center=(screen_x, screen_y))
+                frame, trim = tex.get_current_frame_trim()
+                full_rect = pygame.Rect(0, 0, size, size)
+                full_rect.center = (screen_x, screen_y)
+                dest_rect = trimmed_rect(full_rect, frame.get_size(), trim)
                 if dest_rect.colliderect(vp.rect):
-                    self.screen.blit(scaled_frame, dest_rect)
+                    self.screen.blit(pygame.transform.scale(frame, dest_rect.size), dest_rect)
             else:
                 rect = pygame.Rect(screen_x - size//2, screen_y - size//2, size, size)
                 if rect.colliderect(vp.rect):
@@ -4620,8 +4820,24 @@ class OracularEditor:
         text_rect = text_surface.get_rect(center=(x, y))
         self.screen.blit(text_surface, text_rect)
 
-def run_splash_screen():
-    """Show borderless splash screen before main app"""
+def draw_splash_progress(screen, img_rect, done, total):
+    """Draw the texture loading progress bar along the bottom of the splash"""
+    bar_h = 6
+    margin = 20
+    bar_rect = pygame.Rect(margin, img_rect.height - margin - bar_h, img_rect.width - 2 * margin, bar_h)
+    pygame.draw.rect(screen, Colors.BG_DARK, bar_rect)
+    if total > 0:
+        fill_w = int(bar_rect.width * done / total)
+        pygame.draw.rect(screen, Colors.ACCENT_BRIGHT, (bar_rect.x, bar_rect.y, fill_w, bar_h))
+    pygame.draw.rect(screen, Colors.SEPARATOR, bar_rect, 1)
+
+def run_splash_screen(texture_loader=None):
+    """Show borderless splash screen before main app.
+    
+    With a texture_loader the splash doubles as a loading screen: it shows a
+    progress bar and closes once loading is finished and the minimum display
+    time has passed, so startup takes max(splash, load) rather than the sum.
+    """
     splash_path = os.path.join(TEXTURE_DIR, "splash.png")
     if not os.path.exists(splash_path):
         return
@@ -4658,7 +4874,7 @@ def run_splash_screen():
         screen.blit(splash_img, (0, 0))
         pygame.display.flip()
         
-        # Wait 3 seconds
+        # Show for at least 3 seconds, and until textures are loaded
         start_time = pygame.time.get_ticks()
         duration = 3000
         
@@ -4666,10 +4882,14 @@ def run_splash_screen():
         while waiting:
             # Redraw to prevent black screen
             screen.blit(splash_img, (0, 0))
+            if texture_loader:
+                done, total = texture_loader.progress()
+                draw_splash_progress(screen, img_rect, done, total)
             pygame.display.flip()
             
             current_time = pygame.time.get_ticks()
-            if current_time - start_time > duration:
+            loading = texture_loader is not None and not texture_loader.is_done()
+            if current_time - start_time > duration and not loading:
                 waiting = False
                 
             for event in pygame.event.get():
@@ -4691,14 +4911,57 @@ def run_splash_screen():
 
 # === MAIN ===
 def main():
+    parser = argparse.ArgumentParser(description="Oracular level editor for DoomClone")
+    parser.add_argument('--no-texture-cache', action='store_true',
+                        help="Parse texture headers directly instead of using the decoded-texture cache")
+    parser.add_argument('--clear-texture-cache', action='store_true',
+                        help="Delete the decoded-texture cache and exit")
+    parser.add_argument('--prewarm-texture-cache', action='store_true',
+                        help="Decode every header in textures/ into the cache and exit")
+    parser.add_argument('--jobs', type=int, default=None, metavar='N',
+                        help="Worker processes for texture parsing (default: one per CPU)")
+    parser.add_argument('--no-atlas', action='store_true',
+                        help="Ignore the texture atlases in textures/atlas (see texture_atlas.py)")
+    parser.add_argument('--no-colormap', action='store_true',
+                        help="Draw walls unshaded instead of through textures/colormap (see texture_colormap.py)")
+    args = parser.parse_args()
+    
+    texture_cache = None if args.no_texture_cache else TextureCache()
+    if args.clear_texture_cache:
+        removed = TextureCache().clear()
+        print(f"Removed {removed} cached file(s)")
+        return
+    if args.prewarm_texture_cache:
+        start_time = time.perf_counter()
+        count = TextureCache().prewarm(TEXTURE_DIR, args.jobs)
+        print(f"Cached {count} texture header(s) in {time.perf_counter() - start_time:.2f} s")
+        return
+    
+    # Headers packed in an atlas are drawn from its sheets and need no decoding
+    atlas_paths = [] if args.no_atlas else find_atlases()
+    atlas_files = set()
+    for atlas_path in atlas_paths:
+        try:
+            info = read_atlas_info(atlas_path)
+            stale = stale_atlas_files(atlas_path, info, TEXTURE_DIR)
+            atlas_files.update(r['file'] for r in info['rects'] if r['file'] not in stale)
+        except (OSError, ValueError):
+            pass  # reported when the editor loads it
+    loader_files = [f for f in EDITOR_TEXTURE_FILES if f not in atlas_files]
+    
+    # Start decoding textures now so the work overlaps the splash screen
+    texture_loader = BackgroundTextureLoader(TEXTURE_DIR, loader_files, texture_cache, args.jobs).start()
+    
     # Run splash first (it handles its own pygame.init/quit for the splash window)
-    run_splash_screen()
+    run_splash_screen(texture_loader)
     
     # Now start the actual editor
-    editor = OracularEditor()
+    colormap_path = None if args.no_colormap or not os.path.exists(COLORMAP_PATH) else COLORMAP_PATH
+    editor = OracularEditor(texture_cache, texture_loader, atlas_paths, colormap_path)
     # editor.show_splash() # REMOVED
     editor.load_level()
     editor.run()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Texture parsing workers in PyInstaller builds
     main()
@@ -11,113 +11,113 @@ SAU Format v2 (DoomClone's custom level format):
   - Player: spawn position and angle
   - Enemies: position and type
   - Textures: embedded texture data (NEW in v2)
+
+SAU Format v3 holds the same records, but as sections listed in a table of
+contents after the header, so a reader can seek straight to the geometry or
+to one texture:
+  - Header: magic, version, section count (16 bytes)
+  - TOC: section id, offset, length, flags per section (16 bytes each)
+  - Sections, each at an 8-byte aligned offset: sectors, walls, player,
+    enemies, then one texref section per texture (texture header + a pool
+    index per frame) and the texture pool: one section per distinct frame
+    (16-byte content digest + RGB data), so repeated frames and textures
+    reused under another name are stored once.
+v1 and v2 files are still read; --version 2 writes the old layout.
+
+v3 sections can be compressed one by one (--compress for the texture pool,
+--compress-geometry for the rest) with zlib, lzma or, if installed, lz4.
+The codec is kept in the section's TOC flags; readers decompress a section
+only when it is read.
+
+read_sau() returns a dict per record; map_sau() memory-maps the file and
+returns NumPy structured-array views instead (requires NumPy).
 """
 
+import mmap
 import struct
 import sys
 import os
-import re
+import time
+import zlib
+import lzma
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+from frame_dedup import array_digest, frame_digest
+from texture_header import FRAME_NAME_RE, parse_header_arrays, parse_header_batch
 
 # SAU Format Constants
 SAU_MAGIC = 0x5541534F  # "OSAU" in little endian (Oracular SAU)
-SAU_VERSION = 2  # Version 2 includes textures
+SAU_VERSION = 3  # Version 3 adds the section table of contents
+SAU_READ_VERSIONS = (1, 2, 3)
+SAU_WRITE_VERSIONS = (2, 3)
+SAU_ALIGNMENT = 8
+
+# v3: magic(4) + version(2) + sectionCount(2) + reserved(4) + reserved(4), then one TOC entry per section
+SAU_V3_HEADER = struct.Struct('<IHHII')
+SAU_TOC_ENTRY = struct.Struct('<IIII')  # section id, offset, length, flags
+
+SECTION_SECTORS = 1
+SECTION_WALLS = 2
+SECTION_PLAYER = 3
+SECTION_ENEMIES = 4
+SECTION_TEXTURE = 5  # v1/v2 texture record (header + frames); never a v3 section
+SECTION_POOL = 6     # one section per distinct frame: content digest + RGB data
+SECTION_TEXREF = 7   # one section per texture, in game order: texture header + pool index per frame
+SECTION_NAMES = {SECTION_SECTORS: 'sectors', SECTION_WALLS: 'walls', SECTION_PLAYER: 'player',
+                 SECTION_ENEMIES: 'enemies', SECTION_POOL: 'pool', SECTION_TEXREF: 'texref'}
+POOL_DIGEST_SIZE = 16  # frame_dedup.frame_digest
+
+# Record layouts (all versions)
+SECTOR_RECORD = struct.Struct('<hhhhhh')
+SECTOR_FIELDS = ('ws', 'we', 'z1', 'z2', 'st', 'ss')
+WALL_RECORD = struct.Struct('<hhhhhhhh')
+WALL_FIELDS = ('x1', 'y1', 'x2', 'y2', 'wt', 'u', 'v', 'shade')
+PLAYER_RECORD = struct.Struct('<hhhhh')
+PLAYER_FIELDS = ('x', 'y', 'z', 'a', 'l')
+ENEMY_RECORD = struct.Struct('<hhhh')
+ENEMY_FIELDS = ('x', 'y', 'z', 'type')
+TEXTURE_HEADER = struct.Struct('<32sHHHH')  # name, width, height, frame count, reserved
+INT16_MIN, INT16_MAX = -32768, 32767
+
+# v3 section compression: the codec id is kept in the low bits of the TOC flags.
+# A compressed section keeps its fixed header (the texture header, for textures)
+# uncompressed, followed by the raw size of the rest and the compressed bytes.
+SECTION_CODEC_MASK = 0x000F
+SECTION_CODECS = {1: 'zlib', 2: 'lzma', 3: 'lz4'}
+CODEC_IDS = {name: codec_id for codec_id, name in SECTION_CODECS.items()}
+SECTION_RAW_SIZE = struct.Struct('<I')
 
 
 def parse_texture_h_file(filepath):
-    """Parse a texture .h file and extract RGB data"""
+    """Parse a texture .h file (or its binary sidecar, if fresh) and extract RGB data"""
     if not os.path.exists(filepath):
         return None
     
     try:
-        with open(filepath, 'r') as f:
-            data = f.read()
-        
-        textures = []
-        
-        # Parse dimension arrays first
-        dim_arrays = {}
-        int_array_matches = list(re.finditer(r'(?:static\s+)?(?:const\s+)?int\s+([a-zA-Z0-9_]+)(?:\[\d*\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL))
-        for match in int_array_matches:
-            name = match.group(1)
-            content = match.group(2)
-            vals = [int(num) for num in re.findall(r'\b\d+\b', content)]
-            dim_arrays[name] = vals
-
-        # Find all char array definitions (texture data)
-        array_matches = list(re.finditer(r'(?:static\s+)?(?:const\s+)?(?:unsigned\s+)?char\s+([a-zA-Z0-9_]+)(?:\[\])?\s*=\s*\{([^}]*)\}', data, re.DOTALL))
-        
-        for match in array_matches:
-            name = match.group(1)
-            content = match.group(2)
-            
-            # Find dimensions
-            width = 0
-            height = 0
-            
-            # Try various dimension patterns
-            w_match = re.search(f'#define\\s+{name}_WIDTH\\s+(\\d+)', data)
-            h_match = re.search(f'#define\\s+{name}_HEIGHT\\s+(\\d+)', data)
-            
-            if not w_match:
-                base_name = re.sub(r'_frame_\d+$', '', name)
-                w_match = re.search(f'#define\\s+{base_name}_FRAME_WIDTH\\s+(\\d+)', data)
-                if not w_match:
-                    w_match = re.search(f'#define\\s+{base_name}_WIDTH\\s+(\\d+)', data)
-            
-            if not h_match:
-                base_name = re.sub(r'_frame_\d+$', '', name)
-                h_match = re.search(f'#define\\s+{base_name}_FRAME_HEIGHT\\s+(\\d+)', data)
-                if not h_match:
-                    h_match = re.search(f'#define\\s+{base_name}_HEIGHT\\s+(\\d+)', data)
-            
-            if w_match and h_match:
-                width = int(w_match.group(1))
-                height = int(h_match.group(1))
-            else:
-                # Check for array-based dimensions
-                frame_match = re.match(r'([a-zA-Z0-9_]+)_frame_(\d+)', name)
-                if frame_match:
-                    prefix = frame_match.group(1)
-                    idx = int(frame_match.group(2))
-                    w_arr_name = f"{prefix}_frame_widths"
-                    h_arr_name = f"{prefix}_frame_heights"
-                    
-                    if w_arr_name in dim_arrays and h_arr_name in dim_arrays:
-                        if idx < len(dim_arrays[w_arr_name]) and idx < len(dim_arrays[h_arr_name]):
-                            width = dim_arrays[w_arr_name][idx]
-                            height = dim_arrays[h_arr_name][idx]
-
-            if width == 0 or height == 0:
-                continue
-            
-            # Parse pixel data
-            pixel_vals = [int(num) for num in re.findall(r'\b\d+\b', content)]
-            
-            expected = width * height * 3
-            if len(pixel_vals) < expected:
-                pixel_vals += [0] * (expected - len(pixel_vals))
-            
-            textures.append({
-                'name': name,
-                'width': width,
-                'height': height,
-                'data': bytes(pixel_vals[:expected])
-            })
-        
-        return textures
+        return parse_header_arrays(filepath)
     except Exception as e:
         print(f"Error parsing {filepath}: {e}")
         return None
 
 
-def load_all_textures(texture_dir):
+def load_all_textures(texture_dir, max_workers=None):
     """Load all textures in the order used by the game"""
     all_textures = []
     
+    # Parse every header up front across a process pool, in game order
+    static_files = [f"T_{i:02d}.h" for i in range(7)]
+    wall57_files = ["WALL57_2.h", "WALL57_3.h", "WALL57_4.h"]
+    jobs = [(os.path.join(texture_dir, name), None)
+            for name in static_files + wall57_files + ["WALL58.h"]]
+    parsed = parse_header_batch(jobs, max_workers)
+    static_results = parsed[:7]
+    wall57_results = parsed[7:10]
+    wall58_textures = parsed[10]
+    
     # Static textures T_00 through T_06
-    for i in range(7):
-        filepath = os.path.join(texture_dir, f"T_{i:02d}.h")
-        textures = parse_texture_h_file(filepath)
+    for i, textures in enumerate(static_results):
         if textures:
             all_textures.append(textures[0])  # Take first texture from file
         else:
@@ -131,9 +131,7 @@ def load_all_textures(texture_dir):
     
     # WALL57 animated frames (index 7)
     wall57_frames = []
-    for frame_file in ["WALL57_2.h", "WALL57_3.h", "WALL57_4.h"]:
-        filepath = os.path.join(texture_dir, frame_file)
-        textures = parse_texture_h_file(filepath)
+    for textures in wall57_results:
         if textures:
             wall57_frames.append(textures[0])
     
@@ -156,9 +154,9 @@ def load_all_textures(texture_dir):
         })
     
     # WALL58 animated frames (index 8)
-    filepath = os.path.join(texture_dir, "WALL58.h")
-    wall58_textures = parse_texture_h_file(filepath)
-    wall58_frames = [t for t in (wall58_textures or []) if 'frame' in t['name'].lower()]
+    wall58_frames = [t for t in (wall58_textures or []) if FRAME_NAME_RE.fullmatch(t['name'])]
+    # Repeats stored once (WALL58_frame_sequence) are parsed after the stored frames
+    wall58_frames.sort(key=lambda t: int(FRAME_NAME_RE.fullmatch(t['name']).group(2)))
     
     if wall58_frames:
         all_textures.append({
@@ -177,9 +175,43 @@ def load_all_textures(texture_dir):
             'data': bytes([0, 255, 255] * 64 * 64)  # Cyan placeholder
         })
     
+    share_duplicate_frames(all_textures)
     return all_textures
 
 
+def share_duplicate_frames(textures):
+    """Point frames with identical content at one data buffer, reporting bytes saved per asset.
+
+    T_04 is also WALL58's first frame, for example. The SAU v2 layout still
+    stores every frame (v3 keeps each once in its texture pool); this keeps
+    one copy in memory while building.
+    """
+    first = {}
+    total = 0
+    for texture in textures:
+        saved = 0
+        sources = []
+        for frame in texture.get('frames') or [texture]:
+            digest = array_digest(frame)
+            if digest in first:
+                original = first[digest]
+                if frame['data'] is not original['data']:
+                    frame['data'] = original['data']
+                    saved += len(frame['data'])
+                    sources.append(original['name'])
+            else:
+                first[digest] = frame
+        if 'frames' in texture:
+            texture['data'] = texture['frames'][0]['data']
+        if saved:
+            print(f"  {texture['name']}: {len(sources)} duplicate frame(s) of {', '.join(sources)} "
+                  f"({saved:,} bytes saved)")
+        total += saved
+    if total:
+        print(f"  Duplicate frames: {total:,} bytes saved")
+    return total
+
+
 def parse_level_h(filename):
     """Parse the text-based level.h format"""
     with open(filename, 'r') as f:
@@ -261,188 +293,609 @@ def parse_level_h(filename):
     return sectors, walls, player, enemies
 
 
-def write_sau(filename, sectors, walls, player, enemies, textures=None):
-    """Write binary SAU file with optional embedded textures"""
+def pack_records(records, fields, kind='records'):
+    """Pack records into one buffer of back-to-back little endian int16 fields.
+
+    records is a list of dicts, or a NumPy structured array with these
+    fields (e.g. from map_sau), which is converted column by column. Values
+    are checked against the int16 range in bulk; the first one outside it
+    raises ValueError naming kind, record index and field.
+    """
+    if hasattr(records, 'dtype'):
+        import numpy as np
+        columns = np.empty((len(records), len(fields)), np.int64)
+        for i, name in enumerate(fields):
+            columns[:, i] = records[name]
+        bad = (columns < INT16_MIN) | (columns > INT16_MAX)
+        if bad.any():
+            row, col = (int(i) for i in np.argwhere(bad)[0])
+            raise ValueError(f"{kind}[{row}].{fields[col]} = {columns[row, col]} is outside the int16 range")
+        return columns.astype('<i2').tobytes()
+
+    get = itemgetter(*fields)
+    flat = [v for r in records for v in get(r)]
+    if flat and (min(flat) < INT16_MIN or max(flat) > INT16_MAX):
+        index = next(i for i, v in enumerate(flat) if not INT16_MIN <= v <= INT16_MAX)
+        raise ValueError(f"{kind}[{index // len(fields)}].{fields[index % len(fields)]} = {flat[index]} "
+                         f"is outside the int16 range")
+    values = array('h', flat)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_records(data, record, fields):
+    """Unpack back-to-back records into a list of dicts."""
+    return [dict(zip(fields, values)) for values in record.iter_unpack(data)]
+
+
+def texture_frames(tex):
+    """RGB data of every frame a texture dict is written with"""
+    if 'frames' in tex and tex.get('frame_count', 1) > 1:
+        return [frame['data'] for frame in tex['frames']]
+    return [tex['data']]
+
+
+def pack_texture_header(tex):
+    """Texture header: name, width, height, frame count"""
+    name_bytes = tex['name'].encode('utf-8')[:31]  # Max 31 chars + null
+    return TEXTURE_HEADER.pack(name_bytes, tex['width'], tex['height'], tex.get('frame_count', 1), 0)
+
+
+def pack_texture(tex):
+    """Texture header followed by the RGB data of every frame."""
+    return pack_texture_header(tex) + b''.join(bytes(data) for data in texture_frames(tex))
+
+
+def pack_texture_pool(textures):
+    """Pooled v3 texture sections: one texref per texture, then one pool section per distinct frame.
+
+    Frames are keyed by content digest, so repeated frames and textures
+    reused under another name are stored once. Returns (sections, frame
+    bytes referenced, frame bytes stored).
+    """
+    pool = {}
+    blobs = []
+    refs = []
+    referenced = 0
+    for tex in textures:
+        indices = []
+        for data in texture_frames(tex):
+            digest = frame_digest(tex['width'], tex['height'], data)
+            if digest not in pool:
+                pool[digest] = len(blobs)
+                blobs.append((SECTION_POOL, digest + bytes(data)))
+            indices.append(pool[digest])
+            referenced += len(data)
+        refs.append((SECTION_TEXREF, pack_texture_header(tex) + struct.pack(f'<{len(indices)}I', *indices)))
+    return refs + blobs, referenced, sum(len(payload) - POOL_DIGEST_SIZE for _, payload in blobs)
+
+
+def texture_name(name_bytes):
+    return name_bytes.rstrip(b'\x00').decode('utf-8')
+
+
+def texture_dict(name_bytes, width, height, frames):
+    return {
+        'name': texture_name(name_bytes),
+        'width': width,
+        'height': height,
+        'frame_count': len(frames),
+        'frames': frames,
+        'data': frames[0] if frames else b''
+    }
+
+
+def parse_texture(data):
+    """Texture dict from a texture header and its frames"""
+    name_bytes, width, height, frame_count, _ = TEXTURE_HEADER.unpack_from(data)
+    data_size = width * height * 3
+    frames = [bytes(data[TEXTURE_HEADER.size + i * data_size:TEXTURE_HEADER.size + (i + 1) * data_size])
+              for i in range(frame_count)]
+    return texture_dict(name_bytes, width, height, frames)
+
+
+def parse_texture_ref(data):
+    """(name bytes, width, height, pool indices) of a texref section"""
+    name_bytes, width, height, frame_count, _ = TEXTURE_HEADER.unpack_from(data)
+    return name_bytes, width, height, struct.unpack_from(f'<{frame_count}I', data, TEXTURE_HEADER.size)
+
+
+def align(offset):
+    return (offset + SAU_ALIGNMENT - 1) // SAU_ALIGNMENT * SAU_ALIGNMENT
+
+
+def available_codecs():
+    """Section codecs usable here: zlib and lzma always, lz4 when the lz4 package is installed."""
+    try:
+        import lz4.frame  # noqa: F401
+    except ImportError:
+        return ['zlib', 'lzma']
+    return ['zlib', 'lzma', 'lz4']
+
+
+def compress_bytes(data, codec):
+    if codec == 'zlib':
+        return zlib.compress(data, 6)
+    if codec == 'lzma':
+        return lzma.compress(data)
+    import lz4.frame
+    return lz4.frame.compress(data)
+
+
+def decompress_bytes(data, codec):
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    if codec == 'lz4':
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ValueError("SAU section is lz4 compressed but the lz4 package is not installed")
+        return lz4.frame.decompress(data)
+    raise ValueError(f"Unknown SAU codec {codec!r}")
+
+
+def section_head_size(section_id):
+    """Bytes at the start of a section that stay uncompressed"""
+    if section_id == SECTION_TEXREF:
+        return TEXTURE_HEADER.size
+    return POOL_DIGEST_SIZE if section_id == SECTION_POOL else 0
+
+
+def compress_section(section_id, payload, codec):
+    """(stored payload, TOC flags) of a section: compressed with codec, or as is if that doesn't shrink it."""
+    head = section_head_size(section_id)
+    body = payload[head:]
+    stored = payload[:head] + SECTION_RAW_SIZE.pack(len(body)) + compress_bytes(body, codec)
+    if len(stored) >= len(payload):
+        return payload, 0
+    return stored, CODEC_IDS[codec]
+
+
+def decode_section(section_id, stored, flags):
+    """Raw payload of a stored section"""
+    codec_id = flags & SECTION_CODEC_MASK
+    if not codec_id:
+        return stored
+    codec = SECTION_CODECS.get(codec_id)
+    if codec is None:
+        raise ValueError(f"Unknown codec {codec_id} in SAU section {SECTION_NAMES.get(section_id, section_id)}")
+    head = section_head_size(section_id)
+    raw_size, = SECTION_RAW_SIZE.unpack_from(stored, head)
+    body = decompress_bytes(stored[head + SECTION_RAW_SIZE.size:], codec)
+    if len(body) != raw_size:
+        raise ValueError(f"Corrupt SAU section {SECTION_NAMES.get(section_id, section_id)}: "
+                         f"{len(body)} bytes decompressed, {raw_size} expected")
+    return bytes(stored[:head]) + body
+
+
+def write_sau(filename, sectors, walls, player, enemies, textures=None, version=SAU_VERSION,
+              compression=None, max_workers=None):
+    """Write binary SAU file with optional embedded textures (version 3, or 2 for the old stream layout)
+
+    v3 stores each distinct texture frame once, in the texture pool.
+    compression (v3 only) is a codec name for the pool, or a dict of
+    section name -> codec ({'pool': 'lzma', 'walls': 'zlib'}). Sections are
+    compressed in parallel on max_workers threads.
+    """
+    if version not in SAU_WRITE_VERSIONS:
+        raise ValueError(f"Cannot write SAU version {version} (supported: {SAU_WRITE_VERSIONS})")
+    if isinstance(compression, str):
+        compression = {SECTION_NAMES[SECTION_POOL]: compression}
+    compression = compression or {}
+    if compression and version < 3:
+        raise ValueError("Section compression needs SAU version 3")
+    for name, codec in compression.items():
+        if name not in SECTION_NAMES.values():
+            raise ValueError(f"Unknown SAU section {name!r} (sections: {', '.join(SECTION_NAMES.values())})")
+        if codec not in available_codecs():
+            raise ValueError(f"SAU codec {codec!r} is not available (available: {', '.join(available_codecs())})")
+    num_textures = len(textures) if textures else 0
+    if version == 2 and max(len(sectors), len(walls), len(enemies), num_textures) > 0xFFFF:
+        raise ValueError("SAU v2 holds at most 65535 records of each kind; write version 3")
+
+    # Each section is packed into one buffer and written with one call
+    start_time = time.perf_counter()
+    sections = [
+        (SECTION_SECTORS, pack_records(sectors, SECTOR_FIELDS, 'sectors')),
+        (SECTION_WALLS, pack_records(walls, WALL_FIELDS, 'walls')),
+        (SECTION_PLAYER, pack_records([player] if isinstance(player, dict) else player, PLAYER_FIELDS, 'player')),
+        (SECTION_ENEMIES, pack_records(enemies, ENEMY_FIELDS, 'enemies')),
+    ]
+    pack_time = time.perf_counter() - start_time
+    records = len(sectors) + len(walls) + 1 + len(enemies)
+    referenced = pooled = 0
+    if version == 2:
+        sections += [(SECTION_TEXTURE, pack_texture(tex)) for tex in textures or []]
+    elif textures:
+        texture_sections, referenced, pooled = pack_texture_pool(textures)
+        sections += texture_sections
+    raw_size = sum(len(payload) for _, payload in sections)
+
+    # Sections become (id, stored payload, flags). Threads compress in parallel: zlib and lzma release the GIL
+    def store(section):
+        section_id, payload = section
+        codec = compression.get(SECTION_NAMES.get(section_id))
+        return (section_id,) + (compress_section(section_id, payload, codec) if codec else (payload, 0))
+
+    compress_time = 0.0
+    if compression:
+        compress_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sections = list(executor.map(store, sections))
+        compress_time = time.perf_counter() - compress_start
+    else:
+        sections = [store(section) for section in sections]
+
     with open(filename, 'wb') as f:
-        # Determine texture count
-        num_textures = len(textures) if textures else 0
-        
-        # Write header (16 bytes for v2)
-        # magic(4) + version(2) + numSectors(2) + numWalls(2) + numEnemies(2) + numTextures(2) + reserved(2)
-        header = struct.pack('<IHHHHHI',
-            SAU_MAGIC,
-            SAU_VERSION,
-            len(sectors),
-            len(walls),
-            len(enemies),
-            num_textures,
-            0  # Reserved
-        )
-        f.write(header)
-        
-        # Write sectors (12 bytes each)
-        for sec in sectors:
-            data = struct.pack('<hhhhhh',
-                sec['ws'], sec['we'],
-                sec['z1'], sec['z2'],
-                sec['st'], sec['ss']
-            )
-            f.write(data)
-        
-        # Write walls (16 bytes each)
-        for wall in walls:
-            data = struct.pack('<hhhhhhhh',
-                wall['x1'], wall['y1'],
-                wall['x2'], wall['y2'],
-                wall['wt'],
-                wall['u'], wall['v'],
-                wall['shade']
-            )
-            f.write(data)
-        
-        # Write player spawn (10 bytes)
-        data = struct.pack('<hhhhh',
-            player['x'], player['y'], player['z'],
-            player['a'], player['l']
-        )
-        f.write(data)
-        
-        # Write enemies (8 bytes each)
-        for enemy in enemies:
-            data = struct.pack('<hhhh',
-                enemy['x'], enemy['y'], enemy['z'],
-                enemy['type']
-            )
-            f.write(data)
-        
-        # Write textures (NEW in v2)
-        if textures:
-            for tex in textures:
-                name_bytes = tex['name'].encode('utf-8')[:31]  # Max 31 chars + null
-                name_bytes = name_bytes.ljust(32, b'\x00')
-                
-                width = tex['width']
-                height = tex['height']
-                frame_count = tex.get('frame_count', 1)
-                
-                # Texture header: name(32) + width(2) + height(2) + frame_count(2) + reserved(2)
-                tex_header = struct.pack('<32sHHHH',
-                    name_bytes,
-                    width,
-                    height,
-                    frame_count,
-                    0  # Reserved
-                )
-                f.write(tex_header)
-                
-                # Write texture data for each frame
-                if 'frames' in tex and frame_count > 1:
-                    for frame in tex['frames']:
-                        f.write(frame['data'])
-                else:
-                    f.write(tex['data'])
-    
+        if version == 2:
+            # magic(4) + version(2) + numSectors(2) + numWalls(2) + numEnemies(2) + numTextures(2) + reserved(4)
+            f.write(struct.pack('<IHHHHHI', SAU_MAGIC, 2, len(sectors), len(walls), len(enemies), num_textures, 0))
+            for _, payload, _ in sections:
+                f.write(payload)
+        else:
+            # Header and table of contents, then every section at an aligned offset
+            offset = align(SAU_V3_HEADER.size + SAU_TOC_ENTRY.size * len(sections))
+            toc = []
+            for section_id, payload, flags in sections:
+                toc.append(SAU_TOC_ENTRY.pack(section_id, offset, len(payload), flags))
+                offset = align(offset + len(payload))
+            f.write(SAU_V3_HEADER.pack(SAU_MAGIC, version, len(sections), 0, 0))
+            f.write(b''.join(toc))
+            for _, payload, _ in sections:
+                f.write(b'\x00' * (align(f.tell()) - f.tell()))
+                f.write(payload)
+    elapsed = time.perf_counter() - start_time
+
     # Calculate and display file info
     size = os.path.getsize(filename)
     print(f"Created SAU: {filename}")
-    print(f"  Version: {SAU_VERSION}")
+    print(f"  Version: {version}")
     print(f"  Sectors: {len(sectors)}")
     print(f"  Walls: {len(walls)}")
     print(f"  Enemies: {len(enemies)}")
     print(f"  Textures: {num_textures}")
+    if version >= 3:
+        print(f"  Sections: {len(sections)} ({SAU_ALIGNMENT}-byte aligned)")
+    if referenced:
+        print(f"  Texture pool: {sum(1 for s in sections if s[0] == SECTION_POOL)} distinct frame(s), "
+              f"{pooled:,} of {referenced:,} bytes stored ({referenced - pooled:,} saved by deduplication)")
+    if compress_time:
+        stored_size = sum(len(payload) for _, payload, _ in sections)
+        compressed = sum(1 for _, _, flags in sections if flags)
+        print(f"  Compressed: {compressed} section(s), {raw_size:,} -> {stored_size:,} bytes "
+              f"({stored_size / raw_size:.1%}) in {compress_time * 1000:.1f} ms "
+              f"({raw_size / (1024 * 1024) / compress_time:.1f} MB/s)")
     print(f"  Size: {size} bytes ({size/1024:.1f} KB)")
+    print(f"  Records: {records:,} packed in {pack_time * 1000:.1f} ms "
+          f"({records / pack_time if pack_time > 0 else 0:,.0f} records/s), file written in {elapsed * 1000:.1f} ms")
+
+
+def read_sau_header(f):
+    """Read the header at the start of a SAU file.
+
+    Returns (version, counts, toc): counts is {'sectors', 'walls', 'enemies',
+    'textures'} for v1/v2 (toc None); v3 has no counts but a table of
+    contents, a list of {'id', 'offset', 'length', 'flags'}.
+    """
+    magic, version = struct.unpack('<IH', f.read(6))
+    if magic != SAU_MAGIC:
+        raise ValueError(f"Invalid SAU magic: {hex(magic)} (expected {hex(SAU_MAGIC)})")
+    if version not in SAU_READ_VERSIONS:
+        raise ValueError(f"Unsupported SAU version {version} (supported: {SAU_READ_VERSIONS})")
+
+    if version >= 3:
+        section_count, _, _ = struct.unpack('<HII', f.read(SAU_V3_HEADER.size - 6))
+        toc = [dict(zip(('id', 'offset', 'length', 'flags'), SAU_TOC_ENTRY.unpack(f.read(SAU_TOC_ENTRY.size))))
+               for _ in range(section_count)]
+        if any(entry['id'] == SECTION_TEXTURE for entry in toc):
+            raise ValueError("SAU v3 file from before the texture pool (inline texture sections); "
+                             "rebuild it with sau_builder.py")
+        return version, None, toc
+
+    num_sectors, num_walls, num_enemies = struct.unpack('<HHH', f.read(6))
+    num_textures = 0
+    if version >= 2:
+        num_textures, _ = struct.unpack('<HI', f.read(6))
+    return version, {'sectors': num_sectors, 'walls': num_walls, 'enemies': num_enemies,
+                     'textures': num_textures}, None
+
+
+def read_section(f, entry, decode=True):
+    """Seek to a v3 section and read its payload (decompressed unless decode is False)."""
+    f.seek(entry['offset'])
+    data = f.read(entry['length'])
+    if len(data) != entry['length']:
+        raise ValueError(f"Truncated SAU section {SECTION_NAMES.get(entry['id'], entry['id'])}")
+    return decode_section(entry['id'], data, entry['flags']) if decode else data
+
+
+def read_texture_section(f, entry, pool, blobs):
+    """Texture dict of a v3 texref section.
+
+    pool is the TOC entries of the pool sections; blobs (pool index -> bytes)
+    collects the frames read, so textures sharing a frame share its buffer.
+    """
+    data = read_section(f, entry)
+    name_bytes, width, height, indices = parse_texture_ref(data)
+    for index in indices:
+        if index >= len(pool):
+            raise ValueError(f"SAU texture {texture_name(name_bytes)} refers to missing pool entry {index}")
+        if index not in blobs:
+            blobs[index] = read_section(f, pool[index])[POOL_DIGEST_SIZE:]
+    return texture_dict(name_bytes, width, height, [blobs[index] for index in indices])
+
 
+class PoolFrames:
+    """Frames of a pooled texture as shared views of the pool (map_sau)."""
+    def __init__(self, get_blob, indices):
+        self.get_blob = get_blob  # pool index -> buffer, decompressing a compressed entry once
+        self.indices = indices
 
-def read_sau(filename, extract_textures=False):
-    """Read binary SAU file"""
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        return self.get_blob(self.indices[index])
+
+    def __iter__(self):
+        return (self.get_blob(index) for index in self.indices)
+
+
+def read_sau(filename, extract_textures=False, skip_textures=False):
+    """Read binary SAU file (v1, v2 or v3).
+
+    skip_textures leaves the embedded textures unread (v3 seeks straight to
+    the geometry sections; v1/v2 stop after the enemies) and returns [].
+    """
     with open(filename, 'rb') as f:
-        # Read header (check for v1 or v2)
-        header_data = f.read(12)
-        magic, version, num_sectors, num_walls, num_enemies = struct.unpack('<IHHHH', header_data)
-        
-        if magic != SAU_MAGIC:
-            raise ValueError(f"Invalid SAU magic: {hex(magic)} (expected {hex(SAU_MAGIC)})")
-        
-        num_textures = 0
-        if version >= 2:
-            # Read additional v2 header fields
-            extra = f.read(6)
-            num_textures, _ = struct.unpack('<HI', extra)
-        
+        version, counts, toc = read_sau_header(f)
+
+        if toc is not None:
+            by_id = {}
+            for entry in toc:
+                by_id.setdefault(entry['id'], []).append(entry)
+            def section(section_id):
+                entries = by_id.get(section_id)
+                return read_section(f, entries[0]) if entries else b''
+            sectors = unpack_records(section(SECTION_SECTORS), SECTOR_RECORD, SECTOR_FIELDS)
+            walls = unpack_records(section(SECTION_WALLS), WALL_RECORD, WALL_FIELDS)
+            player = dict(zip(PLAYER_FIELDS, PLAYER_RECORD.unpack(section(SECTION_PLAYER))))
+            enemies = unpack_records(section(SECTION_ENEMIES), ENEMY_RECORD, ENEMY_FIELDS)
+            texture_entries = [entry for entry in toc if entry['id'] == SECTION_TEXREF]
+            num_textures = len(texture_entries)
+        else:
+            sectors = unpack_records(f.read(counts['sectors'] * SECTOR_RECORD.size), SECTOR_RECORD, SECTOR_FIELDS)
+            walls = unpack_records(f.read(counts['walls'] * WALL_RECORD.size), WALL_RECORD, WALL_FIELDS)
+            player = dict(zip(PLAYER_FIELDS, PLAYER_RECORD.unpack(f.read(PLAYER_RECORD.size))))
+            enemies = unpack_records(f.read(counts['enemies'] * ENEMY_RECORD.size), ENEMY_RECORD, ENEMY_FIELDS)
+            num_textures = counts['textures']
+
         print(f"SAU Version: {version}")
-        print(f"Sectors: {num_sectors}, Walls: {num_walls}, Enemies: {num_enemies}, Textures: {num_textures}")
-        
-        # Read sectors
-        sectors = []
-        for i in range(num_sectors):
-            data = f.read(12)
-            values = struct.unpack('<hhhhhh', data)
-            sectors.append({
-                'ws': values[0], 'we': values[1],
-                'z1': values[2], 'z2': values[3],
-                'st': values[4], 'ss': values[5]
-            })
-        
-        # Read walls
-        walls = []
-        for i in range(num_walls):
-            data = f.read(16)
-            values = struct.unpack('<hhhhhhhh', data)
-            walls.append({
-                'x1': values[0], 'y1': values[1],
-                'x2': values[2], 'y2': values[3],
-                'wt': values[4],
-                'u': values[5], 'v': values[6],
-                'shade': values[7]
-            })
-        
-        # Read player
-        data = f.read(10)
-        values = struct.unpack('<hhhhh', data)
-        player = {
-            'x': values[0], 'y': values[1], 'z': values[2],
-            'a': values[3], 'l': values[4]
-        }
-        
-        # Read enemies
-        enemies = []
-        for i in range(num_enemies):
-            data = f.read(8)
-            values = struct.unpack('<hhhh', data)
-            enemies.append({
-                'x': values[0], 'y': values[1], 'z': values[2],
-                'type': values[3]
-            })
-        
-        # Read textures (v2+)
+        print(f"Sectors: {len(sectors)}, Walls: {len(walls)}, Enemies: {len(enemies)}, Textures: {num_textures}")
+
         textures = []
-        if version >= 2 and num_textures > 0:
-            for i in range(num_textures):
-                tex_header = f.read(40)
-                name_bytes, width, height, frame_count, _ = struct.unpack('<32sHHHH', tex_header)
-                name = name_bytes.rstrip(b'\x00').decode('utf-8')
-                
-                frames = []
-                data_size = width * height * 3
-                for frame_idx in range(frame_count):
-                    frame_data = f.read(data_size)
-                    frames.append(frame_data)
-                
-                textures.append({
-                    'name': name,
-                    'width': width,
-                    'height': height,
-                    'frame_count': frame_count,
-                    'frames': frames,
-                    'data': frames[0] if frames else b''
-                })
-        
+        if not skip_textures:
+            if toc is not None:
+                pool = by_id.get(SECTION_POOL, [])
+                blobs = {}
+                textures = [read_texture_section(f, entry, pool, blobs) for entry in texture_entries]
+            else:
+                for _ in range(num_textures):
+                    header = f.read(TEXTURE_HEADER.size)
+                    _, width, height, frame_count, _ = TEXTURE_HEADER.unpack(header)
+                    textures.append(parse_texture(header + f.read(width * height * 3 * frame_count)))
+
         return sectors, walls, player, enemies, textures
 
 
+def map_sau(filename):
+    """Memory-map a SAU file (v1, v2 or v3) without unpacking any records. Requires NumPy.
+
+    Returns {'version', 'sectors', 'walls', 'player', 'enemies', 'textures'}:
+    sectors, walls and enemies are read-only NumPy structured arrays viewing
+    the file ('<i2' fields named as in read_sau, e.g. walls['x1']), player a
+    one-record array, and each texture dict holds memoryview slices as its
+    'frames' (frames[0] is the default frame; a PoolFrames for pooled
+    textures, returning the same view for every use of a frame). Only the
+    header, TOC and texture headers are read, so the cost does not depend on
+    the number of records. The views keep the file mapped. Compressed
+    sections are the exception: geometry is decompressed into memory, and
+    compressed pool entries are decompressed on first use.
+    """
+    import numpy as np
+    with open(filename, 'rb') as f:
+        version, counts, toc = read_sau_header(f)
+        header_size = f.tell()
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    spans = {}
+    texture_spans = []
+    pool_spans = []
+    if toc is not None:
+        for entry in toc:
+            if entry['offset'] + entry['length'] > len(data):
+                raise ValueError(f"Truncated SAU section {SECTION_NAMES.get(entry['id'], entry['id'])}")
+            span = (entry['offset'], entry['length'], entry['flags'])
+            if entry['id'] == SECTION_TEXREF:
+                texture_spans.append((entry['id'],) + span)
+            elif entry['id'] == SECTION_POOL:
+                pool_spans.append(span)
+            else:
+                spans.setdefault(entry['id'], span)
+    else:
+        offset = header_size
+        for section_id, record, count in ((SECTION_SECTORS, SECTOR_RECORD, counts['sectors']),
+                                          (SECTION_WALLS, WALL_RECORD, counts['walls']),
+                                          (SECTION_PLAYER, PLAYER_RECORD, 1),
+                                          (SECTION_ENEMIES, ENEMY_RECORD, counts['enemies'])):
+            spans[section_id] = (offset, record.size * count, 0)
+            offset += record.size * count
+        for _ in range(counts['textures']):
+            _, width, height, frame_count, _ = TEXTURE_HEADER.unpack_from(data, offset)
+            length = TEXTURE_HEADER.size + width * height * 3 * frame_count
+            texture_spans.append((SECTION_TEXTURE, offset, length, 0))
+            offset += length
+        if offset > len(data):
+            raise ValueError("Truncated SAU file")
+
+    def records(section_id, fields):
+        dtype = np.dtype([(k, '<i2') for k in fields])
+        offset, length, flags = spans.get(section_id, (0, 0, 0))
+        if flags & SECTION_CODEC_MASK:
+            return np.frombuffer(decode_section(section_id, data[offset:offset + length], flags), dtype)
+        return np.frombuffer(data, dtype, count=length // dtype.itemsize, offset=offset)
+
+    view = memoryview(data)
+    blobs = {}
+
+    def get_blob(index):
+        blob = blobs.get(index)
+        if blob is None:
+            offset, length, flags = pool_spans[index]
+            if flags & SECTION_CODEC_MASK:
+                blob = memoryview(decode_section(SECTION_POOL, view[offset:offset + length], flags))
+            else:
+                blob = view[offset:offset + length]
+            blob = blobs[index] = blob[POOL_DIGEST_SIZE:]
+        return blob
+
+    textures = []
+    for section_id, offset, length, flags in texture_spans:
+        name_bytes, width, height, frame_count, _ = TEXTURE_HEADER.unpack_from(data, offset)
+        size = width * height * 3
+        start = offset + TEXTURE_HEADER.size
+        if section_id == SECTION_TEXREF:
+            stored = view[offset:offset + length]
+            _, _, _, indices = parse_texture_ref(decode_section(section_id, stored, flags))
+            if any(index >= len(pool_spans) for index in indices):
+                raise ValueError(f"SAU texture {texture_name(name_bytes)} refers to a missing pool entry")
+            frames = PoolFrames(get_blob, indices)
+        else:
+            frames = [view[start + i * size:start + (i + 1) * size] for i in range(frame_count)]
+        textures.append({
+            'name': texture_name(name_bytes),
+            'width': width,
+            'height': height,
+            'frame_count': frame_count,
+            'frames': frames
+        })
+
+    return {
+        'version': version,
+        'sectors': records(SECTION_SECTORS, SECTOR_FIELDS),
+        'walls': records(SECTION_WALLS, WALL_FIELDS),
+        'player': records(SECTION_PLAYER, PLAYER_FIELDS),
+        'enemies': records(SECTION_ENEMIES, ENEMY_FIELDS),
+        'textures': textures
+    }
+
+
+def read_sau_texture(filename, key):
+    """Read one embedded texture by index or name, without reading the others.
+
+    v3 seeks to its section (and the pool entries it uses); v1/v2 step over
+    the texture headers before it. Returns None if there is no such texture.
+    """
+    with open(filename, 'rb') as f:
+        version, counts, toc = read_sau_header(f)
+        if toc is not None:
+            pool = [e for e in toc if e['id'] == SECTION_POOL]
+            for index, entry in enumerate(e for e in toc if e['id'] == SECTION_TEXREF):
+                if isinstance(key, str):
+                    f.seek(entry['offset'])
+                    if texture_name(TEXTURE_HEADER.unpack(f.read(TEXTURE_HEADER.size))[0]) != key:
+                        continue
+                elif key != index:
+                    continue
+                return read_texture_section(f, entry, pool, {})
+            return None
+
+        f.seek(counts['sectors'] * SECTOR_RECORD.size + counts['walls'] * WALL_RECORD.size
+               + PLAYER_RECORD.size + counts['enemies'] * ENEMY_RECORD.size, os.SEEK_CUR)
+        for index in range(counts['textures']):
+            header = f.read(TEXTURE_HEADER.size)
+            name_bytes, width, height, frame_count, _ = TEXTURE_HEADER.unpack(header)
+            size = width * height * 3 * frame_count
+            if key == index or key == texture_name(name_bytes):
+                return parse_texture(header + f.read(size))
+            f.seek(size, os.SEEK_CUR)
+    return None
+
+
+def print_sau_info(filename):
+    """Print a SAU file's header, sections and texture list.
+
+    Pixel data is only read to time the decompression of compressed sections.
+    """
+    with open(filename, 'rb') as f:
+        version, counts, toc = read_sau_header(f)
+        print(f"SAU Version: {version}")
+        if toc is None:
+            geometry = (counts['sectors'] * SECTOR_RECORD.size + counts['walls'] * WALL_RECORD.size
+                        + PLAYER_RECORD.size + counts['enemies'] * ENEMY_RECORD.size)
+            print(f"Sectors: {counts['sectors']}, Walls: {counts['walls']}, Enemies: {counts['enemies']}, "
+                  f"Textures: {counts['textures']}")
+            f.seek(geometry, os.SEEK_CUR)
+            offsets = []
+            for _ in range(counts['textures']):
+                offsets.append(f.tell())
+                _, width, height, frame_count, _ = TEXTURE_HEADER.unpack(f.read(TEXTURE_HEADER.size))
+                f.seek(width * height * 3 * frame_count, os.SEEK_CUR)
+        else:
+            lengths = {}
+            decoded = {}  # TOC index -> (raw length, decode seconds) of compressed sections
+            for index, entry in enumerate(toc):
+                length = entry['length']
+                if entry['flags'] & SECTION_CODEC_MASK:
+                    stored = read_section(f, entry, decode=False)
+                    start_time = time.perf_counter()
+                    length = len(decode_section(entry['id'], stored, entry['flags']))
+                    decoded[index] = (length, time.perf_counter() - start_time)
+                lengths[entry['id']] = lengths.get(entry['id'], 0) + length
+            print(f"Sectors: {lengths.get(SECTION_SECTORS, 0) // SECTOR_RECORD.size}, "
+                  f"Walls: {lengths.get(SECTION_WALLS, 0) // WALL_RECORD.size}, "
+                  f"Enemies: {lengths.get(SECTION_ENEMIES, 0) // ENEMY_RECORD.size}, "
+                  f"Textures: {sum(1 for e in toc if e['id'] == SECTION_TEXREF)}")
+            print(f"Sections ({len(toc)}):")
+            for index, entry in enumerate(toc):
+                line = (f"  {SECTION_NAMES.get(entry['id'], entry['id']):<8} offset {entry['offset']:>8}  "
+                        f"length {entry['length']:>8}  flags {entry['flags']:#06x}")
+                if index in decoded:
+                    raw, seconds = decoded[index]
+                    line += (f"  {SECTION_CODECS.get(entry['flags'] & SECTION_CODEC_MASK)} {raw:,} -> "
+                             f"{entry['length']:,} ({entry['length'] / raw:.1%}), "
+                             f"decode {raw / (1024 * 1024) / seconds if seconds > 0 else 0:.0f} MB/s")
+                print(line)
+            if decoded:
+                raw = sum(r for r, _ in decoded.values())
+                stored = sum(toc[i]['length'] for i in decoded)
+                seconds = sum(t for _, t in decoded.values())
+                print(f"Compressed sections: {len(decoded)}, {raw:,} -> {stored:,} bytes ({stored / raw:.1%}), "
+                      f"decode {raw / (1024 * 1024) / seconds if seconds > 0 else 0:.0f} MB/s")
+            offsets = [e['offset'] for e in toc if e['id'] == SECTION_TEXREF]
+
+        referenced = 0
+        for offset in offsets:
+            f.seek(offset)
+            name_bytes, width, height, frame_count, _ = TEXTURE_HEADER.unpack(f.read(TEXTURE_HEADER.size))
+            referenced += width * height * 3 * frame_count
+            print(f"  Texture {texture_name(name_bytes)}: {width}x{height}, "
+                  f"{frame_count} frame(s)")
+        pool_count = sum(1 for e in toc or [] if e['id'] == SECTION_POOL)
+        if pool_count:
+            pooled = lengths[SECTION_POOL] - pool_count * POOL_DIGEST_SIZE
+            print(f"Texture pool: {pool_count} distinct frame(s), {pooled:,} of {referenced:,} bytes stored "
+                  f"({referenced - pooled:,} saved by deduplication, {100 - 100 * pooled / referenced:.1f}%)")
+    size = os.path.getsize(filename)
+    print(f"Size: {size} bytes ({size/1024:.1f} KB)")
+
+
 def sau_to_level_h(sau_filename, output_filename):
     """Convert SAU back to level.h text format"""
-    result = read_sau(sau_filename)
+    result = read_sau(sau_filename, skip_textures=True)
     if len(result) == 5:
         sectors, walls, player, enemies, textures = result
     else:
@@ -475,13 +928,20 @@ def sau_to_level_h(sau_filename, output_filename):
 def main():
     if len(sys.argv) < 2:
         print("=" * 60)
-        print("SAU Builder for DoomClone (v2 - with texture support)")
+        print("SAU Builder for DoomClone (v3 - with texture support)")
         print("=" * 60)
         print()
         print("Usage:")
         print("  sau_builder.py <level.h>                    - Convert to level.sau")
         print("  sau_builder.py <level.h> <output.sau>       - Convert to specified SAU")
         print("  sau_builder.py <level.h> --textures <dir>   - Include textures from dir")
+        print("  sau_builder.py <level.h> --textures <dir> --jobs N")
+        print("                                              - Parse textures with N processes")
+        print("  sau_builder.py <level.h> --version 2        - Write the v2 layout (no section table)")
+        print("  sau_builder.py <level.h> --textures <dir> --compress zlib")
+        print(f"                                              - Compress the texture pool ({', '.join(available_codecs())})")
+        print("  sau_builder.py <level.h> --compress-geometry zlib")
+        print("                                              - Compress the sector/wall/player/enemy sections")
         print("  sau_builder.py --extract <file.sau>         - Extract SAU to level.h")
         print("  sau_builder.py --info <file.sau>            - Show SAU info")
         print()
@@ -497,11 +957,14 @@ def main():
         output = sys.argv[3] if len(sys.argv) > 3 else sau_file.replace('.sau', '_extracted.h')
         sau_to_level_h(sau_file, output)
     elif sys.argv[1] == '--info' and len(sys.argv) >= 3:
-        read_sau(sys.argv[2])
+        print_sau_info(sys.argv[2])
     else:
         input_file = sys.argv[1]
         output_file = None
         texture_dir = None
+        jobs = None
+        version = SAU_VERSION
+        compression = {}
         
         # Parse arguments
         i = 2
@@ -509,6 +972,19 @@ def main():
             if sys.argv[i] == '--textures' and i + 1 < len(sys.argv):
                 texture_dir = sys.argv[i + 1]
                 i += 2
+            elif sys.argv[i] == '--jobs' and i + 1 < len(sys.argv):
+                jobs = int(sys.argv[i + 1])
+                i += 2
+            elif sys.argv[i] == '--version' and i + 1 < len(sys.argv):
+                version = int(sys.argv[i + 1])
+                i += 2
+            elif sys.argv[i] == '--compress' and i + 1 < len(sys.argv):
+                compression[SECTION_NAMES[SECTION_POOL]] = sys.argv[i + 1]
+                i += 2
+            elif sys.argv[i] == '--compress-geometry' and i + 1 < len(sys.argv):
+                for section_id in (SECTION_SECTORS, SECTION_WALLS, SECTION_PLAYER, SECTION_ENEMIES):
+                    compression[SECTION_NAMES[section_id]] = sys.argv[i + 1]
+                i += 2
             elif not output_file and not sys.argv[i].startswith('--'):
                 output_file = sys.argv[i]
                 i += 1
@@ -529,10 +1005,10 @@ def main():
             textures = None
             if texture_dir:
                 print(f"Loading textures from: {texture_dir}")
-                textures = load_all_textures(texture_dir)
+                textures = load_all_textures(texture_dir, jobs)
                 print(f"Loaded {len(textures)} textures")
             
-            write_sau(output_file, sectors, walls, player, enemies, textures)
+            write_sau(output_file, sectors, walls, player, enemies, textures, version, compression, jobs)
         except Exception as e:
             print(f"Error: {e}")
             import traceback
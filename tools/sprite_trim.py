@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Trim sprite frames to their visible pixels.
+Requires NumPy: pip install numpy
+
+Weapon and enemy frames are stored as full rectangles that are mostly the
+transparent key color (1, 0, 0). Trimming crops each frame to the bounding box
+of its other pixels (of alpha > 0 when the source image has alpha) and records
+where the crop sits in the untrimmed frame, so it is still drawn in the same
+place. Animations get tables next to the usual per-frame sizes:
+
+  static const int PISTOL_SHOOTY_frame_widths[4] = { ... };        (trimmed)
+  static const int PISTOL_SHOOTY_frame_heights[4] = { ... };
+  static const int PISTOL_SHOOTY_frame_x_offsets[4] = { ... };
+  static const int PISTOL_SHOOTY_frame_y_offsets[4] = { ... };
+  static const int PISTOL_SHOOTY_frame_full_widths[4] = { ... };   (untrimmed)
+  static const int PISTOL_SHOOTY_frame_full_heights[4] = { ... };
+
+and single images NAME_X_OFFSET / NAME_Y_OFFSET / NAME_FULL_WIDTH /
+NAME_FULL_HEIGHT defines. texture_header.py returns them as
+array['trim'] = [x, y, full_width, full_height].
+
+convert_texture.py and the texture editor trim while exporting (--trim); this
+script trims headers that already exist, rewriting them in the texture
+editor's layout:
+
+Usage:
+  python sprite_trim.py ../textures/pistol_shooty.h ../textures/BOSSA1_DIE.h --out trimmed [--format hex]
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from c_array_writer import HEADER_FORMATS, array_close, array_open, c_int_list, fit_format, write_c_values
+from frame_dedup import frame_alias_lines
+from texture_header import FRAME_NAME_RE, FRAME_SEQUENCE_SUFFIX, TRIM_DEFINES, TRIM_TABLES, HeaderScan
+
+TRANSPARENT_KEY = (1, 0, 0)
+
+
+def visible_mask(data, width, height, alpha=None):
+    """(height, width) bool array of the pixels that are not background.
+
+    Background is alpha 0 when alpha (one byte per pixel) is given, else the key color.
+    """
+    if alpha is not None:
+        return np.frombuffer(alpha, np.uint8).reshape(height, width) > 0
+    pixels = np.frombuffer(data, np.uint8).reshape(height, width, 3)
+    return np.any(pixels != np.array(TRANSPARENT_KEY, np.uint8), axis=2)
+
+
+def trim_box(data, width, height, alpha=None):
+    """(x, y, width, height) of the visible pixels; a fully transparent frame keeps its top-left pixel."""
+    mask = visible_mask(data, width, height, alpha)
+    rows = mask.any(axis=1)
+    cols = mask.any(axis=0)
+    if not rows.any():
+        return 0, 0, 1, 1
+    top = int(np.argmax(rows))
+    bottom = height - int(np.argmax(rows[::-1]))
+    left = int(np.argmax(cols))
+    right = width - int(np.argmax(cols[::-1]))
+    return left, top, right - left, bottom - top
+
+
+def crop(data, width, box, channels=3):
+    """Cut box (x, y, width, height) out of packed pixel rows."""
+    x, y, w, h = box
+    pixels = np.frombuffer(data, np.uint8).reshape(-1, width, channels)
+    return np.ascontiguousarray(pixels[y:y + h, x:x + w]).tobytes()
+
+
+def trim_array(array, alpha=None):
+    """Return a trimmed copy of an array dict, with 'trim' relative to the untrimmed frame.
+
+    Trimming an already trimmed array keeps its original full size, and
+    indexed arrays keep their indices and palette.
+    """
+    width, height = array['width'], array['height']
+    box = trim_box(array['data'], width, height, alpha)
+    old_x, old_y, full_width, full_height = array.get('trim') or (0, 0, width, height)
+    trimmed = {'name': array['name'], 'width': box[2], 'height': box[3],
+               'data': crop(array['data'], width, box),
+               'trim': [old_x + box[0], old_y + box[1], full_width, full_height]}
+    if 'indices' in array:
+        trimmed['indices'] = crop(array['indices'], width, box, channels=1)
+        trimmed['palette'] = array['palette']
+    return trimmed
+
+
+def trim_define_lines(ident, trim):
+    """#define lines for a trimmed single image"""
+    return [f"#define {ident}_{suffix} {value}" for suffix, value in zip(TRIM_DEFINES, trim)]
+
+
+def trim_table_lines(prefix, trims):
+    """Offset / full size tables for the trimmed frames of an animation"""
+    return [f"static const int {prefix}_frame_{suffix}[{len(trims)}] = {{ {c_int_list(t[i] for t in trims)} }};"
+            for i, suffix in enumerate(TRIM_TABLES)]
+
+
+def trim_header(path, output_path, fmt='decimal'):
+    """Rewrite one RGB header (a single image or one animation) with trimmed arrays.
+
+    Returns (bytes before, bytes after) of pixel data.
+    """
+    scan = HeaderScan()
+    with open(path, 'r') as f:
+        # Repeats (PREFIX_frame_sequence) are rewritten as aliases, not arrays
+        arrays = [array for array in scan.iter_arrays(f, os.path.basename(path)) if 'alias' not in array]
+    if not arrays:
+        raise ValueError("no texture arrays")
+    if any(array.get('indexed') for array in arrays):
+        raise ValueError("indexed header; re-export it with --trim instead")
+    matches = [FRAME_NAME_RE.fullmatch(array['name']) for array in arrays]
+    prefixes = {m.group(1) for m in matches if m}
+    if len(arrays) > 1 and (None in matches or len(prefixes) != 1):
+        raise ValueError("only headers with one image or one animation can be trimmed")
+
+    trimmed = [trim_array(array) for array in arrays]
+    guard = os.path.splitext(os.path.basename(output_path))[0].upper()
+    before = sum(len(a['data']) for a in arrays)
+    after = sum(len(a['data']) for a in trimmed)
+
+    with open(output_path, 'w') as f:
+        f.write(f"#ifndef {guard}_H\n#define {guard}_H\n\n")
+        if not prefixes:
+            array = trimmed[0]
+            ident = array['name'].upper()
+            lines = [f"#define {ident}_WIDTH {array['width']}", f"#define {ident}_HEIGHT {array['height']}"]
+            f.write("\n".join(lines + trim_define_lines(ident, array['trim'])) + "\n\n")
+            array_fmt = fit_format(fmt, len(array['data']))
+            f.write(array_open(f"const unsigned char {array['name']}", len(array['data']), array_fmt) + "\n")
+            write_c_values(f, array['data'], values_per_line=48, indent="  ", fmt=array_fmt)
+            f.write(f"\n{array_close(array_fmt)}\n\n#endif // {guard}_H\n")
+            return before, after
+
+        prefix = prefixes.pop()
+        numbers = [int(m.group(2)) for m in matches]
+        sequence = scan.int_arrays.get(f"{prefix}{FRAME_SEQUENCE_SUFFIX}") or sorted(numbers)
+        by_number = dict(zip(numbers, trimmed))
+        positions = [by_number[n] for n in sequence]
+
+        # Carry over the header's other defines and tables; sizes are rewritten
+        rewritten = {f"{prefix}_frame_{suffix}" for suffix in ('widths', 'heights') + TRIM_TABLES}
+        for name, value in scan.defines.items():
+            if not name.endswith(('_WIDTH', '_HEIGHT', '_X_OFFSET', '_Y_OFFSET')):
+                f.write(f"#define {name} {value}\n")
+        f.write("\n")
+        f.write(f"static const int {prefix}_frame_widths[{len(positions)}] = "
+                f"{{ {c_int_list(a['width'] for a in positions)} }};\n")
+        f.write(f"static const int {prefix}_frame_heights[{len(positions)}] = "
+                f"{{ {c_int_list(a['height'] for a in positions)} }};\n")
+        f.write("\n".join(trim_table_lines(prefix, [a['trim'] for a in positions])) + "\n\n")
+
+        for number, array in sorted(by_number.items()):
+            f.write(f"// Frame {number}: {array['width']}x{array['height']} at "
+                    f"{array['trim'][0]},{array['trim'][1]} of {array['trim'][2]}x{array['trim'][3]}\n")
+            array_fmt = fit_format(fmt, len(array['data']))
+            f.write(array_open(f"static const unsigned char {array['name']}", len(array['data']), array_fmt) + "\n")
+            write_c_values(f, array['data'], values_per_line=36, indent="    ", fmt=array_fmt)
+            f.write(f"\n{array_close(array_fmt)}\n\n")
+
+        frame_names = ",\n".join(f"    {prefix}_frame_{n}" for n in sequence)
+        f.write(f"static const unsigned char* {prefix}_frames[] = {{\n{frame_names}\n}};\n")
+        for name, values in scan.int_arrays.items():
+            if name not in rewritten:
+                f.write(f"static const int {name}[] = {{{c_int_list(values)}}};\n")
+        if f"{prefix}{FRAME_SEQUENCE_SUFFIX}" in scan.int_arrays:
+            f.write("\n".join(frame_alias_lines(prefix, sequence)) + "\n")
+        f.write(f"#endif // {guard}_H\n")
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim existing sprite headers to their visible pixels")
+    parser.add_argument('headers', nargs='+', help="Headers holding one image or one animation")
+    parser.add_argument('--out', help="Output directory (default: rewrite the headers in place)")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal', help="Header value format")
+    args = parser.parse_args()
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    total_before = total_after = 0
+    for path in args.headers:
+        output_path = os.path.join(args.out, os.path.basename(path)) if args.out else path
+        try:
+            before, after = trim_header(path, output_path, args.format)
+        except (OSError, ValueError) as e:
+            print(f"SKIP  {path}: {e}")
+            continue
+        total_before += before
+        total_after += after
+        print(f"{path}: {before:,} -> {after:,} bytes ({100 - 100 * after / before:.1f}% saved) -> {output_path}")
+    if total_before:
+        print(f"Total: {total_before:,} -> {total_after:,} bytes ({100 - 100 * total_after / total_before:.1f}% saved)")
+
+
+if __name__ == '__main__':
+    main()
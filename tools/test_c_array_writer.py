@@ -0,0 +1,43 @@
+# String literal headers must stay under MSVC's 65,535 byte literal limit.
+# Run with: python -m pytest tools
+from c_array_writer import STRING_LITERAL_MAX, array_close, array_open, c_values_text, fit_format
+from extract_bmp_to_raw import generate_c_header
+from texture_header import parse_header_text
+
+
+def string_header(name, data):
+    fmt = fit_format('string', len(data))
+    return (f"#define {name}_WIDTH {len(data) // 3}\n#define {name}_HEIGHT 1\n"
+            f"{array_open(f'const unsigned char {name}', len(data), fmt)}\n"
+            f"{c_values_text(data, fmt=fmt)}\n{array_close(fmt)}\n")
+
+
+def test_fit_format_cap():
+    assert fit_format('string', STRING_LITERAL_MAX - 1) == 'string'
+    assert fit_format('string', STRING_LITERAL_MAX) == 'decimal'
+    assert fit_format('hex', 10 ** 6) == 'hex'
+    assert fit_format('decimal', 10) == 'decimal'
+
+
+def test_largest_literal_round_trips():
+    data = bytes(i % 256 for i in range((STRING_LITERAL_MAX - 1) // 3 * 3))
+    text = string_header('BIG', data)
+    assert f'BIG[{len(data)}] =' in text
+    assert bytes(parse_header_text(text)[0]['data']) == data
+
+
+def test_skybox_face_falls_back_to_braces():
+    data = bytes(i * 7 % 256 for i in range(256 * 256 * 3))
+    text = generate_c_header(data, 256, 256, 'SKY_FRONT', fmt='string')
+    assert '"' not in text
+    assert 'SKY_FRONT[] = {' in text
+    array = parse_header_text(text)[0]
+    assert (array['width'], array['height']) == (256, 256)
+    assert bytes(array['data']) == data
+
+
+def test_empty_string_array_is_valid_c():
+    text = "\n".join([array_open('const unsigned char EMPTY', 0, 'string'), c_values_text(b'', fmt='string'),
+                      array_close('string')])
+    assert ' '.join(text.split()) == 'const unsigned char EMPTY[0] = "" ;'
+    assert c_values_text(b'', fmt='decimal') == ''
@@ -0,0 +1,52 @@
+# The binary sidecar of an indexed header must hold the colors the header's
+# indices expand to.  Run with: python -m pytest tools
+import json
+import os
+import random
+
+from PIL import Image
+
+from convert_texture import BATCH_MANIFEST, convert_batch, image_to_c_header
+from texture_header import parse_header_file
+from texture_sidecar import read_sidecar, sidecar_path
+
+
+def noise_png(path, size=64, seed=1):
+    """More distinct colors than a palette holds, so quantizing changes them."""
+    rng = random.Random(seed)
+    Image.frombytes('RGB', (size, size), bytes(rng.randrange(256) for _ in range(size * size * 3))).save(path)
+
+
+def header_rgb(header):
+    """RGB the header itself expands to (its text, not its sidecar)."""
+    with open(header, 'r') as f:
+        return bytes(parse_header_file(f, header)[0]['data'])
+
+
+def test_indexed_sidecar_holds_quantized_colors(tmp_path):
+    png = str(tmp_path / 'noise.png')
+    noise_png(png)
+    header = image_to_c_header(png, str(tmp_path / 'NOISE.h'), sidecar=True, sidecar_manifest=False, indexed=True)
+    sidecar_data = bytes(read_sidecar(sidecar_path(header))[0]['data'])
+    assert sidecar_data == header_rgb(header)
+    with Image.open(png) as img:
+        assert sidecar_data != img.tobytes()
+
+
+def test_batch_regenerates_old_indexed_sidecars(tmp_path):
+    source, out = tmp_path / 'src', tmp_path / 'out'
+    os.makedirs(source / 'walls')
+    noise_png(str(source / 'walls' / 'A.png'), seed=2)
+    noise_png(str(source / 'walls' / 'B.png'), seed=3)
+    assert convert_batch(str(source), str(out), max_workers=1, sidecar=True, indexed=True) == (2, 0)
+    for name in ('A', 'B'):
+        header = str(out / f'{name}.h')
+        assert bytes(read_sidecar(sidecar_path(header))[0]['data']) == header_rgb(header)
+
+    # A manifest from before the fix: its unchanged sources are converted once more
+    manifest_path = out / BATCH_MANIFEST
+    manifest = json.loads(manifest_path.read_text())
+    manifest['version'] = 1
+    manifest_path.write_text(json.dumps(manifest))
+    assert convert_batch(str(source), str(out), max_workers=1, sidecar=True, indexed=True) == (2, 0)
+    assert convert_batch(str(source), str(out), max_workers=1, sidecar=True, indexed=True) == (0, 2)
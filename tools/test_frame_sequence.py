@@ -0,0 +1,66 @@
+# Repeated animation frames stored once (PREFIX_frame_sequence) must still load
+# as a full frame list.  Run with: python -m pytest tools
+import io
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from c_array_writer import c_int_list
+from frame_dedup import dedupe_frames, frame_alias_lines
+from texture_header import HeaderScan, parse_header_file, parse_header_text
+
+RED = bytes([200, 0, 0] * 4)
+BLUE = bytes([0, 0, 200] * 4)
+FRAMES = [RED, BLUE, RED, BLUE]
+
+
+def animated_header():
+    """A 2x2 animation written the way texture_editor_pro.py exports repeats."""
+    sequence, _ = dedupe_frames([{'width': 2, 'height': 2, 'data': data} for data in FRAMES])
+    lines = ["#define ANIM_FRAME_COUNT 4", "static const int ANIM_frame_widths[4] = { 2, 2, 2, 2 };",
+             "static const int ANIM_frame_heights[4] = { 2, 2, 2, 2 };"]
+    for i, data in enumerate(FRAMES):
+        if sequence[i] == i:
+            lines.append(f"static const unsigned char ANIM_frame_{i}[] = {{ {c_int_list(data)} }};")
+    lines.append("static const unsigned char* ANIM_frames[] = { "
+                 + ", ".join(f"ANIM_frame_{i}" for i in sequence) + " };")
+    lines.append(f"static const int ANIM_frame_sequence[4] = {{ {c_int_list(sequence)} }};")
+    lines += frame_alias_lines('ANIM', sequence)
+    return "\n".join(lines) + "\n"
+
+
+def test_alias_defines_cover_dropped_frames():
+    text = animated_header()
+    assert "#define ANIM_frame_2 ANIM_frame_0" in text
+    assert "#define ANIM_frame_3 ANIM_frame_1" in text
+    assert "unsigned char ANIM_frame_2[]" not in text
+
+
+def test_parse_header_text_resolves_sequence():
+    arrays = {a['name']: a for a in parse_header_text(animated_header())}
+    assert sorted(arrays) == [f"ANIM_frame_{i}" for i in range(4)]
+    for i, data in enumerate(FRAMES):
+        assert bytes(arrays[f"ANIM_frame_{i}"]['data']) == data
+    assert arrays['ANIM_frame_2']['alias'] == 'ANIM_frame_0'
+    assert arrays['ANIM_frame_2']['data'] is arrays['ANIM_frame_0']['data']
+
+
+def test_requested_repeat_decodes_its_stored_frame():
+    arrays = parse_header_file(io.StringIO(animated_header()), var_names={'ANIM_frame_3'})
+    assert [a['name'] for a in arrays] == ['ANIM_frame_3']
+    assert bytes(arrays[0]['data']) == BLUE
+
+
+def test_editor_loader_shares_one_surface_per_frame():
+    from oracular_editor import TextureRegistry
+
+    text = animated_header()
+    registry = TextureRegistry(lambda filename: parse_header_text(text),
+                               lambda filename: list(HeaderScan().iter_arrays(io.StringIO(text), decode=False)))
+    keys = registry.find_frames('anim.h', [f"ANIM_frame_{i}" for i in range(4)])
+    assert len(keys) == 4
+    surfaces = [registry.get(key) for key in keys]
+    assert None not in surfaces
+    assert surfaces[2] is surfaces[0] and surfaces[3] is surfaces[1]
+    assert surfaces[0] is not surfaces[1]
+    assert registry.bytes_used == 2 * 2 * 2 * surfaces[0].get_bytesize()
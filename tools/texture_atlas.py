@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Texture atlas builder.
+
+Packs every array of a group of texture headers onto a few power-of-two sheets
+with a skyline (bottom-left) packer, so the editor can keep one surface per
+sheet instead of one per wall texture or sprite frame. Each group is written
+twice to the output directory (textures/atlas by default):
+
+  <group>_atlas.h   the sheets as char arrays (GROUP_ATLAS_0 ...), a rect
+                    table GROUP_atlas_rects[] = { sheet, x, y, w, h, ... },
+                    a UV table GROUP_atlas_uvs[] = { u0, v0, u1, v1, ... } and
+                    a GROUP_ATLAS_<ARRAY> index define per texture
+  <group>.atlas     the same as a binary blob (little endian):
+                      '<4sHHH'          magic b'TXAT', version, sheet count, rect count
+                      '<HH'             per sheet: width, height
+                      '<32s32sHHHHH'    per rect: header file, array name, sheet, x, y, w, h
+                      ...               RGB data of every sheet, in order
+                    Version 3, written when a packed array is trimmed
+                    (sprite_trim.py) or resampled (convert_texture.py --pow2),
+                    adds '<hhHHHH' to each rect: x / y offset and full width /
+                    height of the untrimmed frame, then the original width /
+                    height (zeros when unused). Version 2 had only the trim.
+
+Rects are listed per header in the header's own array order. The unused area
+of a sheet is filled with the transparent key color (1, 0, 0).
+
+Usage:
+  python texture_atlas.py [--group walls --group sprites] [--out DIR] [--max-size 1024]
+  python texture_atlas.py --name doors ../textures/DOOR1.h ../textures/DOOR2.h
+"""
+
+import argparse
+import os
+import struct
+import time
+
+from c_array_writer import HEADER_FORMATS, array_close, array_open, c_int_list, fit_format, write_c_values
+from frame_dedup import dedupe_frames
+from texture_header import parse_header_batch
+
+ATLAS_MAGIC = b'TXAT'
+ATLAS_VERSION = 1
+ATLAS_EXTENDED_VERSION = 3
+ATLAS_HEADER = struct.Struct('<4sHHH')
+ATLAS_SHEET = struct.Struct('<HH')
+ATLAS_RECT = struct.Struct('<32s32sHHHHH')
+ATLAS_RECTS = {
+    ATLAS_VERSION: ATLAS_RECT,
+    2: struct.Struct('<32s32sHHHHHhhHH'),
+    ATLAS_EXTENDED_VERSION: struct.Struct('<32s32sHHHHHhhHHHH'),
+}
+# Optional per-array records carried from the headers onto their rects
+RECT_EXTRAS = ('trim', 'original_size')
+ATLAS_EXT = '.atlas'
+
+TEXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures")
+ATLAS_DIR = os.path.join(TEXTURE_DIR, "atlas")
+
+# Header groups packed by default (the textures the editor draws)
+ATLAS_GROUPS = {
+    'walls': ["T_00.h", "T_01.h", "T_02.h", "T_03.h", "T_04.h", "T_05.h", "T_06.h",
+              "WALL57_2.h", "WALL57_3.h", "WALL57_4.h", "WALL58.h"],
+    'sprites': ["BOSSA1.h", "BOSSA2_walk.h", "BOSSA3_walk.h", "cace_stat.h",
+                "health.h", "armour.h", "bl_key.h"],
+}
+
+TRANSPARENT_KEY = b'\x01\x00\x00'
+MIN_SHEET_SIZE = 16
+
+
+def pack_skyline(sizes, sheet_width, sheet_height):
+    """Place (width, height) rects on one sheet, bottom-left first along a skyline.
+
+    Returns ({index: (x, y)}, [indices that did not fit]). Rects are tried
+    tallest first; each goes where its top edge ends up lowest.
+    """
+    skyline = [[0, 0, sheet_width]]  # segments [x, y, width], left to right
+    placed = {}
+    left = []
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    for index in order:
+        width, height = sizes[index]
+        best = None
+        for start, (x, _, _) in enumerate(skyline):
+            if x + width > sheet_width:
+                break
+            # Rest on the highest segment under the span
+            y = 0
+            span_end = x + width
+            i = start
+            while i < len(skyline) and skyline[i][0] < span_end:
+                y = max(y, skyline[i][1])
+                i += 1
+            if y + height > sheet_height:
+                continue
+            if best is None or (y + height, x) < (best[1] + height, best[0]):
+                best = (x, y, start)
+        if best is None:
+            left.append(index)
+            continue
+
+        x, y, start = best
+        placed[index] = (x, y)
+        # Replace the covered part of the skyline with the new top edge
+        span_end = x + width
+        new = [x, y + height, width]
+        i = start
+        while i < len(skyline) and skyline[i][0] < span_end:
+            seg_x, seg_y, seg_w = skyline[i]
+            if seg_x + seg_w > span_end:
+                skyline[i] = [span_end, seg_y, seg_x + seg_w - span_end]
+                break
+            del skyline[i]
+        skyline.insert(start, new)
+        # Merge neighbours of equal height
+        merged = [skyline[0]]
+        for seg in skyline[1:]:
+            if seg[1] == merged[-1][1]:
+                merged[-1][2] += seg[2]
+            else:
+                merged.append(seg)
+        skyline = merged
+    return placed, left
+
+
+def sheet_sizes(area, max_size):
+    """Power-of-two (width, height) pairs with at least this area, smallest first (width >= height)."""
+    sizes = []
+    width = MIN_SHEET_SIZE
+    while width <= max_size:
+        height = max(MIN_SHEET_SIZE, width // 2)
+        while height <= width:
+            if width * height >= area:
+                sizes.append((width, height))
+            height *= 2
+        width *= 2
+    return sorted(sizes, key=lambda s: (s[0] * s[1], s[0])) or [(max_size, max_size)]
+
+
+def pack_sheets(sizes, max_size=1024, padding=0):
+    """Pack rects onto as few sheets as needed, each the smallest power of two that fits.
+
+    Returns [{'width', 'height', 'positions': {index: (x, y)}}].
+    """
+    padded = [(w + padding, h + padding) for w, h in sizes]
+    for (w, h), (pw, ph) in zip(sizes, padded):
+        if pw > max_size or ph > max_size:
+            raise ValueError(f"A {w}x{h} texture does not fit on a {max_size}x{max_size} sheet")
+
+    sheets = []
+    remaining = list(range(len(sizes)))
+    while remaining:
+        area = sum(padded[i][0] * padded[i][1] for i in remaining)
+        subset = [padded[i] for i in remaining]
+        for width, height in sheet_sizes(area, max_size):
+            placed, left = pack_skyline(subset, width, height)
+            if not left:
+                break
+        sheets.append({'width': width, 'height': height,
+                       'positions': {remaining[i]: pos for i, pos in placed.items()}})
+        remaining = [remaining[i] for i in sorted(left)]
+    return sheets
+
+
+def build_atlas(headers, texture_dir=TEXTURE_DIR, max_size=1024, padding=0, max_workers=None):
+    """Pack every array of these headers. Returns {'sheets': [...], 'rects': [...]}.
+
+    Sheets are {'width', 'height', 'data'}; rects are {'file', 'name', 'sheet',
+    'x', 'y', 'width', 'height'} in header order.
+    """
+    results = parse_header_batch([(os.path.join(texture_dir, name), None) for name in headers], max_workers)
+    arrays = []
+    seen = set()
+    for filename, header_arrays in zip(headers, results):
+        if header_arrays is None:
+            print(f"Skipping {filename}: missing or unreadable")
+            continue
+        for array in header_arrays:
+            if array['name'] in seen:
+                print(f"Skipping {filename}:{array['name']}: name already packed")
+                continue
+            seen.add(array['name'])
+            arrays.append((filename, array))
+
+    # Identical frames (T_04 is also WALL58_frame_0) are packed once and share a rect
+    sequence, saved = dedupe_frames([a for _, a in arrays])
+    unique = [index for index, first in enumerate(sequence) if first == index]
+    if saved:
+        print(f"{len(arrays) - len(unique)} duplicate frame(s) share a rect ({saved:,} bytes saved)")
+
+    packed = pack_sheets([(arrays[i][1]['width'], arrays[i][1]['height']) for i in unique], max_size, padding)
+    sheets = []
+    rects = [None] * len(arrays)
+    for sheet_index, sheet in enumerate(packed):
+        width, height = sheet['width'], sheet['height']
+        data = bytearray(TRANSPARENT_KEY * (width * height))
+        for packed_index, (x, y) in sheet['positions'].items():
+            index = unique[packed_index]
+            filename, array = arrays[index]
+            w, h = array['width'], array['height']
+            pixels = array['data']
+            row_bytes = w * 3
+            for row in range(h):
+                start = ((y + row) * width + x) * 3
+                data[start:start + row_bytes] = pixels[row * row_bytes:(row + 1) * row_bytes]
+            rects[index] = {'file': filename, 'name': array['name'], 'sheet': sheet_index,
+                            'x': x, 'y': y, 'width': w, 'height': h}
+            rects[index].update({k: list(array[k]) for k in RECT_EXTRAS if array.get(k)})
+        sheets.append({'width': width, 'height': height, 'data': bytes(data)})
+    for index, first in enumerate(sequence):
+        if first != index and rects[first] is not None:
+            filename, array = arrays[index]
+            rects[index] = {k: v for k, v in rects[first].items() if k not in RECT_EXTRAS}
+            rects[index].update({'file': filename, 'name': array['name']})
+            rects[index].update({k: list(array[k]) for k in RECT_EXTRAS if array.get(k)})
+    return {'sheets': sheets, 'rects': rects}
+
+
+def write_atlas_header(path, group, atlas, fmt='decimal'):
+    """Write the atlas as a C header (sheets, rect table, UV table, index defines)."""
+    prefix = group.upper()
+    guard = f"{prefix}_ATLAS_H"
+    sheets, rects = atlas['sheets'], atlas['rects']
+    with open(path, 'w') as f:
+        f.write(f"// Texture atlas '{group}': {len(rects)} textures on {len(sheets)} sheet(s), "
+                f"generated by texture_atlas.py\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n")
+        f.write(f"#define {prefix}_ATLAS_SHEET_COUNT {len(sheets)}\n")
+        f.write(f"#define {prefix}_ATLAS_RECT_COUNT {len(rects)}\n")
+        for index, sheet in enumerate(sheets):
+            f.write(f"#define {prefix}_ATLAS_{index}_WIDTH {sheet['width']}\n")
+            f.write(f"#define {prefix}_ATLAS_{index}_HEIGHT {sheet['height']}\n")
+        f.write("\n// Index of each texture in the tables below\n")
+        for index, rect in enumerate(rects):
+            f.write(f"#define {prefix}_ATLAS_{rect['name'].upper()} {index}\n")
+
+        f.write("\n// sheet, x, y, width, height per texture\n")
+        f.write(f"static const int {group}_atlas_rects[{len(rects) * 5}] = {{\n")
+        f.write(",\n".join("    " + c_int_list([r['sheet'], r['x'], r['y'], r['width'], r['height']])
+                           for r in rects))
+        f.write("\n};\n\n// u0, v0, u1, v1 per texture\n")
+        f.write(f"static const float {group}_atlas_uvs[{len(rects) * 4}] = {{\n")
+        uv_lines = []
+        for r in rects:
+            sheet = sheets[r['sheet']]
+            uv_lines.append("    " + ", ".join(f"{v:.6f}f" for v in (
+                r['x'] / sheet['width'], r['y'] / sheet['height'],
+                (r['x'] + r['width']) / sheet['width'], (r['y'] + r['height']) / sheet['height'])))
+        f.write(",\n".join(uv_lines))
+        f.write("\n};\n")
+
+        for index, sheet in enumerate(sheets):
+            sheet_fmt = fit_format(fmt, len(sheet['data']))
+            decl = f"static const unsigned char {prefix}_ATLAS_{index}"
+            f.write(f"\n{array_open(decl, len(sheet['data']), sheet_fmt)}\n")
+            write_c_values(f, sheet['data'], values_per_line=48, indent="  ", fmt=sheet_fmt)
+            f.write(f"\n{array_close(sheet_fmt)}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def write_atlas_blob(path, atlas):
+    """Write the atlas as a binary blob (see the module docstring for the layout)."""
+    sheets, rects = atlas['sheets'], atlas['rects']
+    extended = any(r.get(k) for r in rects for k in RECT_EXTRAS)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_EXTENDED_VERSION if extended else ATLAS_VERSION,
+                                  len(sheets), len(rects)))
+        f.write(b''.join(ATLAS_SHEET.pack(s['width'], s['height']) for s in sheets))
+        for r in rects:
+            fields = (r['file'].encode('ascii'), r['name'].encode('ascii'),
+                      r['sheet'], r['x'], r['y'], r['width'], r['height'])
+            if extended:
+                extras = list(r.get('trim') or (0, 0, 0, 0)) + list(r.get('original_size') or (0, 0))
+                f.write(ATLAS_RECTS[ATLAS_EXTENDED_VERSION].pack(*fields, *extras))
+            else:
+                f.write(ATLAS_RECT.pack(*fields))
+        for sheet in sheets:
+            f.write(sheet['data'])
+    os.replace(tmp_path, path)
+
+
+def _read_tables(f, path):
+    magic, version, sheet_count, rect_count = ATLAS_HEADER.unpack(f.read(ATLAS_HEADER.size))
+    if magic != ATLAS_MAGIC:
+        raise ValueError(f"{path} is not a texture atlas")
+    rect_struct = ATLAS_RECTS.get(version)
+    if rect_struct is None:
+        raise ValueError(f"{path}: unsupported atlas version {version}")
+    sheets = []
+    for _ in range(sheet_count):
+        width, height = ATLAS_SHEET.unpack(f.read(ATLAS_SHEET.size))
+        sheets.append({'width': width, 'height': height})
+    rects = []
+    for _ in range(rect_count):
+        filename, name, sheet, x, y, width, height, *extras = rect_struct.unpack(f.read(rect_struct.size))
+        trim, original_size = extras[:4], extras[4:]
+        rect = {'file': filename.rstrip(b'\x00').decode('ascii'),
+                'name': name.rstrip(b'\x00').decode('ascii'),
+                'sheet': sheet, 'x': x, 'y': y, 'width': width, 'height': height}
+        if trim and trim[2]:
+            rect['trim'] = trim
+        if original_size and original_size[0]:
+            rect['original_size'] = original_size
+        rects.append(rect)
+    return {'sheets': sheets, 'rects': rects}
+
+
+def read_atlas_info(path):
+    """Read the sheet sizes and rect table of an atlas blob without the pixel data."""
+    with open(path, 'rb') as f:
+        return _read_tables(f, path)
+
+
+def read_atlas(path):
+    """Read an atlas blob. Returns {'sheets': [{'width', 'height', 'data'}], 'rects': [...]}."""
+    with open(path, 'rb') as f:
+        atlas = _read_tables(f, path)
+        for sheet in atlas['sheets']:
+            size = sheet['width'] * sheet['height'] * 3
+            sheet['data'] = f.read(size)
+            if len(sheet['data']) != size:
+                raise ValueError(f"{path}: truncated sheet data")
+    return atlas
+
+
+def find_atlases(atlas_dir=ATLAS_DIR):
+    """Paths of the atlas blobs in atlas_dir (none if it doesn't exist)."""
+    if not os.path.isdir(atlas_dir):
+        return []
+    return [os.path.join(atlas_dir, name) for name in sorted(os.listdir(atlas_dir)) if name.endswith(ATLAS_EXT)]
+
+
+def stale_atlas_files(path, atlas, texture_dir=TEXTURE_DIR):
+    """Header files of the atlas that were modified after it was built."""
+    atlas_mtime = os.stat(path).st_mtime_ns
+    stale = set()
+    for filename in {r['file'] for r in atlas['rects']}:
+        try:
+            if os.stat(os.path.join(texture_dir, filename)).st_mtime_ns > atlas_mtime:
+                stale.add(filename)
+        except OSError:
+            pass  # source gone: the atlas copy is all there is
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack texture headers into power-of-two atlas sheets")
+    parser.add_argument('headers', nargs='*', help="Headers to pack as one custom group (needs --name)")
+    parser.add_argument('--group', action='append', choices=sorted(ATLAS_GROUPS),
+                        help="Predefined group to pack (repeatable; default: all)")
+    parser.add_argument('--name', help="Group name for the headers given on the command line")
+    parser.add_argument('--out', default=ATLAS_DIR, help="Output directory (default: textures/atlas)")
+    parser.add_argument('--max-size', type=int, default=1024, help="Largest sheet edge in pixels (power of two)")
+    parser.add_argument('--padding', type=int, default=0,
+                        help="Pixels left between textures (only needed for filtered sampling)")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal', help="Header value format")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for header parsing")
+    args = parser.parse_args()
+
+    if args.headers:
+        if not args.name:
+            parser.error("--name is required when headers are given")
+        texture_dir = os.path.dirname(os.path.abspath(args.headers[0]))
+        groups = {args.name: [os.path.relpath(os.path.abspath(h), texture_dir) for h in args.headers]}
+    else:
+        texture_dir = TEXTURE_DIR
+        groups = {name: ATLAS_GROUPS[name] for name in (args.group or sorted(ATLAS_GROUPS))}
+
+    os.makedirs(args.out, exist_ok=True)
+    for group, headers in groups.items():
+        start = time.perf_counter()
+        atlas = build_atlas(headers, texture_dir, args.max_size, args.padding, args.jobs)
+        write_atlas_header(os.path.join(args.out, f"{group}_atlas.h"), group, atlas, args.format)
+        write_atlas_blob(os.path.join(args.out, group + ATLAS_EXT), atlas)
+        used = sum(r['width'] * r['height'] for r in atlas['rects'])
+        total = sum(s['width'] * s['height'] for s in atlas['sheets'])
+        sizes = ", ".join(f"{s['width']}x{s['height']}" for s in atlas['sheets'])
+        print(f"{group}: {len(atlas['rects'])} textures from {len(headers)} header(s) on "
+              f"{len(atlas['sheets'])} sheet(s) [{sizes}], {used / total * 100 if total else 0:.1f}% used, "
+              f"{time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
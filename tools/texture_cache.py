@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache of decoded texture headers.
+
+Parsing textures/*.h means running regexes over megabytes of comma separated
+decimal text on every editor launch. This cache stores the decoded RGB bytes of
+every array as a raw blob, plus a small JSON manifest per header:
+
+  <cache_dir>/<path key>.json          manifest: path, mtime, size, sha256, arrays
+  <cache_dir>/<sha256>.<array>.rgb     raw RGB blob (width * height * 3 bytes), or
+                                       width * height palette indices for indexed
+                                       arrays (the palette is kept in the manifest);
+                                       repeated frames (PREFIX_frame_sequence)
+                                       map the blob of the frame they alias
+
+A manifest is reused when the header's mtime and size still match. If they
+changed but the content hash is identical (e.g. after a fresh checkout) the
+manifest is refreshed and the blobs are reused; otherwise the header is parsed
+again and the stale blobs are removed. Warm loads mmap the blobs instead of
+copying them.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+
+from texture_header import expand_indexed, parse_header_arrays, parse_header_batch
+
+CACHE_VERSION = 1
+# Optional per-array records (sprite_trim.py offsets, pre-resample size) kept in the manifest
+ARRAY_EXTRAS = ('trim', 'original_size')
+
+
+def default_cache_dir():
+    """Cache directory next to the tools scripts."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".texture_cache")
+
+
+class TextureCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+
+    def _manifest_path(self, path):
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _blob_path(self, digest, name):
+        return os.path.join(self.cache_dir, f"{digest}.{name}.rgb")
+
+    def _read_manifest(self, manifest_path):
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != CACHE_VERSION:
+            return None
+        return manifest
+
+    def _write_manifest(self, manifest_path, manifest):
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    def _blobs_present(self, manifest):
+        return all(os.path.exists(self._blob_path(manifest['sha256'], a.get('alias', a['name'])))
+                   for a in manifest['arrays'])
+
+    def _map_blob(self, digest, name, size):
+        if size == 0:
+            return b''
+        with open(self._blob_path(digest, name), 'rb') as f:
+            return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    def lookup(self, path):
+        """Return the cached array dicts for a header, or None if it must be parsed again.
+
+        On a hit the 'data' of each array is a read-only mmap of the cached blob.
+        """
+        st = os.stat(path)
+        manifest_path = self._manifest_path(path)
+        manifest = self._read_manifest(manifest_path)
+        if manifest is None:
+            return None
+
+        if manifest['mtime_ns'] != st.st_mtime_ns or manifest['size'] != st.st_size:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if manifest['sha256'] != digest:
+                return None
+            # Same content, only the stat changed: keep the blobs
+            manifest['mtime_ns'] = st.st_mtime_ns
+            manifest['size'] = st.st_size
+            self._write_manifest(manifest_path, manifest)
+
+        if not self._blobs_present(manifest):
+            return None
+        self.hits += 1
+        return self._map_manifest(manifest)
+
+    def store(self, path, arrays):
+        """Write freshly parsed array dicts for a header and return them mapped from the cache."""
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        manifest_path = self._manifest_path(path)
+        stale = self._read_manifest(manifest_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        for array in arrays:
+            if 'alias' in array:
+                continue  # shares the blob of the frame it repeats
+            blob_path = self._blob_path(digest, array['name'])
+            tmp_path = blob_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(array['indices'] if 'indices' in array else array['data'])
+            os.replace(tmp_path, blob_path)
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(path),
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha256': digest,
+            'arrays': [self._manifest_entry(a) for a in arrays]
+        }
+        self._write_manifest(manifest_path, manifest)
+        if stale is not None and stale['sha256'] != digest:
+            self._remove_blobs(stale)
+        self.misses += 1
+        return self._map_manifest(manifest)
+
+    def load(self, path):
+        """Return the array dicts for a header, parsing and caching it on a miss."""
+        arrays = self.lookup(path)
+        if arrays is None:
+            arrays = self.store(path, parse_header_arrays(path))
+        return arrays
+
+    def info(self, path):
+        """Return [{'name', 'width', 'height'}] (plus any ARRAY_EXTRAS) from a still-valid manifest, or None."""
+        st = os.stat(path)
+        manifest = self._read_manifest(self._manifest_path(path))
+        if (manifest is None or manifest['mtime_ns'] != st.st_mtime_ns
+                or manifest['size'] != st.st_size):
+            return None
+        return [{k: e[k] for k in ('name', 'width', 'height') + ARRAY_EXTRAS if k in e} for e in manifest['arrays']]
+
+    def _manifest_entry(self, array):
+        entry = {'name': array['name'], 'width': array['width'], 'height': array['height']}
+        if 'indices' in array:
+            entry['palette'] = bytes(array['palette']).hex()
+        entry.update({k: list(array[k]) for k in ARRAY_EXTRAS if array.get(k)})
+        if 'alias' in array:
+            entry['alias'] = array['alias']
+        return entry
+
+    def _map_manifest(self, manifest):
+        arrays = []
+        by_name = {}
+        for entry in manifest['arrays']:
+            array = {'name': entry['name'], 'width': entry['width'], 'height': entry['height']}
+            array.update({k: entry[k] for k in ARRAY_EXTRAS if k in entry})
+            source = by_name.get(entry.get('alias'))
+            if source is not None:
+                array['alias'] = entry['alias']
+                array.update({k: source[k] for k in ('indices', 'palette', 'data') if k in source})
+            elif 'palette' in entry:
+                # Indexed: the blob holds one index per pixel, expanded here
+                size = entry['width'] * entry['height']
+                array['indices'] = bytes(self._map_blob(manifest['sha256'], entry['name'], size))
+                array['palette'] = bytes.fromhex(entry['palette'])
+                array['data'] = expand_indexed(array['indices'], array['palette'])
+            else:
+                size = entry['width'] * entry['height'] * 3
+                array['data'] = self._map_blob(manifest['sha256'], entry['name'], size)
+            by_name[entry['name']] = array
+            arrays.append(array)
+        return arrays
+
+    def _remove_blobs(self, manifest):
+        for entry in manifest['arrays']:
+            if 'alias' in entry:
+                continue
+            try:
+                os.remove(self._blob_path(manifest['sha256'], entry['name']))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached manifest and blob. Returns the number of files removed."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for entry in os.listdir(self.cache_dir):
+            if entry.endswith(('.json', '.rgb', '.tmp')):
+                os.remove(os.path.join(self.cache_dir, entry))
+                removed += 1
+        return removed
+
+    def prewarm(self, texture_dir, max_workers=None):
+        """Parse every stale header in texture_dir into the cache. Returns the number of headers."""
+        paths = [os.path.join(texture_dir, entry) for entry in sorted(os.listdir(texture_dir))
+                 if entry.endswith('.h')]
+        stale = [path for path in paths if self.lookup(path) is None]
+        for path, arrays in zip(stale, parse_header_batch([(path, None) for path in stale], max_workers)):
+            if arrays is not None:
+                self.store(path, arrays)
+        return len(paths)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shade lookup tables (Doom style COLORMAPs) for wall lighting.
+Building the tables requires NumPy: pip install numpy (reading and applying
+them does not).
+
+Walls carry a shade in level.h (0..90, light removed on a 0..255 scale). Rather
+than multiplying every texel at draw time, the shade picks one of N light
+levels (32 by default) and each texel goes through one table lookup:
+
+  level = COLORMAP_LEVEL(shade)                        (shade * levels) >> 8
+  RGB textures:     value = colormap_rgb[level * 256 + value]    per channel,
+                    value * (levels - level) / levels
+  indexed textures: index = colormap_walls[level * 256 + index]  one COLORMAP
+                    per palette group: each entry darkened by the same factor
+                    and matched back to the nearest color of the palette
+
+The transparent key (1, 0, 0) of a palette maps to itself at every level. The
+tables are written to the output directory (textures/colormap by default) as:
+
+  <name>.h          COLORMAP_LEVELS, COLORMAP_LEVEL(shade) and the tables
+  <name>.colormap   the same as a binary blob (little endian):
+                      '<4sHHH'   magic b'TXCM', version, light levels, table count
+                      '<32sH'    per table: name ('rgb' or the palette group),
+                                 palette entries (0 for the RGB table)
+                      ...        per table: its palette (entries * 3 bytes), then
+                                 levels * 256 bytes of lookups
+
+The editor's 3D preview shades walls with the blob when it exists.
+
+Usage:
+  python texture_colormap.py [headers ...] [--levels 32] [--out DIR] [--name colormap] [--format hex]
+"""
+
+import argparse
+import os
+import struct
+import time
+
+from c_array_writer import HEADER_FORMATS, array_close, array_open, fit_format, write_c_values
+from texture_header import PALETTE_SUFFIX, HeaderScan
+
+COLORMAP_MAGIC = b'TXCM'
+COLORMAP_VERSION = 1
+COLORMAP_HEADER = struct.Struct('<4sHHH')
+COLORMAP_TABLE = struct.Struct('<32sH')
+COLORMAP_EXT = '.colormap'
+DEFAULT_LEVELS = 32
+RGB_TABLE = 'rgb'
+
+TEXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures")
+COLORMAP_DIR = os.path.join(TEXTURE_DIR, "colormap")
+COLORMAP_PATH = os.path.join(COLORMAP_DIR, "colormap" + COLORMAP_EXT)
+
+TRANSPARENT_KEY = b'\x01\x00\x00'
+
+
+def shade_level(shade, levels=DEFAULT_LEVELS):
+    """Light level (0 = full bright) of a wall shade; the same integer math as COLORMAP_LEVEL."""
+    return min(levels - 1, max(0, int(shade)) * levels >> 8)
+
+
+def build_rgb_table(levels=DEFAULT_LEVELS):
+    """levels * 256 bytes: every channel value darkened to each light level."""
+    import numpy as np
+    scale = levels - np.arange(levels, dtype=np.int32)
+    return (np.arange(256, dtype=np.int32)[None, :] * scale[:, None] // levels).astype(np.uint8).tobytes()
+
+
+def build_palette_colormap(palette, levels=DEFAULT_LEVELS):
+    """levels * entries palette indices: each entry darkened to each light level, matched to the palette."""
+    import numpy as np
+    from texture_palette import quantize
+    entries = np.frombuffer(palette, np.uint8).reshape(-1, 3).astype(np.int32)
+    scale = levels - np.arange(levels, dtype=np.int32)
+    shaded = (entries[None, :, :] * scale[:, None, None] // levels).astype(np.uint8)
+    colormap = np.frombuffer(quantize(shaded.tobytes(), palette), np.uint8).reshape(levels, len(entries)).copy()
+    is_key = np.all(entries == np.frombuffer(TRANSPARENT_KEY, np.uint8), axis=1)
+    colormap[:, is_key] = np.nonzero(is_key)[0]  # transparent stays transparent
+    return colormap.tobytes()
+
+
+def find_palettes(paths):
+    """{group: palette bytes} of the indexed headers among paths (the first palette of each group wins)."""
+    palettes = {}
+    for path in paths:
+        scan = HeaderScan()
+        with open(path, 'r') as f:
+            # Only the palette is decoded; var_names matches no texture array
+            for _ in scan.iter_arrays(f, os.path.basename(path), var_names={PALETTE_SUFFIX}):
+                pass
+        if scan.palette is not None and scan.palette_name is not None:
+            palettes.setdefault(scan.palette_name[:-len(PALETTE_SUFFIX)], scan.palette)
+    return palettes
+
+
+def build_colormaps(palettes, levels=DEFAULT_LEVELS):
+    """The RGB table followed by one COLORMAP per palette: [{'name', 'palette', 'colormap'}]."""
+    tables = [{'name': RGB_TABLE, 'palette': b'', 'colormap': build_rgb_table(levels)}]
+    for group, palette in sorted(palettes.items()):
+        tables.append({'name': group, 'palette': palette, 'colormap': build_palette_colormap(palette, levels)})
+    return tables
+
+
+def write_colormap_header(path, name, tables, levels, fmt='decimal'):
+    """Write the tables as a C header with the light level defines."""
+    prefix = name.upper()
+    guard = f"{prefix}_H"
+    with open(path, 'w') as f:
+        f.write(f"// Shade tables '{name}': {levels} light levels, generated by texture_colormap.py\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n")
+        f.write(f"#define {prefix}_LEVELS {levels}\n")
+        f.write("// Light level of a wall shade (level.h, light removed on a 0..255 scale); 0 is full bright\n")
+        f.write(f"#define {prefix}_LEVEL(shade) ((shade) * {prefix}_LEVELS >> 8)\n")
+        for table in tables:
+            table_fmt = fit_format(fmt, len(table['colormap']))
+            if table['palette']:
+                f.write(f"\n// '{table['name']}' palette group: index = {name}_{table['name']}"
+                        f"[level * {len(table['palette']) // 3} + index]\n")
+            else:
+                f.write(f"\n// RGB textures: value = {name}_{table['name']}[level * 256 + value], per channel\n")
+            f.write(array_open(f"static const unsigned char {name}_{table['name']}", len(table['colormap']),
+                               table_fmt) + "\n")
+            write_c_values(f, table['colormap'], values_per_line=32, indent="  ", fmt=table_fmt)
+            f.write(f"\n{array_close(table_fmt)}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def write_colormap_blob(path, tables, levels):
+    """Write the tables as a binary blob (see the module docstring for the layout)."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(COLORMAP_HEADER.pack(COLORMAP_MAGIC, COLORMAP_VERSION, levels, len(tables)))
+        f.write(b''.join(COLORMAP_TABLE.pack(t['name'].encode('ascii'), len(t['palette']) // 3) for t in tables))
+        for table in tables:
+            f.write(table['palette'])
+            f.write(table['colormap'])
+    os.replace(tmp_path, path)
+
+
+def read_colormap(path):
+    """Read a colormap blob. Returns {'levels', 'tables': [{'name', 'palette', 'colormap'}]}."""
+    with open(path, 'rb') as f:
+        magic, version, levels, count = COLORMAP_HEADER.unpack(f.read(COLORMAP_HEADER.size))
+        if magic != COLORMAP_MAGIC:
+            raise ValueError(f"{path} is not a colormap")
+        if version != COLORMAP_VERSION:
+            raise ValueError(f"{path}: unsupported colormap version {version}")
+        entries = [COLORMAP_TABLE.unpack(f.read(COLORMAP_TABLE.size)) for _ in range(count)]
+        tables = []
+        for name, palette_size in entries:
+            palette = f.read(palette_size * 3)
+            size = levels * (palette_size or 256)
+            colormap = f.read(size)
+            if len(palette) != palette_size * 3 or len(colormap) != size:
+                raise ValueError(f"{path}: truncated table data")
+            tables.append({'name': name.rstrip(b'\x00').decode('ascii'), 'palette': palette, 'colormap': colormap})
+    return {'levels': levels, 'tables': tables}
+
+
+def shade_rgb(data, colormaps, level):
+    """RGB bytes at a light level, through the RGB table."""
+    rgb = next(t for t in colormaps['tables'] if not t['palette'])['colormap']
+    return bytes(data).translate(rgb[level * 256:(level + 1) * 256])
+
+
+def shade_palette(palette, colormaps, level):
+    """A palette at a light level: its group COLORMAP when one was built for it, else the RGB table."""
+    for table in colormaps['tables']:
+        if table['palette'] == palette:
+            entries = len(palette) // 3
+            row = table['colormap'][level * entries:(level + 1) * entries]
+            return b''.join(palette[i * 3:i * 3 + 3] for i in row)
+    return shade_rgb(palette, colormaps, level)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Doom style shade tables for wall lighting")
+    parser.add_argument('headers', nargs='*',
+                        help="Headers whose palettes get a COLORMAP (default: every header in textures/)")
+    parser.add_argument('--levels', type=int, default=DEFAULT_LEVELS, help="Light levels (2..256)")
+    parser.add_argument('--out', default=COLORMAP_DIR, help="Output directory (default: textures/colormap)")
+    parser.add_argument('--name', default='colormap', help="Output file and C identifier prefix")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal', help="Header value format")
+    args = parser.parse_args()
+    if not 2 <= args.levels <= 256:
+        parser.error("--levels must be between 2 and 256")
+
+    paths = args.headers or [os.path.join(TEXTURE_DIR, name) for name in sorted(os.listdir(TEXTURE_DIR))
+                             if name.endswith('.h')]
+    start = time.perf_counter()
+    tables = build_colormaps(find_palettes(paths), args.levels)
+    os.makedirs(args.out, exist_ok=True)
+    write_colormap_header(os.path.join(args.out, f"{args.name}.h"), args.name, tables, args.levels, args.format)
+    write_colormap_blob(os.path.join(args.out, args.name + COLORMAP_EXT), tables, args.levels)
+    groups = ", ".join(t['name'] for t in tables if t['palette']) or "none"
+    print(f"{args.name}: {args.levels} light levels, RGB table + {len(tables) - 1} palette COLORMAP(s) "
+          f"[{groups}] from {len(paths)} header(s), {time.perf_counter() - start:.2f} s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
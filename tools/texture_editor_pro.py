@@ -13,6 +13,9 @@ import os
 import struct
 import copy
 
+from c_array_writer import HEADER_FORMATS, array_close, array_open, c_int_list, fit_format, write_c_values
+from frame_dedup import dedupe_frames, frame_alias_lines
+
 class ToolTip:
     def __init__(self, widget, text):
         self.widget = widget
@@ -126,7 +129,7 @@ class UndoManager:
 
 
 class ModernTextureEditor:
-    def __init__(self, root):
+    def __init__(self, root, export_format='decimal', export_indexed=False, export_trim=False):
         self.root = root
         self.root.title("DoomClone Texture Editor")
         self.root.geometry("1400x900")
@@ -169,6 +172,13 @@ class ModernTextureEditor:
         self.tiling_preview = False
         self.onion_skin = False
         
+        # Header export format (decimal / hex / string literal)
+        self.export_format = tk.StringVar(value=export_format)
+        # Indexed export: one palette per exported file group plus 1 byte per pixel
+        self.export_indexed = tk.BooleanVar(value=export_indexed)
+        # Trimmed export: frames cropped to their non-key pixels plus draw offsets
+        self.export_trim = tk.BooleanVar(value=export_trim)
+        
         # Drawing state
         self.is_drawing = False
         self.last_x = None
@@ -623,6 +633,25 @@ class ModernTextureEditor:
         self.duration_entry.insert(0, "100")
         self.duration_entry.bind('<KeyRelease>', self.update_duration)
 
+        # Header export format
+        format_frame = tk.Frame(parent, bg=self.colors['bg_medium'])
+        format_frame.pack(fill=tk.X, padx=10, pady=(20, 0))
+        
+        tk.Label(format_frame, text="Header Format", font=('Segoe UI', 9, 'bold'),
+                bg=self.colors['bg_medium'], fg=self.colors['text']).pack(anchor=tk.W, pady=(0, 5))
+        
+        format_menu = tk.OptionMenu(format_frame, self.export_format, *HEADER_FORMATS)
+        format_menu.config(bg=self.colors['bg_light'], fg=self.colors['text'], font=('Segoe UI', 9),
+                           relief=tk.FLAT, highlightthickness=0, activebackground=self.colors['accent'])
+        format_menu.pack(fill=tk.X)
+        
+        tk.Checkbutton(format_frame, text="Indexed (8-bit palette)", variable=self.export_indexed,
+                       bg=self.colors['bg_medium'], fg=self.colors['text'], selectcolor=self.colors['bg_light'],
+                       font=('Segoe UI', 9), cursor='hand2').pack(anchor=tk.W, pady=(5, 0))
+        tk.Checkbutton(format_frame, text="Trim transparent borders", variable=self.export_trim,
+                       bg=self.colors['bg_medium'], fg=self.colors['text'], selectcolor=self.colors['bg_light'],
+                       font=('Segoe UI', 9), cursor='hand2').pack(anchor=tk.W)
+
         # Effects Section
         effects_frame = tk.Frame(parent, bg=self.colors['bg_medium'])
         effects_frame.pack(fill=tk.X, padx=10, pady=(20, 0))
@@ -961,7 +990,9 @@ class ModernTextureEditor:
         base_name = base_name.upper()
         
         try:
-            for i, frame_data in enumerate(self.frames):
+            palette = self.export_palette()
+            frames = self.export_frames()
+            for i, frame_data in enumerate(frames):
                 img = frame_data['image']
                 filename = os.path.join(directory, f"{base_name.lower()}_{i+1:03d}.h")
                 name = f"{base_name}_{i+1:03d}"
@@ -969,16 +1000,17 @@ class ModernTextureEditor:
                 with open(filename, 'w') as f:
                     f.write(f"#ifndef {name}_H\n")
                     f.write(f"#define {name}_H\n\n")
+                    self.write_palette(f, base_name.lower(), palette)
                     f.write(f"#define {name}_WIDTH {img.width}\n")
-                    f.write(f"#define {name}_HEIGHT {img.height}\n\n")
-                    f.write(f"static const unsigned char {name.lower()}[] = {{\n")
-                    self.write_image_data(f, img)
-                    f.write("};\n\n")
+                    f.write(f"#define {name}_HEIGHT {img.height}\n")
+                    self.write_trim_defines(f, name, frame_data)
+                    f.write(f"#define {name}_INDEXED 1\n\n" if palette else "\n")
+                    self.write_image_array(f, f"static const unsigned char {name.lower()}", img, palette)
                     f.write(f"#endif // {name}_H\n")
             
             messagebox.showinfo(
                 "Success",
-                f"Exported {len(self.frames)} header files to:\n{directory}"
+                f"Exported {len(self.frames)} header files to:\n{directory}" + self.trim_summary(frames)
             )
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export headers:\n{e}")
@@ -994,79 +1026,140 @@ class ModernTextureEditor:
             return
             
         name = os.path.splitext(os.path.basename(filename))[0].upper()
+        palette = self.export_palette()
+        frames = self.export_frames()
         
         with open(filename, 'w') as f:
             f.write(f"#ifndef {name}_H\n")
             f.write(f"#define {name}_H\n\n")
+            self.write_palette(f, name.lower(), palette)
             
-            if len(self.frames) > 1:
+            if len(frames) > 1:
                 # Animated - MODIFIED to support per-frame dimensions
-                f.write(f"#define {name}_FRAME_COUNT {len(self.frames)}\n")
-                f.write(f"#define {name}_ANIM_AVAILABLE 1\n\n")
+                f.write(f"#define {name}_FRAME_COUNT {len(frames)}\n")
+                f.write(f"#define {name}_ANIM_AVAILABLE 1\n")
+                f.write(f"#define {name}_INDEXED 1\n\n" if palette else "\n")
                 
                 # Write per-frame width and height arrays
-                f.write(f"static const int {name}_frame_widths[{len(self.frames)}] = {{ ")
-                for i, frame_data in enumerate(self.frames):
-                    f.write(str(frame_data['image'].width))
-                    if i < len(self.frames) - 1:
-                        f.write(", ")
-                f.write(" };\n")
-                
-                f.write(f"static const int {name}_frame_heights[{len(self.frames)}] = {{ ")
-                for i, frame_data in enumerate(self.frames):
-                    f.write(str(frame_data['image'].height))
-                    if i < len(self.frames) - 1:
-                        f.write(", ")
-                f.write(" };\n\n")
+                widths = c_int_list(frame_data['image'].width for frame_data in frames)
+                heights = c_int_list(frame_data['image'].height for frame_data in frames)
+                f.write(f"static const int {name}_frame_widths[{len(frames)}] = {{ {widths} }};\n")
+                f.write(f"static const int {name}_frame_heights[{len(frames)}] = {{ {heights} }};\n")
+                if 'trim' in frames[0]:
+                    from sprite_trim import trim_table_lines
+                    f.write("\n".join(trim_table_lines(name, [frame_data['trim'] for frame_data in frames])) + "\n")
+                f.write("\n")
                 
-                # Write frame data arrays
-                for i, frame_data in enumerate(self.frames):
+                # Write frame data arrays, each distinct frame once; repeats
+                # point at the first copy through the pointer table, and
+                # NAME_frame_i stays defined as an alias of that copy
+                sequence, saved = self.frame_sequence(frames)
+                if palette:
+                    saved //= 3  # stored as one index byte per pixel
+                for i, frame_data in enumerate(frames):
+                    if sequence[i] != i:
+                        continue
                     img = frame_data['image']
-                    f.write(f"// Frame {i}: {img.width}x{img.height}\n")
-                    f.write(f"static const unsigned char {name}_frame_{i}[] = {{\n")
-                    self.write_image_data(f, img)
-                    f.write("};\n\n")
-                    
-                f.write(f"static const unsigned char* {name}_frames[] = {{\n")
-                for i in range(len(self.frames)):
-                    f.write(f"    {name}_frame_{i}")
-                    if i < len(self.frames) - 1:
-                        f.write(",")
+                    f.write(f"// Frame {i}: {img.width}x{img.height}")
+                    if 'trim' in frame_data:
+                        x, y, full_width, full_height = frame_data['trim']
+                        f.write(f" at {x},{y} of {full_width}x{full_height}")
                     f.write("\n")
-                f.write("};\n\n")
+                    self.write_image_array(f, f"static const unsigned char {name}_frame_{i}", img, palette)
+                    
+                frame_names = ",\n".join(f"    {name}_frame_{i}" for i in sequence)
+                f.write(f"static const unsigned char* {name}_frames[] = {{\n{frame_names}\n}};\n")
+                if saved:
+                    f.write(f"static const int {name}_frame_sequence[{len(sequence)}] = {{ {c_int_list(sequence)} }};\n")
+                    f.write("\n".join(frame_alias_lines(name, sequence)) + "\n")
+                f.write("\n")
                 
-                f.write(f"static const int {name}_frame_durations[] = {{")
-                for i, frame_data in enumerate(self.frames):
-                    f.write(str(frame_data['duration']))
-                    if i < len(self.frames) - 1:
-                        f.write(", ")
-                f.write("};\n")
-                f.write(f"#define {name}_FRAME_MS {self.frames[0]['duration']}\n")
+                durations = c_int_list(frame_data['duration'] for frame_data in frames)
+                f.write(f"static const int {name}_frame_durations[] = {{{durations}}};\n")
+                f.write(f"#define {name}_FRAME_MS {frames[0]['duration']}\n")
             else:
                 # Static - single frame export
-                img = self.frames[0]['image']
+                img = frames[0]['image']
                 f.write(f"#define {name}_WIDTH {img.width}\n")
-                f.write(f"#define {name}_HEIGHT {img.height}\n\n")
-                f.write(f"static const unsigned char {name}[] = {{\n")
-                self.write_image_data(f, img)
-                f.write("};\n\n")
+                f.write(f"#define {name}_HEIGHT {img.height}\n")
+                self.write_trim_defines(f, name, frames[0])
+                f.write(f"#define {name}_INDEXED 1\n\n" if palette else "\n")
+                self.write_image_array(f, f"static const unsigned char {name}", img, palette)
                 
             f.write(f"#endif // {name}_H\n")
             
-        messagebox.showinfo("Success", f"Exported to:\n{filename}")
-        
-    def write_image_data(self, f, img):
-        """Write image RGB data to file"""
-        pixels = list(img.getdata())
-        for i, (r, g, b) in enumerate(pixels):
-            if i % 12 == 0:
-                f.write("    ")
-            f.write(f"{r:3d}, {g:3d}, {b:3d}")
-            if i < len(pixels) - 1:
-                f.write(", ")
-            if i % 12 == 11:
-                f.write("\n")
-        f.write("\n")
+        message = f"Exported to:\n{filename}"
+        if len(frames) > 1 and saved:
+            repeats = sum(1 for i, first in enumerate(sequence) if first != i)
+            message += f"\n\n{repeats} repeated frame(s) stored once ({saved:,} bytes saved)"
+        message += self.trim_summary(frames)
+        messagebox.showinfo("Success", message)
+        
+    def frame_sequence(self, frames):
+        """(sequence, bytes saved): sequence[i] is the first frame with frame i's content"""
+        return dedupe_frames([{'width': frame_data['image'].width, 'height': frame_data['image'].height,
+                               'data': self.image_rgb(frame_data['image'])} for frame_data in frames])
+        
+    def export_frames(self):
+        """The frames to export: as drawn, or cropped to their visible pixels with 'trim' offsets"""
+        if not self.export_trim.get():
+            return self.frames
+        from sprite_trim import trim_box
+        frames = []
+        for frame_data in self.frames:
+            img = frame_data['image']
+            x, y, w, h = trim_box(self.image_rgb(img), img.width, img.height)
+            frames.append(dict(frame_data, image=img.crop((x, y, x + w, y + h)),
+                               trim=[x, y, img.width, img.height]))
+        return frames
+        
+    def write_trim_defines(self, f, name, frame_data):
+        """Offset defines of a trimmed single image (nothing when not trimmed)"""
+        if 'trim' in frame_data:
+            from sprite_trim import trim_define_lines
+            f.write("\n".join(trim_define_lines(name, frame_data['trim'])) + "\n")
+        
+    def trim_summary(self, frames):
+        """Success message line for a trimmed export"""
+        if frames is self.frames:
+            return ""
+        full = sum(frame_data['image'].width * frame_data['image'].height for frame_data in self.frames)
+        kept = sum(frame_data['image'].width * frame_data['image'].height for frame_data in frames)
+        return f"\n\nTrimmed to {kept:,} of {full:,} pixels ({100 - 100 * kept / full:.1f}% saved)"
+        
+    def export_palette(self):
+        """Shared palette of all frames for an indexed export, or None for RGB"""
+        if not self.export_indexed.get():
+            return None
+        from texture_palette import build_palette
+        return build_palette([self.image_rgb(frame_data['image']) for frame_data in self.frames])
+        
+    def write_palette(self, f, group, palette):
+        """Write the group palette block of an indexed export (nothing for RGB)"""
+        if palette:
+            from texture_palette import write_palette_block
+            write_palette_block(f, group, palette, self.export_format.get(), values_per_line=36, indent="    ")
+        
+    def image_rgb(self, img):
+        return img.tobytes() if img.mode == 'RGB' else img.convert('RGB').tobytes()
+        
+    def write_image_array(self, f, decl, img, palette=None):
+        """Write one image as a complete C array in the selected export format"""
+        size = img.width * img.height * (1 if palette else 3)
+        fmt = fit_format(self.export_format.get(), size)
+        f.write(array_open(decl, size, fmt) + "\n")
+        self.write_image_data(f, img, fmt, palette)
+        f.write(array_close(fmt) + "\n\n")
+        
+    def write_image_data(self, f, img, fmt='decimal', palette=None):
+        """Write image RGB data (12 pixels per line), or palette indices (36 per line) with a palette"""
+        data = self.image_rgb(img)
+        if palette:
+            from texture_palette import quantize
+            data = quantize(data, palette)
+        write_c_values(f, data, values_per_line=36, indent="    ", padded=True, line_end=", \n", fmt=fmt)
+        # A full last row of decimals is followed by a blank line, as before
+        f.write("\n\n" if fmt == 'decimal' and len(data) % 36 == 0 else "\n")
         
     def add_frame(self):
         """Add a new frame"""
@@ -1471,6 +1564,16 @@ class ModernTextureEditor:
         messagebox.showinfo("Help & Shortcuts", help_text)
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="DoomClone texture editor")
+    parser.add_argument('--format', choices=HEADER_FORMATS, default='decimal',
+                        help="Initial C header export format")
+    parser.add_argument('--indexed', action='store_true',
+                        help="Start with indexed (8-bit palette) header export selected")
+    parser.add_argument('--trim', action='store_true',
+                        help="Start with trimmed header export (frames cropped to visible pixels) selected")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = ModernTextureEditor(root)
+    app = ModernTextureEditor(root, export_format=args.format, export_indexed=args.indexed, export_trim=args.trim)
     root.mainloop()
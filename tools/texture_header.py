@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Texture header parsing for the DoomClone tools.
+
+Reads the C texture headers in textures/ (the ones written by convert_texture.py
+and the texture editor) and returns the raw RGB bytes of every char array they
+define, without touching pygame. The editor and the texture cache build on this.
+When a header has an up to date binary sidecar (texture_sidecar.py) that is
+read instead.
+
+Each parsed array is a dict:
+  {'name': 'WALL58_frame_0', 'width': 64, 'height': 128, 'data': bytearray(...), 'count': 24576}
+where data is exactly width * height * 3 bytes (short arrays are zero padded,
+long ones truncated) and count is the number of values the initializer held.
+
+Headers are streamed in BLOCK_SIZE chunks: text outside arrays is matched
+against a small token regex, and array bodies are converted a chunk at a time
+straight into a preallocated bytearray, so peak memory stays close to the size
+of the decoded output instead of the size of the text.
+
+Array bodies may be decimal ({ 12, 34 }), hex ({ 0x0c, 0x22 }) or string
+literals (NAME[N] = "\014\042" ...;), the three forms c_array_writer.py emits.
+
+Trimmed sprites (sprite_trim.py) also carry where the crop sits in the
+untrimmed frame, as NAME_X_OFFSET / NAME_Y_OFFSET / NAME_FULL_WIDTH /
+NAME_FULL_HEIGHT defines or PREFIX_frame_x_offsets[] style tables; such
+arrays get 'trim': [x, y, full_width, full_height]. Textures resampled to a
+power-of-two size (convert_texture.py --pow2) record the size they were drawn
+at as NAME_ORIG_WIDTH / NAME_ORIG_HEIGHT, returned as 'original_size'.
+
+Indexed headers (texture_palette.py) hold a GROUP_palette char array and mark
+their arrays with NAME_INDEXED; those arrays are one palette index per pixel
+and are expanded to RGB here, with the raw 'indices' and 'palette' kept
+alongside 'data'.
+"""
+
+import codecs
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from texture_sidecar import fresh_sidecar, read_sidecar, read_sidecar_info
+
+BLOCK_SIZE = 64 * 1024
+
+# Tokens outside array bodies: comments (skipped), numeric #defines and the
+# opening of an int / char array initializer. An unterminated /* comment
+# matches open_comment so the scanner knows to read further.
+HEADER_TOKEN_RE = re.compile(r"""
+      //[^\n]*\n
+    | /\*.*?\*/
+    | (?P<open_comment>/\*)
+    | \#define[ \t]+(?P<define>\w+)[ \t]+(?P<value>\d+)\b
+    | (?P<ctype>(?:unsigned\s+)?char|int)\s+(?P<name>\w+)\s*(?:\[\w*\])?\s*=\s*(?:\{|(?P<string>"))
+""", re.DOTALL | re.VERBOSE)
+
+PALETTE_SUFFIX = '_palette'
+# Where a trimmed array sits in its untrimmed frame: NAME_<define> or PREFIX_frame_<table>[]
+TRIM_DEFINES = ('X_OFFSET', 'Y_OFFSET', 'FULL_WIDTH', 'FULL_HEIGHT')
+TRIM_TABLES = ('x_offsets', 'y_offsets', 'full_widths', 'full_heights')
+FRAME_SUFFIX_RE = re.compile(r'_frame_\d+$')
+# int PREFIX_frame_sequence[]: first frame with the same content, per frame (frame_dedup.py)
+FRAME_SEQUENCE_SUFFIX = '_frame_sequence'
+FRAME_NAME_RE = re.compile(r'(\w+)_frame_(\d+)')
+DIGITS_RE = re.compile(r'\b(?:0[xX][0-9a-fA-F]+|\d+)\b')
+SIGNED_DIGITS_RE = re.compile(r'-?(?:0[xX][0-9a-fA-F]+|\d+)')
+# Comments inside an array body; 'open' is one cut off at the end of a block
+BODY_COMMENT_RE = re.compile(r'//[^\n]*\n|/\*.*?\*/|(?P<open>//|/\*|/\Z)', re.DOTALL)
+# Pieces of a string literal initializer: a literal, the closing ';' or a comment
+STRING_PIECE_RE = re.compile(r'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"|(?P<end>;)|//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def parse_int_tokens(parts, clamp=False):
+    """Convert initializer tokens (the pieces between commas) to ints."""
+    try:
+        vals = list(map(int, parts))
+    except ValueError:
+        try:
+            # Hex initializers (0x0c, 0x22, ...); base 0 still rejects junk
+            vals = [int(part, 0) for part in parts]
+        except ValueError:
+            # Comments or other stray tokens inside the body: fall back to a digit scan
+            digits_re = SIGNED_DIGITS_RE if clamp else DIGITS_RE
+            vals = [int(num, 0) if num.lstrip('-')[1:2] in ('x', 'X') else int(num)
+                    for part in parts for num in digits_re.findall(part)]
+    if clamp:
+        vals = [0 if v < 0 else 255 if v > 255 else v for v in vals]
+    return vals
+
+
+def strip_comments(text, final=True):
+    """Blank out the comments in a piece of array body.
+
+    Returns (text, rest): unless final, a comment that is still open at the end
+    is cut off into rest so it can be retried once the next block is in.
+    """
+    pieces = []
+    last = 0
+    for match in BODY_COMMENT_RE.finditer(text):
+        pieces.append(text[last:match.start()])
+        if match.group('open') is not None:
+            return ' '.join(pieces), '' if final else text[match.start():]
+        last = match.end()
+    pieces.append(text[last:])
+    return ' '.join(pieces), ''
+
+
+def parse_int_body(body, limit=None):
+    """Convert the text between the braces of an initializer to a list of ints."""
+    if '/' in body:
+        body, _ = strip_comments(body)
+    parts = body.split(',')
+    if parts and not parts[-1].strip():
+        parts.pop()  # trailing comma
+    vals = parse_int_tokens(parts)
+    return vals[:limit] if limit is not None else vals
+
+
+class ArrayDecoder:
+    """Writes the values of one array body, fed in chunks, into a bytearray.
+
+    With a known size the output is preallocated (zero padded) and extra values
+    are dropped; otherwise it grows as values arrive.
+    """
+    def __init__(self, expected=None, clamp=False, skip=False):
+        self.expected = expected
+        self.clamp = clamp
+        self.skip = skip  # only count values, don't convert them
+        self.data = bytearray(expected) if expected is not None and not skip else bytearray()
+        self.count = 0
+        self.out_of_range = 0  # values outside 0..255, stored clamped
+        self._carry = ''
+
+    def feed(self, text, final=False):
+        text = self._carry + text
+        rest = ''
+        if '/' in text:
+            text, rest = strip_comments(text, final)
+        parts = text.split(',')
+        if final:
+            self._carry = ''
+            if parts and not parts[-1].strip():
+                parts.pop()  # trailing comma
+        else:
+            self._carry = parts.pop() + rest  # may be cut mid-number or mid-comment
+        if not parts:
+            return
+        if self.skip:
+            self.count += len(parts)
+            return
+
+        vals = parse_int_tokens(parts, self.clamp)
+        pos = self.count
+        self.count += len(vals)
+        if self.expected is not None:
+            vals = vals[:max(0, self.expected - pos)]
+        try:
+            self._store(pos, vals)
+        except ValueError:
+            # Rare: something outside a byte. Count it and keep going clamped.
+            self.out_of_range += sum(1 for v in vals if v < 0 or v > 255)
+            self._store(pos, [0 if v < 0 else 255 if v > 255 else v for v in vals])
+
+    def _store(self, pos, vals):
+        if self.expected is None:
+            self.data.extend(vals)
+        elif vals:
+            self.data[pos:pos + len(vals)] = vals
+
+
+class StringDecoder(ArrayDecoder):
+    """Decodes a string literal initializer ("\\014\\042" "..." ;) fed in chunks.
+
+    Only complete lines are decoded (a C literal cannot span lines); each
+    literal goes through codecs.escape_decode. feed returns the text after the
+    closing ';' once it has been reached, otherwise None.
+    """
+    def feed(self, text, final=False):
+        text = self._carry + text
+        limit = len(text) if final else text.rfind('\n') + 1
+        decoded = []
+        rest = '' if final else None
+        for match in STRING_PIECE_RE.finditer(text, 0, limit):
+            if match.group('end') is not None:
+                rest = text[match.end():]
+                break
+            literal = match.group(1)
+            if literal:
+                decoded.append(codecs.escape_decode(literal.encode('latin-1'))[0])
+        self._carry = text[limit:] if rest is None else ''
+        if decoded:
+            self._append(b''.join(decoded))
+        return rest
+
+    def _append(self, chunk):
+        pos = self.count
+        self.count += len(chunk)
+        if self.skip:
+            return
+        if self.expected is not None:
+            chunk = chunk[:max(0, self.expected - pos)]
+        self._store(pos, chunk)
+
+
+class HeaderScan:
+    """Tables built while streaming through a texture header.
+
+    defines:    {'WALL58_FRAME_WIDTH': 64, ...} (numeric #defines, first one wins)
+    int_arrays: {'BOSSA2_frame_widths': [41, 37, 38], ...}
+    missing_dimensions: ['BOSSA3_frame_3', ...] (char arrays with no known size)
+    """
+    def __init__(self):
+        self.defines = {}
+        self.int_arrays = {}
+        self.missing_dimensions = []  # char arrays skipped because no size was found
+        self.palette = None  # last GROUP_palette seen; indexed arrays after it use it
+        self.palette_name = None
+
+    def indexed(self, name):
+        """True if a char array holds palette indices (NAME_INDEXED, or BASE_INDEXED for frames)."""
+        base_name = FRAME_SUFFIX_RE.sub('', name)
+        return any(self.defines.get(f"{n}_INDEXED") for n in (name, name.upper(), base_name, base_name.upper()))
+
+    def trim(self, name):
+        """[x, y, full_width, full_height] of a trimmed array, or None if it was not trimmed."""
+        for n in (name, name.upper()):
+            values = [self.defines.get(f"{n}_{suffix}") for suffix in TRIM_DEFINES]
+            if None not in values:
+                return values
+        frame_match = FRAME_NAME_RE.fullmatch(name)
+        if frame_match:
+            prefix, idx = frame_match.group(1), int(frame_match.group(2))
+            tables = [self.int_arrays.get(f"{prefix}_frame_{suffix}") for suffix in TRIM_TABLES]
+            if all(table is not None and idx < len(table) for table in tables):
+                return [table[idx] for table in tables]
+        return None
+
+    def original_size(self, name):
+        """[width, height] a resampled array had before conversion (NAME_ORIG_WIDTH / _HEIGHT), or None."""
+        base_name = FRAME_SUFFIX_RE.sub('', name)
+        for n in (name, name.upper(), base_name, base_name.upper()):
+            width, height = self.defines.get(f"{n}_ORIG_WIDTH"), self.defines.get(f"{n}_ORIG_HEIGHT")
+            if width is not None and height is not None:
+                return [width, height]
+        return None
+
+    def dimensions(self, name):
+        """Find (width, height) for a char array, or (0, 0) if the header doesn't say."""
+        defines = self.defines
+        # convert_texture.py upper-cases the defines but not the array name
+        width = defines.get(f"{name}_WIDTH", defines.get(f"{name.upper()}_WIDTH"))
+        height = defines.get(f"{name}_HEIGHT", defines.get(f"{name.upper()}_HEIGHT"))
+
+        # NAME_frame_N falls back to BASE_FRAME_WIDTH, then BASE_WIDTH (animated textures)
+        base_name = FRAME_SUFFIX_RE.sub('', name)
+        if width is None:
+            width = defines.get(f"{base_name}_FRAME_WIDTH", defines.get(f"{base_name}_WIDTH"))
+        if height is None:
+            height = defines.get(f"{base_name}_FRAME_HEIGHT", defines.get(f"{base_name}_HEIGHT"))
+
+        if width is not None and height is not None:
+            return width, height
+
+        # Per-frame dimension tables: PREFIX_frame_widths[] / PREFIX_frame_heights[]
+        frame_match = FRAME_NAME_RE.match(name)
+        if frame_match:
+            prefix = frame_match.group(1)
+            idx = int(frame_match.group(2))
+            widths = self.int_arrays.get(f"{prefix}_frame_widths")
+            heights = self.int_arrays.get(f"{prefix}_frame_heights")
+            if widths is not None and heights is not None and idx < len(widths) and idx < len(heights):
+                return widths[idx], heights[idx]
+        return 0, 0
+
+    def iter_arrays(self, f, filename="<header>", var_names=None, decode=True, block_size=BLOCK_SIZE,
+                    unsized=False):
+        """Stream a header from a text file object, yielding one array dict per char array.
+
+        Arrays whose dimensions are only defined later in the file are decoded
+        into a growable buffer and yielded at the end. var_names limits decoding
+        to those arrays; decode=False only counts values (for info scans).
+        unsized=True also yields arrays with no dimensions at all (width and
+        height 0, data exactly as written), e.g. embedded image files.
+
+        Repeated animation frames stored once (PREFIX_frame_sequence, see
+        frame_dedup.py) are yielded last as their own PREFIX_frame_i entries,
+        sharing the data of the stored frame and naming it in 'alias'.
+        """
+        buf = ''
+        pos = 0
+        eof = False
+        deferred = []
+        frames = {}  # PREFIX_frame_N -> array dict, for PREFIX_frame_sequence aliases
+        # A requested frame may be a repeat of any other frame of its animation
+        frame_prefixes = {m.group(1) for m in map(FRAME_NAME_RE.fullmatch, var_names or ()) if m}
+
+        while True:
+            limit = len(buf) if eof else buf.rfind('\n', pos) + 1
+            match = HEADER_TOKEN_RE.search(buf, pos, limit) if limit > pos else None
+            if match is None or match.group('open_comment') is not None:
+                if eof:
+                    break
+                if match is not None:
+                    pos = match.start()  # re-scan the comment once more text is in
+                chunk = f.read(block_size)
+                buf = buf[pos:] + chunk
+                pos = 0
+                eof = not chunk
+                continue
+
+            pos = match.end()
+            define = match.group('define')
+            if define is not None:
+                self.defines.setdefault(define, int(match.group('value')))
+                continue
+            name = match.group('name')
+            if name is None:
+                continue  # comment
+
+            is_char = match.group('ctype') != 'int'
+            is_palette = is_char and name.endswith(PALETTE_SUFFIX)
+            width, height = self.dimensions(name) if is_char and not is_palette else (0, 0)
+            frame_match = FRAME_NAME_RE.fullmatch(name)
+            requested = not var_names or name in var_names
+            wanted = decode and is_char and (is_palette or requested
+                                             or (frame_match is not None and frame_match.group(1) in frame_prefixes))
+            channels = 1 if is_char and self.indexed(name) else 3
+            expected = width * height * channels if width and height else None
+            body_parts = []
+
+            if match.group('string') is not None:
+                # String literal body: runs up to the ';' after the last literal
+                decoder = StringDecoder(expected, skip=not wanted)
+                rest = decoder.feed(buf[match.start('string'):])
+                while rest is None:
+                    chunk = f.read(block_size)
+                    if not chunk:
+                        eof = True
+                        rest = decoder.feed('', final=True)
+                    else:
+                        rest = decoder.feed(chunk)
+                buf = rest
+                pos = 0
+            else:
+                if is_char:
+                    decoder = ArrayDecoder(expected, skip=not wanted)
+                # Consume the body up to the closing brace, block by block
+                while True:
+                    end = buf.find('}', pos)
+                    piece = buf[pos:] if end == -1 else buf[pos:end]
+                    if is_char:
+                        decoder.feed(piece, final=end != -1)
+                    else:
+                        body_parts.append(piece)
+                    if end != -1:
+                        pos = end + 1
+                        break
+                    buf = f.read(block_size)
+                    pos = 0
+                    if not buf:
+                        eof = True
+                        if is_char:
+                            decoder.feed('', final=True)
+                        break
+
+            if not is_char:
+                if body_parts:
+                    self.int_arrays[name] = parse_int_body(''.join(body_parts))
+            elif is_palette:
+                self.palette = bytes(decoder.data)
+                self.palette_name = name
+            elif expected is None:
+                deferred.append((name, decoder, wanted))
+            elif not decode or wanted:
+                array = self._array(name, width, height, decoder, wanted)
+                if frame_match:
+                    frames[name] = array
+                if not decode or requested:
+                    yield array
+
+        for name, decoder, wanted in deferred:
+            width, height = self.dimensions(name)
+            if width == 0 or height == 0:
+                if unsized:
+                    if not decode or wanted:
+                        yield self._array(name, 0, 0, decoder, wanted)
+                    continue
+                self.missing_dimensions.append(name)
+                if decode:
+                    print(f"Could not find dimensions for {name} in {filename}")
+                continue
+            if not decode or wanted:
+                data = decoder.data
+                if wanted:
+                    expected = width * height * (1 if self.indexed(name) else 3)
+                    data = data[:expected].ljust(expected, b'\x00')
+                decoder.data = data
+                array = self._array(name, width, height, decoder, wanted)
+                if FRAME_NAME_RE.fullmatch(name):
+                    frames[name] = array
+                if not decode or not var_names or name in var_names:
+                    yield array
+
+        yield from self._frame_aliases(frames, var_names if decode else None)
+
+    def _frame_aliases(self, frames, var_names):
+        """PREFIX_frame_i entries for the repeats listed in PREFIX_frame_sequence tables."""
+        for table, sequence in self.int_arrays.items():
+            if not table.endswith(FRAME_SEQUENCE_SUFFIX):
+                continue
+            prefix = table[:-len(FRAME_SEQUENCE_SUFFIX)]
+            for i, first in enumerate(sequence):
+                name = f"{prefix}_frame_{i}"
+                source = frames.get(f"{prefix}_frame_{first}")
+                if first == i or name in frames or source is None or (var_names and name not in var_names):
+                    continue
+                alias = dict(source, name=name, alias=source['name'])
+                alias.pop('trim', None)
+                trim = self.trim(name)
+                if trim:
+                    alias['trim'] = trim
+                yield alias
+
+    def _array(self, name, width, height, decoder, with_data):
+        array = {'name': name, 'width': width, 'height': height, 'count': decoder.count}
+        if decoder.out_of_range:
+            array['out_of_range'] = decoder.out_of_range
+        indexed = width and height and self.indexed(name)
+        if indexed:
+            array['indexed'] = True
+        trim = self.trim(name)
+        if trim:
+            array['trim'] = trim
+        original_size = self.original_size(name)
+        if original_size:
+            array['original_size'] = original_size
+        if with_data:
+            if indexed:
+                if self.palette is None:
+                    print(f"No palette for indexed array {name}, showing indices as gray")
+                palette = self.palette or bytes(i for i in range(256) for _ in range(3))
+                array['indices'] = bytes(decoder.data)
+                array['palette'] = palette
+                array['data'] = expand_indexed(array['indices'], palette)
+            else:
+                array['data'] = decoder.data
+        return array
+
+
+def expand_indexed(indices, palette):
+    """Expand one-byte palette indices to packed RGB (three bytes.translate passes, no per-pixel loop)."""
+    palette = bytes(palette[:768]).ljust(768, b'\x00')
+    data = bytearray(len(indices) * 3)
+    for channel in range(3):
+        data[channel::3] = indices.translate(palette[channel::3])
+    return data
+
+
+def parse_header_file(f, filename="<header>", var_names=None):
+    """Stream a header from an open text file and return a list of array dicts."""
+    return list(HeaderScan().iter_arrays(f, filename, var_names))
+
+
+def parse_header_text(data, filename="<header>"):
+    """Parse the text of a texture header and return a list of array dicts."""
+    return parse_header_file(io.StringIO(data), filename)
+
+
+def scan_header_info(path):
+    """List the arrays of a header as {'name', 'width', 'height', 'count'} without decoding pixel data.
+
+    Trimmed and resampled arrays also carry 'trim' / 'original_size'.
+    """
+    sidecar = fresh_sidecar(path)
+    if sidecar:
+        return read_sidecar_info(sidecar)
+    with open(path, 'r') as f:
+        return list(HeaderScan().iter_arrays(f, os.path.basename(path), decode=False))
+
+
+def parse_header_arrays(path, var_names=None):
+    """Parse a texture .h file and return a list of array dicts (only var_names, if given).
+
+    A binary sidecar (see texture_sidecar.py) that is not older than the header
+    is read instead of the text.
+    """
+    sidecar = fresh_sidecar(path)
+    if sidecar:
+        return read_sidecar(sidecar, var_names)
+    with open(path, 'r') as f:
+        return parse_header_file(f, os.path.basename(path), var_names)
+
+
+def read_raw_arrays(path):
+    """Return every char array of a header as {'name', 'width', 'height', 'data'}, sized or not.
+
+    Unsized arrays (e.g. a BMP file pasted into a header) keep all their bytes
+    and have width and height 0.
+    """
+    with open(path, 'r') as f:
+        return list(HeaderScan().iter_arrays(f, os.path.basename(path), unsized=True))
+
+
+def decode_c_array(f, clamp=True, block_size=BLOCK_SIZE):
+    """Decode a bare C array (values, optionally inside braces) from a text file object.
+
+    Used for pasted arrays without a declaration, e.g. by aa.py. Returns a
+    bytearray; with clamp, values outside 0..255 are clamped instead of raising.
+    """
+    decoder = ArrayDecoder(clamp=clamp)
+    text = f.read(block_size)
+    brace = text.find('{')
+    if brace != -1:
+        text = text[brace + 1:]
+    while text:
+        end = text.find('}')
+        if end != -1:
+            decoder.feed(text[:end], final=True)
+            return decoder.data
+        decoder.feed(text)
+        text = f.read(block_size)
+    decoder.feed('', final=True)
+    return decoder.data
+
+
+def _parse_job(job):
+    """Worker for parse_header_batch: parse one header, keeping only (and ordering by) var_names."""
+    path, var_names = job
+    if not os.path.exists(path):
+        return None
+    try:
+        arrays = parse_header_arrays(path)
+    except Exception as e:
+        print(f"Error parsing {path}: {e}")
+        return None
+    if var_names:
+        by_name = {a['name']: a for a in arrays}
+        arrays = [by_name[name] for name in var_names if name in by_name]
+    return arrays
+
+
+def parse_header_batch(jobs, max_workers=None, on_result=None):
+    """Parse a batch of headers across a process pool.
+
+    jobs is a list of (path, var_names) pairs; var_names may be None to keep
+    every array. Returns one entry per job, in job order: the list of array
+    dicts, or None if the file is missing or failed to parse. Pixel data comes
+    back from the workers as pickled bytes. on_result(index, arrays) is called
+    as each job finishes, in job order. Headers with a fresh sidecar are read
+    inline; only text headers go to the pool.
+    """
+    jobs = [(path, list(var_names) if var_names else None) for path, var_names in jobs]
+    text_jobs = [job for job in jobs if not fresh_sidecar(job[0])]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(text_jobs))
+
+    results = []
+    if max_workers <= 1:
+        for index, job in enumerate(jobs):
+            results.append(_parse_job(job))
+            if on_result:
+                on_result(index, results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {id(job): executor.submit(_parse_job, job) for job in text_jobs}
+        for index, job in enumerate(jobs):
+            future = futures.get(id(job))
+            results.append(future.result() if future else _parse_job(job))
+            if on_result:
+                on_result(index, results[-1])
+    return results
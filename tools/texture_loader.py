@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Background texture loading for the Oracular editor.
+
+BackgroundTextureLoader fetches a list of texture headers from the texture
+cache (or their binary sidecars) on a worker thread while the splash screen is up, and parses the misses
+across a process pool (texture_header.parse_header_batch). It only produces
+raw array dicts (name, width, height, data bytes); pygame Surfaces are created
+later on the main thread, so no pygame call ever happens off it.
+
+Each result is handed over once: get() removes it from the loader, so later
+reads of that file go through the cache again. Results not taken yet count
+in bytes_held, and release() drops them (oldest first) when the editor's
+TextureRegistry needs the memory.
+"""
+
+import os
+import threading
+
+from texture_header import parse_header_batch
+from texture_sidecar import fresh_sidecar, read_sidecar
+
+
+class BackgroundTextureLoader:
+    def __init__(self, texture_dir, filenames, texture_cache=None, max_workers=None):
+        self.texture_dir = texture_dir
+        self.filenames = list(filenames)
+        self.texture_cache = texture_cache
+        self.max_workers = max_workers
+        self._results = {}
+        self._errors = {}
+        self._taken = set()  # files handed over by get() or dropped by release()
+        self.bytes_held = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Start decoding on a daemon worker thread."""
+        self._thread = threading.Thread(target=self._run, name="texture-loader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _finish(self, filename, arrays=None, error=None):
+        with self._condition:
+            if error is not None:
+                self._errors[filename] = error
+            else:
+                self._results[filename] = arrays
+                self.bytes_held += arrays_size(arrays)
+            self._condition.notify_all()
+
+    def _run(self):
+        # Missing files, binary sidecars and cache hits are resolved right away;
+        # the rest are parsed across a process pool and written back to the cache.
+        pending = []
+        for filename in self.filenames:
+            path = os.path.join(self.texture_dir, filename)
+            try:
+                if not os.path.exists(path):
+                    self._finish(filename, [])
+                    continue
+                sidecar = fresh_sidecar(path)
+                if sidecar:
+                    self._finish(filename, read_sidecar(sidecar))
+                    continue
+                arrays = self.texture_cache.lookup(path) if self.texture_cache else None
+            except Exception as e:
+                self._finish(filename, error=e)
+                continue
+            if arrays is not None:
+                self._finish(filename, arrays)
+            else:
+                pending.append(filename)
+
+        def parsed(index, arrays):
+            filename = pending[index]
+            if arrays is None:
+                self._finish(filename, error=ValueError(f"could not parse {filename}"))
+                return
+            try:
+                if self.texture_cache:
+                    arrays = self.texture_cache.store(os.path.join(self.texture_dir, filename), arrays)
+                self._finish(filename, arrays)
+            except Exception as e:
+                self._finish(filename, error=e)
+
+        jobs = [(os.path.join(self.texture_dir, filename), None) for filename in pending]
+        try:
+            parse_header_batch(jobs, self.max_workers, on_result=parsed)
+        except Exception as e:
+            for filename in pending:
+                if filename not in self._results and filename not in self._errors and filename not in self._taken:
+                    self._finish(filename, error=e)
+
+    def progress(self):
+        """Return (files finished, total files)."""
+        with self._condition:
+            return len(self._results) + len(self._errors) + len(self._taken), len(self.filenames)
+
+    def is_done(self):
+        done, total = self.progress()
+        return done >= total
+
+    def wait(self):
+        """Block until every file has been processed."""
+        if self._thread:
+            self._thread.join()
+
+    def has(self, filename):
+        """True if the file is (or will be) waiting here, i.e. not handed over yet."""
+        with self._condition:
+            return filename in self.filenames and filename not in self._taken
+
+    def get(self, filename):
+        """Hand over the array dicts for a file, waiting for the worker if needed.
+
+        The loader keeps no reference afterwards. Re-raises the worker's
+        exception if that file failed to parse.
+        """
+        with self._condition:
+            if filename in self._taken:
+                raise KeyError(f"{filename} was already handed over")
+            while filename not in self._results and filename not in self._errors:
+                self._condition.wait()
+            self._taken.add(filename)
+            if filename in self._errors:
+                raise self._errors.pop(filename)
+            arrays = self._results.pop(filename)
+            self.bytes_held -= arrays_size(arrays)
+            return arrays
+
+    def release(self, max_bytes):
+        """Drop finished results, oldest first, until at most max_bytes are held. Returns bytes held."""
+        with self._condition:
+            for filename in list(self._results):
+                if self.bytes_held <= max_bytes:
+                    break
+                self._taken.add(filename)
+                self.bytes_held -= arrays_size(self._results.pop(filename))
+            return self.bytes_held
+
+
+def arrays_size(arrays):
+    """Bytes of pixel data (and palette indices) held by a list of array dicts."""
+    return sum(len(array['data']) + len(array.get('indices', b'')) for array in arrays if 'alias' not in array)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Palette quantizer for indexed (8-bit) texture headers.
+Requires NumPy: pip install numpy
+
+A texture group (one batch, one animation) shares a palette of up to 256
+colors and every texture in it is stored as one index byte per pixel, a third
+of the RGB size. Art that already uses 256 colors or fewer (most of ours, which
+is Doom style) gets an exact palette; anything else goes through a weighted
+median cut over its distinct colors. The transparent key color (1, 0, 0) is
+kept exact at index 0 whenever it occurs, so sprite transparency survives.
+
+Indexed headers carry the palette once, under an include guard, followed by
+the usual NAME_WIDTH / NAME_HEIGHT defines, a NAME_INDEXED define and the
+index array (texture_header.py expands them back to RGB):
+
+  #ifndef WALLS_PALETTE
+  #define WALLS_PALETTE
+  static const unsigned char walls_palette[768] = { ... };
+  #endif
+
+  #define T_00_WIDTH 128
+  #define T_00_HEIGHT 128
+  #define T_00_INDEXED 1
+  const unsigned char T_00[] = { ...16384 indices... };
+"""
+
+import numpy as np
+
+from c_array_writer import array_close, array_open, write_c_values
+
+PALETTE_SIZE = 256
+TRANSPARENT_KEY = (1, 0, 0)
+_KEY = (TRANSPARENT_KEY[0] << 16) | (TRANSPARENT_KEY[1] << 8) | TRANSPARENT_KEY[2]
+CHUNK = 4096  # distinct colors matched against the palette at a time
+
+
+def _pack(rgb):
+    """(N, 3) uint8 -> (N,) uint32 0xRRGGBB"""
+    rgb = rgb.astype(np.uint32)
+    return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+def _unpack(packed):
+    return np.stack(((packed >> 16) & 255, (packed >> 8) & 255, packed & 255), axis=1).astype(np.uint8)
+
+
+def _pixels(data):
+    return np.frombuffer(bytes(data) if isinstance(data, memoryview) else data, np.uint8).reshape(-1, 3)
+
+
+def median_cut(colors, weights, count):
+    """Reduce distinct colors ((N, 3) uint8, pixel counts as weights) to at most count colors.
+
+    Repeatedly splits the box with the widest channel range at its weighted
+    median along that channel; each box becomes its weighted mean color.
+    """
+    colors = colors.astype(np.int64)
+    weights = weights.astype(np.int64)
+    boxes = [np.arange(len(colors))]
+    spans = [np.ptp(colors, axis=0)]
+    while len(boxes) < count:
+        widest = [span.max() if len(box) > 1 else -1 for box, span in zip(boxes, spans)]
+        index = int(np.argmax(widest))
+        if widest[index] <= 0:
+            break  # every box is a single color
+        box = boxes[index]
+        channel = int(np.argmax(spans[index]))
+        order = box[np.argsort(colors[box, channel], kind='stable')]
+        cumulative = np.cumsum(weights[order])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(order) - 1)
+        low, high = order[:split], order[split:]
+        boxes[index:index + 1] = [low, high]
+        spans[index:index + 1] = [np.ptp(colors[low], axis=0), np.ptp(colors[high], axis=0)]
+
+    means = [(colors[box] * weights[box, None]).sum(axis=0) / weights[box].sum() for box in boxes]
+    return np.clip(np.rint(means), 0, 255).astype(np.uint8)
+
+
+def build_palette(images, count=PALETTE_SIZE):
+    """Build one palette for a group of RGB images (bytes-like, width * height * 3 each).
+
+    Returns count * 3 bytes (unused entries black). Exact when the group has
+    at most count distinct colors; the transparent key, if present, is entry 0.
+    """
+    packed = np.concatenate([_pack(_pixels(data)) for data in images]) if images else np.zeros(0, np.uint32)
+    distinct, weights = np.unique(packed, return_counts=True)
+    has_key = bool(np.any(distinct == _KEY))
+    if has_key:
+        keep = distinct != _KEY
+        distinct, weights = distinct[keep], weights[keep]
+
+    budget = count - (1 if has_key else 0)
+    if len(distinct) <= budget:
+        entries = _unpack(distinct)
+    else:
+        entries = median_cut(_unpack(distinct), weights, budget)
+    if has_key:
+        entries = np.vstack((np.array([TRANSPARENT_KEY], np.uint8), entries))
+
+    palette = np.zeros((count, 3), np.uint8)
+    palette[:len(entries)] = entries
+    return palette.tobytes()
+
+
+def quantize(data, palette):
+    """Map RGB bytes to palette indices (one byte per pixel) by nearest color.
+
+    Distinct colors are matched once each, in chunks; the transparent key only
+    ever maps to (and from) its own entry.
+    """
+    entries = np.frombuffer(palette, np.uint8).reshape(-1, 3).astype(np.int32)
+    packed = _pack(_pixels(data))
+    distinct, inverse = np.unique(packed, return_inverse=True)
+    colors = _unpack(distinct).astype(np.int32)
+
+    key_entries = _pack(entries.astype(np.uint8)) == _KEY
+    nearest = np.empty(len(distinct), np.uint8)
+    for start in range(0, len(distinct), CHUNK):
+        chunk = colors[start:start + CHUNK]
+        distance = ((chunk[:, None, :] - entries[None, :, :]) ** 2).sum(axis=2)
+        distance[:, key_entries] = np.iinfo(np.int32).max  # only the key itself maps to the key
+        nearest[start:start + CHUNK] = np.argmin(distance, axis=1)
+    is_key = distinct == _KEY
+    if is_key.any() and key_entries.any():
+        nearest[is_key] = np.argmax(key_entries)
+    return nearest[inverse].tobytes()
+
+
+def palette_identifier(group):
+    """C name of a group's palette array: 'walls' -> walls_palette (texture_header.py looks for the suffix)"""
+    return f"{group}_palette"
+
+
+def write_palette_block(f, group, palette, fmt='decimal', values_per_line=48, indent="  "):
+    """Write a group palette as a guarded C array, so headers of one group can be included together."""
+    guard = f"{group.upper()}_PALETTE"
+    f.write(f"#ifndef {guard}\n#define {guard}\n")
+    f.write(f"// Shared palette of the '{group}' texture group: {len(palette) // 3} RGB entries\n")
+    f.write(array_open(f"static const unsigned char {palette_identifier(group)}", len(palette), fmt) + "\n")
+    write_c_values(f, palette, values_per_line=values_per_line, indent=indent, fmt=fmt)
+    f.write(f"\n{array_close(fmt)}\n#endif\n\n")
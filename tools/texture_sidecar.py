@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Binary sidecars for texture headers.
+
+convert_texture.py --sidecar writes a raw twin of each header next to it
+(textures/T_00.h -> textures/T_00.rgb) so the Python tools can skip parsing
+decimal text altogether. Layout (little endian):
+
+  '<4sHH'     magic b'TXRB', version, array count
+  '<32sHHH'   per array: name, width, height, frame duration in ms (0 = static)
+  ...         RGB data of every array, in table order (width * height * 3 bytes each)
+
+Version 3, written only when an array is trimmed (sprite_trim.py) or was
+resampled to a power-of-two size (convert_texture.py --pow2), extends each
+table entry with '<hhHHHH': x / y offset and full width / height of the
+untrimmed frame (full width 0 = not trimmed), then the original width / height
+(0 = not resampled). Version 2 entries had only the trim fields.
+
+Every sidecar written in a directory is also listed in sidecars.json there
+(header name, arrays, size and the header's sha256).
+
+A sidecar is only used while it is at least as new as its header; editing the
+.h by hand makes the tools fall back to parsing the text.
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+SIDECAR_MAGIC = b'TXRB'
+SIDECAR_VERSION = 1
+SIDECAR_EXTENDED_VERSION = 3
+SIDECAR_HEADER = struct.Struct('<4sHH')
+SIDECAR_ENTRY = struct.Struct('<32sHHH')
+SIDECAR_ENTRIES = {
+    SIDECAR_VERSION: SIDECAR_ENTRY,
+    2: struct.Struct('<32sHHHhhHH'),
+    SIDECAR_EXTENDED_VERSION: struct.Struct('<32sHHHhhHHHH'),
+}
+SIDECAR_EXT = '.rgb'
+SIDECAR_MANIFEST = 'sidecars.json'
+
+
+def sidecar_path(header_path):
+    """textures/T_00.h -> textures/T_00.rgb"""
+    return os.path.splitext(header_path)[0] + SIDECAR_EXT
+
+
+def fresh_sidecar(header_path):
+    """Return the sidecar path if one exists and is not older than the header, else None."""
+    path = sidecar_path(header_path)
+    try:
+        sidecar_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        if os.stat(header_path).st_mtime_ns > sidecar_mtime:
+            return None
+    except OSError:
+        pass  # sidecar without its header is still usable
+    return path
+
+
+def write_sidecar(header_path, arrays, durations=None, manifest=True):
+    """Write the sidecar for a header and (unless manifest=False) record it in the directory manifest.
+
+    arrays are array dicts ({'name', 'width', 'height', 'data'}); durations is an
+    optional list of per-array frame durations in ms. Returns the sidecar path.
+    """
+    durations = list(durations or [])
+    extended = any(array.get('trim') or array.get('original_size') for array in arrays)
+    table = []
+    for index, array in enumerate(arrays):
+        name = array['name'].encode('ascii')
+        if len(name) > 32:
+            raise ValueError(f"Array name too long for sidecar: {array['name']}")
+        if len(array['data']) != array['width'] * array['height'] * 3:
+            raise ValueError(f"{array['name']}: data size does not match {array['width']}x{array['height']}")
+        duration = durations[index] if index < len(durations) else 0
+        if extended:
+            extras = list(array.get('trim') or (0, 0, 0, 0)) + list(array.get('original_size') or (0, 0))
+            table.append(SIDECAR_ENTRIES[SIDECAR_EXTENDED_VERSION].pack(
+                name, array['width'], array['height'], duration, *extras))
+        else:
+            table.append(SIDECAR_ENTRY.pack(name, array['width'], array['height'], duration))
+
+    path = sidecar_path(header_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, SIDECAR_EXTENDED_VERSION if extended else SIDECAR_VERSION,
+                                    len(arrays)))
+        f.write(b''.join(table))
+        for array in arrays:
+            f.write(array['data'])
+    os.replace(tmp_path, path)
+
+    if manifest:
+        update_manifest([header_path])
+    return path
+
+
+def update_manifest(header_paths):
+    """Add or refresh the sidecars of these headers in the sidecars.json of their directories.
+
+    Batch converters write sidecars with manifest=False from worker processes
+    and call this once afterwards, so the manifest is never written concurrently.
+    """
+    by_dir = {}
+    for header_path in header_paths:
+        path = sidecar_path(header_path)
+        by_dir.setdefault(os.path.dirname(os.path.abspath(path)), []).append((header_path, path))
+
+    for directory, records in by_dir.items():
+        manifest_path = os.path.join(directory, SIDECAR_MANIFEST)
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('version') != SIDECAR_VERSION:
+            manifest = {'version': SIDECAR_VERSION, 'sidecars': {}}
+
+        for header_path, path in records:
+            with open(header_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            manifest['sidecars'][os.path.basename(path)] = {
+                'header': os.path.basename(header_path),
+                'header_sha256': digest,
+                'size': os.path.getsize(path),
+                'arrays': [{'name': a['name'], 'width': a['width'], 'height': a['height']}
+                           for a in read_sidecar_info(path)]
+            }
+
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+
+def _read_table(f, path):
+    magic, version, count = SIDECAR_HEADER.unpack(f.read(SIDECAR_HEADER.size))
+    if magic != SIDECAR_MAGIC:
+        raise ValueError(f"{path} is not a texture sidecar")
+    entry_struct = SIDECAR_ENTRIES.get(version)
+    if entry_struct is None:
+        raise ValueError(f"{path}: unsupported sidecar version {version}")
+    table = []
+    for _ in range(count):
+        name, width, height, duration, *extras = entry_struct.unpack(f.read(entry_struct.size))
+        trim, original_size = extras[:4], extras[4:]
+        entry = {
+            'name': name.rstrip(b'\x00').decode('ascii'),
+            'width': width,
+            'height': height,
+            'duration': duration,
+            'count': width * height * 3
+        }
+        if trim and trim[2]:
+            entry['trim'] = trim
+        if original_size and original_size[0]:
+            entry['original_size'] = original_size
+        table.append(entry)
+    return table
+
+
+def read_sidecar_info(path):
+    """List the arrays of a sidecar as {'name', 'width', 'height', 'duration', 'count'}."""
+    with open(path, 'rb') as f:
+        return _read_table(f, path)
+
+
+def read_sidecar(path, var_names=None):
+    """Read a sidecar and return its array dicts (only var_names, if given)."""
+    arrays = []
+    with open(path, 'rb') as f:
+        for entry in _read_table(f, path):
+            size = entry['count']
+            if var_names and entry['name'] not in var_names:
+                f.seek(size, os.SEEK_CUR)
+                continue
+            data = f.read(size)
+            if len(data) != size:
+                raise ValueError(f"{path}: truncated data for {entry['name']}")
+            entry['data'] = data
+            arrays.append(entry)
+    return arrays
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Validate every texture header in a directory.
+
+For each array in each .h file this checks that:
+  - its dimensions can be found (#defines or *_frame_widths / *_frame_heights)
+  - the initializer holds exactly width * height * 3 values (width * height
+    palette indices for NAME_INDEXED arrays, which also need a GROUP_palette)
+  - every value is in 0..255
+  - *_frame_widths / *_frame_heights tables have matching lengths and agree
+    with the NAME_frame_N arrays present (only the frames a deduplicated
+    header's *_frame_sequence table refers to)
+
+Headers are checked across a process pool. The summary reports MB/s and the
+slowest files; --report writes the full result as JSON, and the exit status is
+1 when any header has errors, so asset CI can gate on it.
+
+Usage:
+  python validate_textures.py [texture_dir] [--jobs N] [--report report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from texture_header import FRAME_NAME_RE, HeaderScan
+
+REPORT_VERSION = 1
+
+
+def check_frame_tables(scan, arrays):
+    """Check *_frame_widths / *_frame_heights against each other and the frames present."""
+    errors = []
+    frames = {}
+    for array in arrays:
+        frame_match = FRAME_NAME_RE.fullmatch(array['name'])
+        if frame_match:
+            frames.setdefault(frame_match.group(1), {})[int(frame_match.group(2))] = array
+
+    for table_name, widths in scan.int_arrays.items():
+        if not table_name.endswith('_frame_widths'):
+            continue
+        prefix = table_name[:-len('_frame_widths')]
+        heights = scan.int_arrays.get(f"{prefix}_frame_heights")
+        if heights is None:
+            errors.append(f"{table_name} has no matching {prefix}_frame_heights")
+            continue
+        if len(widths) != len(heights):
+            errors.append(f"{table_name} has {len(widths)} entries but {prefix}_frame_heights has {len(heights)}")
+
+        present = frames.get(prefix, {})
+        sequence = scan.int_arrays.get(f"{prefix}_frame_sequence")
+        if sequence is not None:
+            # Deduplicated export: only the frames the sequence points at are stored
+            if len(sequence) != len(widths):
+                errors.append(f"{prefix}_frame_sequence has {len(sequence)} entries but {table_name} has {len(widths)}")
+            missing = sorted(set(sequence) - set(present))
+            if missing:
+                errors.append(f"{prefix}_frame_sequence refers to missing frame(s) {', '.join(map(str, missing))}")
+            unused = sorted(set(present) - set(sequence))
+            if unused:
+                errors.append(f"{prefix}_frame_N array(s) {', '.join(map(str, unused))} are not in {prefix}_frame_sequence")
+        elif len(present) != len(widths):
+            errors.append(f"{table_name} lists {len(widths)} frames but {len(present)} {prefix}_frame_N arrays were found")
+        for idx, array in sorted(present.items()):
+            if idx >= len(widths) or idx >= len(heights):
+                continue
+            if (array['width'], array['height']) != (widths[idx], heights[idx]):
+                errors.append(f"{array['name']} is {array['width']}x{array['height']} but the frame tables say "
+                              f"{widths[idx]}x{heights[idx]}")
+    return errors
+
+
+def validate_file(path):
+    """Validate one header and return its report entry."""
+    start = time.perf_counter()
+    entry = {
+        'file': os.path.basename(path),
+        'bytes': os.path.getsize(path),
+        'arrays': [],
+        'errors': []
+    }
+    try:
+        scan = HeaderScan()
+        # Missing dimensions are reported below instead of printed
+        with open(path, 'r') as f, contextlib.redirect_stdout(io.StringIO()):
+            arrays = list(scan.iter_arrays(f, entry['file']))
+    except Exception as e:
+        entry['errors'].append(f"could not parse: {e}")
+        entry['seconds'] = time.perf_counter() - start
+        return entry
+
+    for array in arrays:
+        expected = array['width'] * array['height'] * (1 if array.get('indexed') else 3)
+        if array.get('indexed') and scan.palette is None:
+            entry['errors'].append(f"{array['name']}: indexed but the header has no palette")
+        entry['arrays'].append({
+            'name': array['name'],
+            'width': array['width'],
+            'height': array['height'],
+            'count': array['count'],
+            'expected': expected
+        })
+        if array['count'] != expected:
+            entry['errors'].append(f"{array['name']}: expected {expected} values, found {array['count']}")
+        if array.get('out_of_range'):
+            entry['errors'].append(f"{array['name']}: {array['out_of_range']} value(s) outside 0..255")
+    for name in scan.missing_dimensions:
+        entry['errors'].append(f"{name}: could not find dimensions")
+    entry['errors'].extend(check_frame_tables(scan, arrays))
+
+    entry['seconds'] = time.perf_counter() - start
+    return entry
+
+
+def validate_directory(texture_dir, max_workers=None):
+    """Validate every .h file in texture_dir. Returns the report dict."""
+    paths = [os.path.join(texture_dir, entry) for entry in sorted(os.listdir(texture_dir))
+             if entry.endswith('.h')]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(paths)))
+
+    start = time.perf_counter()
+    if max_workers == 1:
+        files = [validate_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            files = list(executor.map(validate_file, paths))
+    elapsed = time.perf_counter() - start
+
+    total_bytes = sum(entry['bytes'] for entry in files)
+    return {
+        'version': REPORT_VERSION,
+        'directory': os.path.abspath(texture_dir),
+        'files': files,
+        'summary': {
+            'files': len(files),
+            'arrays': sum(len(entry['arrays']) for entry in files),
+            'files_with_errors': sum(1 for entry in files if entry['errors']),
+            'errors': sum(len(entry['errors']) for entry in files),
+            'bytes': total_bytes,
+            'seconds': elapsed,
+            'mb_per_s': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+            'workers': max_workers
+        }
+    }
+
+
+def print_report(report, verbose=False, slowest=5):
+    for entry in report['files']:
+        status = "FAIL" if entry['errors'] else "ok"
+        if verbose or entry['errors']:
+            print(f"{status:4}  {entry['file']}  ({len(entry['arrays'])} arrays, {entry['seconds'] * 1000:.1f} ms)")
+            for error in entry['errors']:
+                print(f"      {error}")
+
+    summary = report['summary']
+    print("\nSlowest files:")
+    for entry in sorted(report['files'], key=lambda e: e['seconds'], reverse=True)[:slowest]:
+        print(f"  {entry['seconds'] * 1000:8.1f} ms  {entry['bytes'] / 1024:8.0f} KB  {entry['file']}")
+    print(f"\nChecked {summary['files']} headers / {summary['arrays']} arrays "
+          f"({summary['bytes'] / (1024 * 1024):.2f} MB) in {summary['seconds']:.2f} s "
+          f"= {summary['mb_per_s']:.2f} MB/s on {summary['workers']} worker(s)")
+    print(f"{summary['errors']} error(s) in {summary['files_with_errors']} file(s)")
+
+
+def main(argv=None):
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "textures")
+    parser = argparse.ArgumentParser(description="Validate DoomClone texture headers")
+    parser.add_argument('texture_dir', nargs='?', default=default_dir)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--report', help="Write the full result as JSON to this file")
+    parser.add_argument('--verbose', '-v', action='store_true', help="List every file, not only failures")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.texture_dir):
+        print(f"Error: {args.texture_dir} is not a directory")
+        return 2
+
+    report = validate_directory(args.texture_dir, args.jobs)
+    print_report(report, args.verbose)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+    return 1 if report['summary']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())